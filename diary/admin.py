@@ -4,40 +4,80 @@ from django import forms
 from django.utils.translation import gettext_lazy as _
 from django.contrib.admin.widgets import FilteredSelectMultiple
 
-from django.urls import reverse
+from django.urls import reverse, get_script_prefix
 from django.core.files.uploadedfile import UploadedFile
 from django.utils.safestring import mark_safe
-import base64
+from django.utils.html import escape
+from functools import lru_cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from diary.entry_media import ENTRY_MEDIA_FIELDS, entry_media_path
+
+
+@lru_cache(maxsize=None)
+def admin_change_url_template(app_label, model_name, script_prefix):
+    # URL of change page is resolved once per model (and per prefix of app) - id of object is put into it by replace()
+    return reverse(f'admin:{app_label}_{model_name}_change', args=('__object_id__', ))
+
+
+def admin_change_url(obj):
+    return admin_change_url_template(obj._meta.app_label, obj._meta.model_name, get_script_prefix()).replace('__object_id__', str(obj.pk))
 
 
 def list_related_items(items, render_as_list=False):
+    # items - related objects of row (prefetched by get_queryset of ModelAdmin - so they are taken without queries)
+    links = ['<a href="{url}" style="white-space: nowrap; color: blue; text-decoration: underline">{name}</a>'.format(
+        url=admin_change_url(obj),
+        name=escape(str(obj)[:10])
+    ) for obj in items]
     html = '['
-    if items.count() > 0:
-        admin_viewname = 'admin:{app_label}_{model_name}_change'.format(
-            app_label=items[0]._meta.app_label,
-            model_name=items[0]._meta.model_name,
-        )
-
+    if links:
         if render_as_list:
-            html += '<ul>'
-            for obj in items.all():
-                html += '<li><a href="{url}" style="white-space: nowrap; color: blue; text-decoration: underline">{name}</a></li>'.format(
-                    url=reverse(admin_viewname, args=(obj.id, )),
-                    name=str(obj)[:10]
-                )
-            html += '</ul>'
+            html += '<ul>' + ''.join(f'<li>{link}</li>' for link in links) + '</ul>'
         else:
-            links = []
-            for obj in items.all():
-                links.append('<a href="{url}" style="white-space: nowrap; color: blue; text-decoration: underline">{name}</a>'.format(
-                    url=reverse(admin_viewname, args=(obj.id, )),
-                    name=str(obj)[:10]
-                ))
             html += ' | '.join(links)
     html +=']'
     return mark_safe(html)
 
 
+# lists of big tables (answers, timeline events, reactions) show estimated count of rows if table is bigger than this
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimated_table_count(queryset):
+    # count of rows by statistics of DB (without full scan of table) - only for not filtered lists, otherwise None
+    if queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute('SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s', [table])
+        else:
+            # SQLite has no statistics of rows by default - the biggest id (by index) is used as estimation
+            cursor.execute(f'SELECT MAX({connection.ops.quote_name(queryset.model._meta.pk.column)}) FROM {connection.ops.quote_name(table)}')
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        estimated = estimated_table_count(self.object_list)
+        if estimated is not None and estimated > ESTIMATED_COUNT_THRESHOLD:
+            return estimated
+        return super().count
+
+
+class BigTableAdmin(admin.ModelAdmin):
+    # lists of big tables: estimated count of rows and no second COUNT(*) of the whole table for filtered lists
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 @admin.register(models.Choice)
 class ChoiceAdmin(admin.ModelAdmin):
     autocomplete_fields = ['question']
@@ -67,7 +107,7 @@ class QuestionAdminForm(forms.ModelForm):
         question = super(QuestionAdminForm, self).save(commit=commit)
 
         if commit:
-            question.choices_of_questions = self.cleaned_data['choices_of_questions']
+            question.choices_of_questions.set(self.cleaned_data['choices_of_questions'])
         else:
             old_save_m2m = self.save_m2m
             def new_save_m2m():
@@ -87,6 +127,12 @@ class QuestionAdmin(admin.ModelAdmin):
         'question_text',
         'list_choices',
     ]
+    list_select_related = ['questions_group']
+
+    def get_queryset(self, request):
+        # Choices of all Questions of page are loaded by one query
+        return super().get_queryset(request).prefetch_related('choices_of_questions')
+
     def list_choices(self, obj):
         return list_related_items(obj.choices_of_questions.all())
     list_choices.short_description = _('Choices')
@@ -117,6 +163,12 @@ class JourneyAdmin(admin.ModelAdmin):
         'link',
         'list_countries',
     ]
+    list_select_related = ['user', 'type']
+
+    def get_queryset(self, request):
+        # Countries of all Journeys of page are loaded by one query
+        return super().get_queryset(request).prefetch_related('country')
+
     def list_countries(self, obj):
         return list_related_items(obj.country.all())
     list_countries.short_description = 'Countries'
@@ -132,13 +184,14 @@ class EntryAdminForm(forms.ModelForm):
 
     def save(self, commit=True):
         try:
+            # uploaded file is written to external storage by chunks (or read into binary column if media is stored in DB)
             if isinstance(self.cleaned_data.get('image'), UploadedFile) and self.cleaned_data.get('image').name:
-                self.instance.image = self.cleaned_data['image'].read()
                 self.instance.image_name = self.cleaned_data.get('image').name
+                self.instance.set_media_file('image', self.cleaned_data['image'])
                 
             if isinstance(self.cleaned_data.get('audio'), UploadedFile) and self.cleaned_data.get('audio').name:
-                self.instance.audio = self.cleaned_data['audio'].read()
                 self.instance.audio_name = self.cleaned_data.get('audio').name
+                self.instance.set_media_file('audio', self.cleaned_data['audio'])
         except Exception as e:
             print(f'err inn saving uploaded file to binary field: {e}')
 
@@ -150,30 +203,39 @@ class EntryAdmin(admin.ModelAdmin):
     form = EntryAdminForm
     autocomplete_fields = ['tag']
 
+    list_select_related = ['category']
+
+    def get_queryset(self, request):
+        # binary columns are not read for lists - only metadata of media is shown there,
+        # and Tags of all Entries of page are loaded by one query
+        return super().get_queryset(request).defer(*ENTRY_MEDIA_FIELDS).prefetch_related('tag')
+
+    # image/audio are not embedded into page - they are linked to 'get_entry_media' endpoint:
+    # small thumbnail of image, and audio is loaded only when it's played (by 'Range' requests)
     def image_display(self, obj):
-        if obj and obj.image:
-            return mark_safe(f'<img src="data:image/jpeg;base64,{base64.b64encode(obj.image).decode()}" width="150" />')
+        if obj and obj.image_size:
+            return mark_safe(f'<img src="{entry_media_path(obj.pk, "image", thumbnail=True)}" width="150" loading="lazy" />')
         else:
             return "No image"
     image_display.short_description = 'Image Display'
 
     def image_bytes(self, obj):
-        if obj and obj.image:
-            return base64.b64encode(obj.image).decode()[:20]
+        if obj and obj.image_size:
+            return f'{obj.image_content_type}, {obj.image_size} bytes, sha256: {obj.image_checksum[:12]}'
         else:
             return 'No image'
     image_bytes.short_description = 'Image Bytes'
 
     def audio_play(self, obj):
-        if obj and obj.audio:
-            return mark_safe(f'<audio controls name="media"><source src="data:audio/mpeg;base64,{base64.b64encode(obj.audio).decode()}" type="audio/mpeg"></audio>')
+        if obj and obj.audio_size:
+            return mark_safe(f'<audio controls preload="none" name="media" src="{entry_media_path(obj.pk, "audio")}"></audio>')
         else:
             return "No audio"
     audio_play.short_description = 'Audio Play'
 
     def audio_bytes(self, obj):
-        if obj and obj.audio:
-            return base64.b64encode(obj.audio).decode()[:20]
+        if obj and obj.audio_size:
+            return f'{obj.audio_content_type}, {obj.audio_size} bytes, sha256: {obj.audio_checksum[:12]}'
         else:
             return 'No audio'
     audio_bytes.short_description = 'Audio Bytes'
@@ -186,6 +248,30 @@ class EntryAdmin(admin.ModelAdmin):
     list_display = ('title', 'date_time', 'description', 'text', 'category', 'list_tags', 'image_name', 'image_display', 'image_bytes', 'audio_name',  'audio_play', 'audio_bytes')
 
 
+@admin.register(models.UsersAnswer)
+class UsersAnswerAdmin(BigTableAdmin):
+    list_display = ['id', 'user', 'question', 'answer', 'user_completed_poll', 'created_at']
+    list_select_related = ['user', 'question', 'answer', 'user_completed_poll__user', 'user_completed_poll__questions_group']
+    raw_id_fields = ['user', 'question', 'answer', 'user_completed_poll']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(models.UsersTimelineEvent)
+class UsersTimelineEventAdmin(BigTableAdmin):
+    list_display = ['id', 'user', 'event', 'category', 'event_template', 'emotion', 'created_at']
+    list_select_related = ['user', 'category', 'event_template__event_category']
+    raw_id_fields = ['user', 'timeline']
+    date_hierarchy = 'created_at'
+
+
+@admin.register(models.UsersTimelineEventReaction)
+class UsersTimelineEventReactionAdmin(BigTableAdmin):
+    list_display = ['id', 'user', 'event', 'reaction', 'category', 'emotion', 'created_at']
+    list_select_related = ['user', 'event__user', 'category']
+    raw_id_fields = ['user', 'event']
+    date_hierarchy = 'created_at'
+
+
 @admin.register(models.EntryTag)
 class EntryTagAdmin(admin.ModelAdmin):
     search_fields = ['name']
@@ -194,12 +280,9 @@ class EntryTagAdmin(admin.ModelAdmin):
 admin.site.register(models.EntryCategory)
 admin.site.register(models.QuestionsGroup)
 admin.site.register(models.DiaryUser)
-admin.site.register(models.UsersAnswer)
 admin.site.register(models.UsersCompletedPoll)
 admin.site.register(models.UsersTimeline)
 admin.site.register(models.TimelineEventCategory)
-admin.site.register(models.UsersTimelineEvent)
 admin.site.register(models.EventReactionCategory)
-admin.site.register(models.UsersTimelineEventReaction)
 admin.site.register(models.TimelineEventTemplate)
 admin.site.register(models.JourneyType)
\ No newline at end of file
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class DiaryConfig(AppConfig):
     name = "diary"
+
+    def ready(self):
+        from diary import signals  # noqa: F401 - connecting signals of app
@@ -0,0 +1,136 @@
+""" Benchmark of all endpoints of API_SCHEMA (command 'python manage.py benchmark_api'): every endpoint is requested
+    by Django test client (without web server and network) with its examples of GET params or POST data from API_SCHEMA.
+    For every endpoint: percentiles of latency, count and time of SQL queries, peak memory (by tracemalloc) and size of response.
+    Queries and memory are measured by separate request - so tracking of them doesn't change latencies.
+    POST requests are made in transaction which is rolled back - so DB stays the same and every request does the same work.
+    Results are saved as JSON - so they can be compared with results of another commit (see compare_benchmark_results)"""
+import json
+import math
+import subprocess
+import time
+import tracemalloc
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as dj_timezone
+from diary.views import API_SCHEMA
+
+BENCHMARK_PERCENTILES = (50, 90, 95, 99)
+# change of latency (in percents) which is shown as regression when results are compared
+BENCHMARK_REGRESSION_THRESHOLD = 20
+
+
+def benchmark_requests():
+    # (name, method, path, POST data) - for every example of every endpoint
+    for api in API_SCHEMA['all_get_apis'].values():
+        path = f"/{api['func']}/"
+        examples = [api[key] for key in ('example of GET URL without any params', 'example of GET URL with params') if key in api]
+        for params in examples or ['']:
+            yield f'GET {path}{params}', 'get', f'{path}{params}', None
+    for api in API_SCHEMA['all_post_apis'].values():
+        if 'example of POST data' in api:
+            yield f"POST /{api['func']}/", 'post', f"/{api['func']}/", api['example of POST data']
+
+
+def percentile(values, percent):
+    # nearest-rank percentile of sorted values
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+def make_request(client, method, path, data):
+    # returns (status, size of response). Streaming response is read to the end (rows are read from DB while it's sent)
+    if method == 'post':
+        with transaction.atomic():
+            response = client.post(path, data=json.dumps(data), content_type='application/json')
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            transaction.set_rollback(True)
+    else:
+        response = client.get(path)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+    return response.status_code, len(content)
+
+
+def benchmark_endpoint(client, method, path, data, requests_count, warmup):
+    # the first requests fill caches (reference data, documents of polls, projections of Timelines) - they are not measured
+    for _ in range(warmup):
+        make_request(client, method, path, data)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            status, size = make_request(client, method, path, data)
+        # captured queries are taken from log of connection - it's cleared by the next requests
+        queries = queries.captured_queries
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies = []
+    for _ in range(requests_count):
+        started_at = time.perf_counter()
+        make_request(client, method, path, data)
+        latencies.append((time.perf_counter() - started_at) * 1000)
+    latencies.sort()
+    result = {
+        'method': method.upper(),
+        'path': path,
+        'status': status,
+        'requests': requests_count,
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'max_ms': round(latencies[-1], 3),
+    }
+    for percent in BENCHMARK_PERCENTILES:
+        result[f'p{percent}_ms'] = round(percentile(latencies, percent), 3)
+    result['queries'] = len(queries)
+    result['queries_ms'] = round(sum(float(query['time']) for query in queries) * 1000, 3)
+    result['peak_memory_kb'] = round(peak_memory / 1024, 1)
+    result['response_bytes'] = size
+    return result
+
+
+def git_commit():
+    # commit of code which is benchmarked (None if it's not git repository)
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_benchmark(requests_count=20, warmup=2, only=None, on_result=None):
+    # only - names of endpoints (funcs) which are benchmarked (by default - all). on_result(name, result) is called for every endpoint.
+    # DEBUG is turned off as in production - with DEBUG Django keeps all queries in memory
+    results = {}
+    with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver', *settings.ALLOWED_HOSTS]):
+        client = Client()
+        for name, method, path, data in benchmark_requests():
+            if only and path.split('?')[0].strip('/') not in only:
+                continue
+            results[name] = benchmark_endpoint(client, method, path, data, requests_count, warmup)
+            if on_result:
+                on_result(name, results[name])
+    return {
+        'created_at': dj_timezone.now().isoformat(),
+        'commit': git_commit(),
+        'db_vendor': connection.vendor,
+        'requests': requests_count,
+        'warmup': warmup,
+        'endpoints': results,
+    }
+
+
+def compare_benchmark_results(old, new, threshold=BENCHMARK_REGRESSION_THRESHOLD):
+    # lines with changes of latency and queries for endpoints which are in both results
+    lines = []
+    for name, result in new['endpoints'].items():
+        old_result = old['endpoints'].get(name)
+        if not old_result:
+            continue
+        changes = {f'p{percent}': (result[f'p{percent}_ms'] - old_result[f'p{percent}_ms']) * 100 / (old_result[f'p{percent}_ms'] or 1e-9)
+                   for percent in (50, 95)}
+        regression = changes['p50'] > threshold or result['queries'] > old_result['queries']
+        lines.append(f"{'REGRESSION ' if regression else ''}{name}: p50 {old_result['p50_ms']} -> {result['p50_ms']} ms ({changes['p50']:+.0f}%), "
+                     f"p95 {old_result['p95_ms']} -> {result['p95_ms']} ms ({changes['p95']:+.0f}%), "
+                     f"queries {old_result['queries']} -> {result['queries']}")
+    return lines
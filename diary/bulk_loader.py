@@ -0,0 +1,468 @@
+""" Fast loading of big datasets (JSON, NDJSON or CSV files) into any Models of diary app - see command 'python manage.py load_diary_data'.
+    Rows can reference rows of other Models by natural keys (names instead of ids - see NATURAL_KEYS),
+    they are resolved by one query for every batch and every related Model (and found keys are cached).
+    Rows are inserted by bulk_create in batches, and Models are inserted in order of their dependencies -
+    pending rows of related Models are inserted before rows which reference them. Many-To-Many links are inserted
+    into through tables by bulk_create too.
+    bulk_create doesn't call save() and signals - so what they do is done here for whole batches (see BEFORE_INSERT/AFTER_INSERT),
+    and cached reference data, versions of data and Timelines of Users are reset once after loading"""
+import csv
+import json
+import time
+from datetime import timezone
+from pathlib import Path
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone as dj_timezone
+from diary.models import (QuestionsGroup, TimelineEventCategory, TimelineEventTemplate, UsersCompletedPoll, UsersTimelineEvent,
+                          UsersTimelineProjection, TECHNICAL_TL_CATEGORY, TECH_TL_QG_PASSED_EVENT_TEMPLATE, POLL_RESULT_FIELDS)
+from diary.entry_media import ENTRY_MEDIA_FIELDS
+from diary.reference_data import invalidate_reference_data
+from diary.data_versions import VERSIONED_MODELS, USER_TIMELINE_KEY, bump_data_versions
+from diary.poll_documents import poll_keys_of_groups
+
+LOADER_BATCH_SIZE = 2000
+# count of values in one "IN (...)" of query (SQLite has limit of params in one query)
+LOADER_QUERY_CHUNK_SIZE = 500
+# found natural keys of one Model which are kept in memory (cache is cleared when it's bigger)
+NATURAL_KEYS_CACHE_SIZE = 100000
+# only first errors are printed (all errors are counted)
+LOADER_ERRORS_SHOWN = 20
+# separator of several values of Many-To-Many field in one column of CSV file
+CSV_LIST_SEPARATOR = '|'
+
+# Model name: field (or lookup) by which rows of Model can be referenced instead of ids.
+# If several rows have the same natural key - the first one is used (by id)
+NATURAL_KEYS = {
+    'QuestionsGroup': 'group_name',
+    'Question': 'question_text',
+    'Choice': 'choice_text',
+    'DiaryUser': 'email',
+    'UsersTimeline': 'user__email',
+    'TimelineEventCategory': 'category_name',
+    'TimelineEventTemplate': 'event',
+    'EventReactionCategory': 'category_name',
+    'JourneyType': 'name',
+    'JourneyCountry': 'name',
+    'EntryTag': 'name',
+    'EntryCategory': 'name',
+}
+# Timeline of User is referenced by email of User - and it's the last Timeline of User (current one), not the first
+LAST_ROW_NATURAL_KEYS = ('UsersTimeline',)
+# loading of these Models changes polls (documents of QuestionsGroups)
+POLL_MODELS = ('QuestionsGroup', 'Question', 'Choice')
+
+
+def before_insert_users(loader, users):
+    # the same as DiaryUser.save()
+    for user in users:
+        user.email = user.email.lower()
+
+
+def before_insert_entries(loader, entries):
+    # the same as Entry.save() - metadata of image/audio (and moving them to external storage if it's set)
+    for entry in entries:
+        for media in ENTRY_MEDIA_FIELDS:
+            entry.update_media_meta(media)
+
+
+def after_insert_questions_groups(loader, groups):
+    # the same as QuestionsGroup.save() - technical Category and Template of passing of poll of every new group
+    tech_tl_event_cat = TimelineEventCategory.objects.filter(category_name=TECHNICAL_TL_CATEGORY).order_by('id').first()
+    if not tech_tl_event_cat:
+        tech_tl_event_cat = TimelineEventCategory.objects.create(category_name=TECHNICAL_TL_CATEGORY)
+    TimelineEventTemplate.objects.bulk_create([
+        TimelineEventTemplate(event_category=tech_tl_event_cat, event=TECH_TL_QG_PASSED_EVENT_TEMPLATE.format(questions_group_name=group.group_name))
+        for group in groups])
+    loader.changed_models.update(('TimelineEventCategory', 'TimelineEventTemplate'))
+
+
+def after_insert_users_answers(loader, answers):
+    # the same as UsersAnswer.save() - stored results of polls of new answers are not actual anymore
+    polls_ids = list({answer.user_completed_poll_id for answer in answers})
+    for start in range(0, len(polls_ids), LOADER_QUERY_CHUNK_SIZE):
+        UsersCompletedPoll.objects.filter(pk__in=polls_ids[start:start + LOADER_QUERY_CHUNK_SIZE]).update(**dict.fromkeys(POLL_RESULT_FIELDS))
+
+
+def after_insert_users_timeline_rows(loader, rows):
+    # Timelines and Events of these Users are changed
+    loader.timeline_users.update(row.user_id for row in rows)
+
+
+def after_insert_users_timeline_event_reactions(loader, reactions):
+    # Reactions are shown in Timeline of owner of Event (not of User who made Reaction)
+    events_ids = list({reaction.event_id for reaction in reactions})
+    for start in range(0, len(events_ids), LOADER_QUERY_CHUNK_SIZE):
+        loader.timeline_users.update(UsersTimelineEvent.objects.filter(pk__in=events_ids[start:start + LOADER_QUERY_CHUNK_SIZE])
+                                     .values_list('user_id', flat=True))
+
+
+# Model name: function(loader, objects of batch) - it's called before/after bulk_create of batch (in the same transaction)
+BEFORE_INSERT = {
+    'DiaryUser': before_insert_users,
+    'Entry': before_insert_entries,
+}
+AFTER_INSERT = {
+    'QuestionsGroup': after_insert_questions_groups,
+    'UsersAnswer': after_insert_users_answers,
+    'UsersTimeline': after_insert_users_timeline_rows,
+    'UsersTimelineEvent': after_insert_users_timeline_rows,
+    'UsersTimelineEventReaction': after_insert_users_timeline_event_reactions,
+}
+
+
+def natural_key_value(model_name, value):
+    # emails of Users are stored in lower case
+    return value.lower() if NATURAL_KEYS.get(model_name, '').endswith('email') else value
+
+
+def field_value(field, value):
+    # values from CSV files are strings - they are converted as in Django fixtures (BinaryField - from base64 text).
+    # Naive dates are in UTC (as dates of API)
+    if not isinstance(value, str):
+        return value
+    if value == '' and field.null:
+        return None
+    if isinstance(field, models.JSONField):
+        return json.loads(value)
+    value = field.to_python(value)
+    if isinstance(field, models.DateTimeField) and value and dj_timezone.is_naive(value):
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class DiaryDataLoader:
+    def __init__(self, batch_size=LOADER_BATCH_SIZE, ignore_conflicts=False, skip_existing=False):
+        self.batch_size = batch_size
+        self.ignore_conflicts = ignore_conflicts
+        # rows with natural keys which already exist in DB are not inserted again (for Models with natural key)
+        self.skip_existing = skip_existing
+        self.models = {model.__name__: model for model in apps.get_app_config('diary').get_models()}
+        # Model is found by its name, label ('diary.question') or name of table ('questions') - in any case
+        self.model_labels = {}
+        for model_name, model in self.models.items():
+            for label in (model_name, model._meta.label, model._meta.db_table):
+                self.model_labels[label.lower()] = model_name
+        # {Model name: list of rows} - dict keeps order of first rows of Models, so Models are inserted in order of data
+        self.pending = {}
+        self.keys_cache = {}
+        self.stats = {}
+        self.changed_models = set()
+        self.timeline_users = set()
+        self.explicit_pk_models = set()
+
+    def model_name_of(self, label):
+        model_name = self.model_labels.get(str(label).lower())
+        if not model_name:
+            raise LookupError(f'not found Model: {label}')
+        return model_name
+
+    def model_stats(self, model_name):
+        return self.stats.setdefault(model_name, {'loaded': 0, 'skipped': 0, 'errors': 0, 'links': 0, 'seconds': 0.0})
+
+    def add_error(self, model_name, record, error):
+        errors_count = sum(item['errors'] for item in self.stats.values())
+        self.model_stats(model_name)['errors'] += 1
+        if errors_count < LOADER_ERRORS_SHOWN:
+            print(f'Error in row of {model_name}: {error}. Row: {str(record)[:200]}')
+
+    def load(self, items):
+        # items - any iterable of (Model name or label, row as dict). Returns stats of loading by Models
+        try:
+            for label, record in items:
+                try:
+                    model_name = self.model_name_of(label)
+                except LookupError as e:
+                    self.add_error(str(label), record, e)
+                    continue
+                rows = self.pending.setdefault(model_name, [])
+                rows.append(record)
+                if len(rows) >= self.batch_size:
+                    self.flush(model_name)
+            while self.pending:
+                self.flush(next(iter(self.pending)))
+        finally:
+            # rows of batches which were already inserted stay in DB - so caches are reset even if loading is failed
+            self.reset_changed_data()
+        return self.stats
+
+    def dependencies(self, model):
+        return {field.related_model.__name__ for field in [*model._meta.fields, *model._meta.many_to_many]
+                if field.is_relation and field.related_model is not model}
+
+    def flush(self, model_name, flushing=()):
+        # pending rows of related Models are inserted at first (flushing - Models which are waiting for this one)
+        model = self.models[model_name]
+        for dependency in self.dependencies(model):
+            if dependency in self.pending and dependency not in flushing:
+                self.flush(dependency, flushing + (model_name,))
+        records = self.pending.pop(model_name, None)
+        if records:
+            self.insert_rows(model, records)
+
+    def field_of(self, model, name):
+        if name == 'pk':
+            return model._meta.pk
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # related field by its column name (like 'user_id')
+            if not name.endswith('_id'):
+                raise
+            field = model._meta.get_field(name[:-3])
+            if not field.many_to_one and not field.one_to_one:
+                raise
+        if not isinstance(field, models.Field):
+            # reverse relations can't be loaded from rows of this Model
+            raise FieldDoesNotExist(f'{model.__name__} has no field named {name!r}')
+        return field
+
+    def related_value(self, field, name, value):
+        # reference is id (int) or natural key (str) - by its column, not by its value (so natural key like "2024" is not an id):
+        # column of id (like 'user_id') or reference to Model without natural key is id, column 'user' - email of User.
+        # In JSON ids can be also numbers in column of natural key
+        if not isinstance(value, str):
+            return value
+        if field.related_model.__name__ in NATURAL_KEYS and (field.many_to_many or name != field.attname):
+            return value
+        if not value.isdigit():
+            raise ValueError(f'{name} should be id of {field.related_model.__name__}, but got: {value}')
+        return int(value)
+
+    def parse_record(self, model, record):
+        # returns ({column: value}, {related field: id or natural key}, {Many-To-Many field: list of ids or natural keys})
+        if not isinstance(record, dict):
+            raise ValueError('every row should be JSON object')
+        values, relations, links = {}, {}, {}
+        for name, value in record.items():
+            field = self.field_of(model, name)
+            if field.primary_key and value not in (None, ''):
+                self.explicit_pk_models.add(model.__name__)
+            if field.many_to_many:
+                if isinstance(value, str):
+                    value = [item for item in value.split(CSV_LIST_SEPARATOR) if item]
+                links[field] = [self.related_value(field, name, item) for item in value or []]
+            elif field.is_relation:
+                relations[field] = None if value in ('', None) else self.related_value(field, name, value)
+            else:
+                values[field.attname] = field_value(field, value)
+        return values, relations, links
+
+    def resolve_natural_keys(self, model, values):
+        # found ids are put into cache of Model - by one query for all values of batch which are not in cache yet
+        model_name = model.__name__
+        cache = self.keys_cache.setdefault(model_name, {})
+        keys = list({natural_key_value(model_name, value) for value in values if isinstance(value, str)} - set(cache))
+        key_field = NATURAL_KEYS.get(model_name)
+        if not keys or not key_field:
+            return
+        if len(cache) + len(keys) > NATURAL_KEYS_CACHE_SIZE:
+            cache.clear()
+        order = '-id' if model_name in LAST_ROW_NATURAL_KEYS else 'id'
+        for start in range(0, len(keys), LOADER_QUERY_CHUNK_SIZE):
+            for key, pk in (model.objects.filter(**{f'{key_field}__in': keys[start:start + LOADER_QUERY_CHUNK_SIZE]})
+                            .order_by(order).values_list(key_field, 'id')):
+                cache.setdefault(key, pk)
+
+    def related_id(self, model, value):
+        # value is id (int) or natural key (str) - see related_value
+        if value is None or isinstance(value, int):
+            return value
+        pk = self.keys_cache.get(model.__name__, {}).get(natural_key_value(model.__name__, value)) if isinstance(value, str) else None
+        if pk is None:
+            raise LookupError(f'not found {model.__name__} with {NATURAL_KEYS.get(model.__name__, "id")}: {value}')
+        return pk
+
+    def existing_natural_keys(self, model, objs):
+        key_field = NATURAL_KEYS.get(model.__name__)
+        if not key_field or '__' in key_field:
+            return set()
+        keys = list({getattr(obj, key_field) for obj in objs})
+        existing = set()
+        for start in range(0, len(keys), LOADER_QUERY_CHUNK_SIZE):
+            existing.update(model.objects.filter(**{f'{key_field}__in': keys[start:start + LOADER_QUERY_CHUNK_SIZE]})
+                            .values_list(key_field, flat=True))
+        return existing
+
+    def fill_missing_pks(self, model, objs):
+        # with ignore_conflicts ids of inserted rows are not returned by DB - they are found by natural keys (for Many-To-Many links)
+        key_field = NATURAL_KEYS.get(model.__name__)
+        without_pk = [obj for obj in objs if obj.pk is None]
+        if not without_pk or not key_field or '__' in key_field:
+            return
+        self.resolve_natural_keys(model, [getattr(obj, key_field) for obj in without_pk])
+        for obj in without_pk:
+            obj.pk = self.keys_cache[model.__name__].get(getattr(obj, key_field))
+
+    def insert_rows(self, model, records):
+        model_name = model.__name__
+        stats = self.model_stats(model_name)
+        started_at = time.monotonic()
+
+        parsed = []
+        for record in records:
+            try:
+                parsed.append((record, *self.parse_record(model, record)))
+            except (ValueError, TypeError, LookupError, ValidationError, FieldDoesNotExist) as e:
+                self.add_error(model_name, record, e)
+        # natural keys of all rows of batch - by one query for every related Model
+        related_values = {}
+        for record, values, relations, links in parsed:
+            for field, value in [*relations.items(), *((field, item) for field, items in links.items() for item in items)]:
+                related_values.setdefault(field.related_model, []).append(value)
+        for related_model, values in related_values.items():
+            self.resolve_natural_keys(related_model, values)
+
+        objs, objs_links = [], []
+        for record, values, relations, links in parsed:
+            try:
+                for field, value in relations.items():
+                    values[field.attname] = self.related_id(field.related_model, value)
+                obj_links = {field: list(dict.fromkeys(self.related_id(field.related_model, item) for item in items))
+                             for field, items in links.items()}
+                obj = model(**values)
+            except (LookupError, TypeError) as e:
+                self.add_error(model_name, record, e)
+                continue
+            objs.append(obj)
+            objs_links.append(obj_links)
+        if self.skip_existing:
+            existing = self.existing_natural_keys(model, objs)
+            if existing:
+                key_field = NATURAL_KEYS[model_name]
+                kept = [(obj, obj_links) for obj, obj_links in zip(objs, objs_links) if getattr(obj, key_field) not in existing]
+                stats['skipped'] += len(objs) - len(kept)
+                objs, objs_links = [obj for obj, _ in kept], [obj_links for _, obj_links in kept]
+        if not objs:
+            return
+
+        # auto_now/auto_now_add fields keep dates of loaded rows: bulk_create sets current time to all of them,
+        # so dates from data are set again on inserted rows (by one update for batch) - rows without dates keep time of loading
+        auto_dates = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+        loaded_dates = [(obj, {field.attname: getattr(obj, field.attname) for field in auto_dates if getattr(obj, field.attname) is not None})
+                        for obj in objs]
+        loaded_dates = [(obj, dates) for obj, dates in loaded_dates if dates]
+        if model_name in BEFORE_INSERT:
+            BEFORE_INSERT[model_name](self, objs)
+        links_count = 0
+        with transaction.atomic():
+            model.objects.bulk_create(objs, batch_size=self.batch_size, ignore_conflicts=self.ignore_conflicts)
+            self.set_loaded_dates(model, loaded_dates)
+            if any(objs_links):
+                if self.ignore_conflicts:
+                    self.fill_missing_pks(model, objs)
+                links_count = self.insert_links(model, objs, objs_links)
+            if model_name in AFTER_INSERT:
+                AFTER_INSERT[model_name](self, objs)
+        # new rows can have the same natural keys as rows which were found before (then the first one should be used)
+        self.keys_cache.pop(model_name, None)
+        self.changed_models.add(model_name)
+
+        stats['loaded'] += len(objs)
+        stats['links'] += links_count
+        stats['seconds'] += time.monotonic() - started_at
+        print(f'Loaded {len(objs)} rows of {model_name} (total {stats["loaded"]} rows, {stats["loaded"] / (stats["seconds"] or 1e-9):.0f} rows/s)...')
+
+    def set_loaded_dates(self, model, loaded_dates):
+        # with ignore_conflicts ids of inserted rows are not returned by DB (and rows with explicit ids can be existing rows) -
+        # so their dates can't be set again
+        if self.ignore_conflicts or not loaded_dates:
+            return
+        for obj, dates in loaded_dates:
+            for attname, value in dates.items():
+                setattr(obj, attname, value)
+        fields = sorted({attname for obj, dates in loaded_dates for attname in dates})
+        model.objects.bulk_update([obj for obj, dates in loaded_dates], fields, batch_size=self.batch_size)
+
+    def insert_links(self, model, objs, objs_links):
+        # rows of through tables of Many-To-Many fields for all rows of batch
+        links_count = 0
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            links = []
+            for obj, obj_links in zip(objs, objs_links):
+                if obj.pk is None:
+                    if obj_links.get(field):
+                        self.add_error(model.__name__, obj_links, f'links of {field.name} are not inserted - id of row is unknown')
+                    continue
+                links.extend(through(**{source: obj.pk, target: related_id}) for related_id in obj_links.get(field, []))
+            through.objects.bulk_create(links, batch_size=self.batch_size, ignore_conflicts=self.ignore_conflicts)
+            links_count += len(links)
+        return links_count
+
+    def reset_changed_data(self):
+        # the same as signals do for every saved row - but once for all loaded rows
+        if not self.changed_models:
+            return
+        invalidate_reference_data()
+        bump_data_versions(*(VERSIONED_MODELS[model_name] for model_name in self.changed_models if model_name in VERSIONED_MODELS))
+        if self.changed_models & set(POLL_MODELS):
+            bump_data_versions(*poll_keys_of_groups(QuestionsGroup.objects.values_list('id', flat=True)))
+        # documents of Timelines of Users are built again on the next reading
+        users_ids = list(self.timeline_users)
+        for start in range(0, len(users_ids), LOADER_QUERY_CHUNK_SIZE):
+            chunk = users_ids[start:start + LOADER_QUERY_CHUNK_SIZE]
+            UsersTimelineProjection.objects.filter(user_id__in=chunk).delete()
+            bump_data_versions(*(USER_TIMELINE_KEY.format(user_id=user_id) for user_id in chunk))
+        # rows with explicit ids don't move sequences of ids (in PostgreSQL) - so next rows would get the same ids
+        sequences_sql = connection.ops.sequence_reset_sql(no_style(), [self.models[model_name] for model_name in self.explicit_pk_models])
+        if sequences_sql:
+            with connection.cursor() as cursor:
+                for sql in sequences_sql:
+                    cursor.execute(sql)
+        self.changed_models.clear()
+        self.timeline_users.clear()
+        self.explicit_pk_models.clear()
+
+
+def read_data_file(path, model=None):
+    # yields (Model label, row) from file:
+    # - JSON: list of rows or {Model label: list of rows}, NDJSON (.ndjson/.jsonl): one row in every line.
+    #   Row can be in format of Django fixtures ({"model": "diary.question", "pk": 1, "fields": {...}})
+    #   or just dict of fields (with or without "model" key)
+    # - CSV: row in every line, Many-To-Many values are separated by CSV_LIST_SEPARATOR.
+    # If row has no Model - it's model param, or name of file (like 'questions.csv' or 'Question.ndjson')
+    path = Path(path)
+    model = model or path.stem
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        with open(path, newline='', encoding='utf-8') as csv_file:
+            for row in csv.DictReader(csv_file):
+                yield model, {name: value for name, value in row.items() if name}
+        return
+
+    def json_row(item):
+        if isinstance(item, dict) and 'model' in item:
+            item = dict(item)
+            label = item.pop('model')
+            if 'fields' in item:
+                fields = dict(item['fields'])
+                if item.get('pk') is not None:
+                    fields['pk'] = item['pk']
+                item = fields
+            return label, item
+        return model, item
+
+    if suffix in ('.ndjson', '.jsonl'):
+        with open(path, encoding='utf-8') as ndjson_file:
+            for line_number, line in enumerate(ndjson_file, 1):
+                if line.strip():
+                    try:
+                        item = json.loads(line)
+                    except ValueError as e:
+                        raise ValueError(f'{path} line {line_number}: {e}')
+                    yield json_row(item)
+        return
+    with open(path, encoding='utf-8') as json_file:
+        data = json.load(json_file)
+    if isinstance(data, dict):
+        for label, rows in data.items():
+            for row in rows:
+                yield label, row
+    else:
+        for item in data:
+            yield json_row(item)
@@ -0,0 +1,105 @@
+""" Versions of data for conditional GET requests: every change of tracked Models increases version of their data
+    (by post_save/post_delete signals - see signals.py, or explicitly by bump_data_versions for bulk writes),
+    and GET endpoints answer with status 304 (without reading and serializing data)
+    if client sends 'If-None-Match'/'If-Modified-Since' headers and data versions were not changed"""
+import hashlib
+from django.db import connection, transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone as dj_timezone
+from django.views.decorators.http import condition
+from diary.models import DataVersion, UsersTimelineEvent
+from diary.reference_data import use_reference_versions
+
+# Model name: key of its data (name of table). Versions of reference tables are also versions of their cached rows (see reference_data.py)
+VERSIONED_MODELS = {
+    'QuestionsGroup': 'questions_groups',
+    'Question': 'questions',
+    'Choice': 'choices',
+    'TimelineEventCategory': 'timeline_event_categories',
+    'TimelineEventTemplate': 'timeline_event_templates',
+    'EventReactionCategory': 'event_reaction_categories',
+    'EntryCategory': 'entry_categories',
+    'EntryTag': 'entry_tags',
+    'JourneyType': 'journey_types',
+    'JourneyCountry': 'journey_countries',
+}
+# changes of these Models increase only version of Timeline of their User (not of the whole table) -
+# so writes of different Users never change (and never lock) the same row of versions
+USER_TIMELINE_MODELS = ('UsersTimeline', 'UsersTimelineEvent', 'UsersTimelineEventReaction')
+USER_TIMELINE_KEY = 'user_timeline:{user_id}'
+
+
+def event_owner_id(event_id):
+    return UsersTimelineEvent.objects.filter(pk=event_id).values_list('user_id', flat=True).first()
+
+
+def data_keys_of_instance(instance):
+    model_name = type(instance).__name__
+    if model_name in VERSIONED_MODELS:
+        return [VERSIONED_MODELS[model_name]]
+    if model_name == 'UsersTimelineEventReaction':
+        # Reactions are shown in Timeline of owner of Event (not of User who made Reaction)
+        user_id = event_owner_id(instance.event_id)
+        return [USER_TIMELINE_KEY.format(user_id=user_id)] if user_id else []
+    if model_name in USER_TIMELINE_MODELS:
+        return [USER_TIMELINE_KEY.format(user_id=instance.user_id)]
+    return []
+
+
+def bump_data_versions(*keys):
+    now = dj_timezone.now()
+    # keys are sorted - so rows of versions are always locked in the same order (without deadlocks of concurrent writes)
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    if connection.vendor in ('sqlite', 'postgresql'):
+        # existing versions are increased and versions which don't exist yet are created - by one query
+        table = connection.ops.quote_name(DataVersion._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO {table} ("key", "version", "updated_at") VALUES {", ".join(["(%s, 1, %s)"] * len(keys))} '
+                           f'ON CONFLICT ("key") DO UPDATE SET "version" = {table}."version" + 1, "updated_at" = EXCLUDED."updated_at"',
+                           [value for key in keys for value in (key, connection.ops.adapt_datetimefield_value(now))])
+        return
+    # all existing versions are increased by one query, and versions which don't exist yet are created
+    updated = DataVersion.objects.filter(key__in=keys).update(version=F('version') + 1, updated_at=now)
+    if updated < len(keys):
+        missing = set(keys) - set(DataVersion.objects.filter(key__in=keys).values_list('key', flat=True)) if updated else set(keys)
+        for key in missing:
+            try:
+                with transaction.atomic():
+                    DataVersion.objects.create(key=key, version=1, updated_at=now)
+            except IntegrityError:
+                # the same version was just created by another request
+                DataVersion.objects.filter(key=key).update(version=F('version') + 1, updated_at=now)
+
+
+def get_data_versions(request, keys_func):
+    # versions are read by one query and only once for request (they are needed for both ETag and Last-Modified).
+    # keys_func can return None - then response doesn't depend on versions and it's not conditional (versions are None)
+    if not hasattr(request, 'data_versions'):
+        keys = keys_func(request)
+        if keys is None:
+            request.data_versions = None
+        else:
+            versions = {item['key']: item for item in DataVersion.objects.filter(key__in=keys).values('key', 'version', 'updated_at')}
+            request.data_versions = [versions.get(key, {'key': key, 'version': 0, 'updated_at': None}) for key in keys]
+            # cached reference rows in response are of the same versions as in ETag (not older rows of this process)
+            use_reference_versions(request.data_versions)
+    return request.data_versions
+
+
+def conditional_on_data_versions(keys_func):
+    # keys_func(request) returns list of keys of data which are used in response of endpoint
+    def data_etag(request, *args, **kwargs):
+        if get_data_versions(request, keys_func) is None:
+            return None
+        versions = '-'.join(str(item['version']) for item in get_data_versions(request, keys_func))
+        # the same data with other GET params (or for other Accept header) is another response
+        params = hashlib.md5(f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}".encode('utf-8')).hexdigest()[:16]
+        return f'{versions}-{params}'
+
+    def data_last_modified(request, *args, **kwargs):
+        dates = [item['updated_at'] for item in get_data_versions(request, keys_func) or [] if item['updated_at']]
+        return max(dates) if dates else None
+
+    return condition(etag_func=data_etag, last_modified_func=data_last_modified)
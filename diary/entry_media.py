@@ -0,0 +1,82 @@
+""" Helpers for serving Entry image/audio (BinaryField values) as raw binary responses:
+    links to them, detecting Content-Type of the stored bytes and parsing of HTTP 'Range' header"""
+import mimetypes
+import re
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+ENTRY_MEDIA_FIELDS = ('image', 'audio')
+
+# first bytes of the most common image/audio formats (names of files are not required in Entry, so we can't always rely on them)
+MEDIA_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 0, 'image/png'),
+    (b'\xff\xd8\xff', 0, 'image/jpeg'),
+    (b'GIF87a', 0, 'image/gif'),
+    (b'GIF89a', 0, 'image/gif'),
+    (b'WEBP', 8, 'image/webp'),
+    (b'BM', 0, 'image/bmp'),
+    (b'\x00\x00\x01\x00', 0, 'image/x-icon'),
+    (b'WAVE', 8, 'audio/wav'),
+    (b'ID3', 0, 'audio/mpeg'),
+    (b'\xff\xfb', 0, 'audio/mpeg'),
+    (b'\xff\xf3', 0, 'audio/mpeg'),
+    (b'\xff\xf2', 0, 'audio/mpeg'),
+    (b'OggS', 0, 'audio/ogg'),
+    (b'fLaC', 0, 'audio/flac'),
+    (b'ftyp', 4, 'audio/mp4'),
+]
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def entry_media_path(entry_id, media, thumbnail=False):
+    # link to 'get_entry_media' endpoint (raw bytes of image/audio, or small thumbnail of image)
+    return f'/get_entry_media/?entry_id={entry_id}&media={media}' + ('&thumbnail=true' if thumbnail else '')
+
+
+def guess_media_content_type(data, name=None):
+    head = bytes(data[:16]) if data else b''
+    for signature, offset, content_type in MEDIA_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return content_type
+    if name:
+        content_type, _ = mimetypes.guess_type(name)
+        if content_type:
+            return content_type
+    return 'application/octet-stream'
+
+
+def parse_range_header(range_header, size):
+    # returns (start, end) - both inclusive - for single byte range like 'bytes=0-499', 'bytes=500-' or 'bytes=-500'
+    # returns None if range is not satisfiable (or it's several ranges, which are not supported)
+    match = RANGE_RE.match(range_header.strip())
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # suffix range - last N bytes
+        start = max(size - int(end), 0)
+        end = size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+class PassthroughRenderer(BaseRenderer):
+    # Renderer for endpoints which return raw bytes (image/audio) in HttpResponse:
+    # it allows any 'Accept' header from client (like 'image/*' from <img> tag or 'audio/*' from <audio> tag).
+    # Raw bytes are sent in HttpResponse (without rendering) - so data here is help or error of endpoint and it's sent as JSON
+    media_type = '*/*'
+    format = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, bytearray)):
+            return data
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = JSONRenderer.media_type
+        return JSONRenderer().render(data, renderer_context=renderer_context)
@@ -0,0 +1,57 @@
+""" Small thumbnails of Entry images (for Admin lists and for clients - get_entry_media with thumbnail=true).
+    Thumbnail is made from original image on the first request and it's cached as file named by checksum of original image,
+    so changed image gets new thumbnail (and cached thumbnails never need invalidation).
+    Pillow is optional: without it (or for image which Pillow can't open) original image is sent instead of thumbnail"""
+import io
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+THUMBNAIL_SIZE = (150, 150)
+THUMBNAIL_CONTENT_TYPE = 'image/jpeg'
+
+
+def thumbnail_path(checksum):
+    root = Path(getattr(settings, 'ENTRY_MEDIA_ROOT', Path(settings.BASE_DIR) / 'entry_media')) / 'thumbnails'
+    return root / checksum[:2] / f'{checksum}-{THUMBNAIL_SIZE[0]}x{THUMBNAIL_SIZE[1]}.jpg'
+
+
+def make_thumbnail(image_bytes):
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # transparent parts are shown on white background (JPEG has no transparency)
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        thumbnail = io.BytesIO()
+        image.save(thumbnail, format='JPEG', quality=80)
+    return thumbnail.getvalue()
+
+
+def get_image_thumbnail(checksum, read_image):
+    # returns bytes of thumbnail or None. read_image() returns bytes of original image - it's called only if thumbnail is not cached yet
+    if Image is None or not checksum:
+        return None
+    path = thumbnail_path(checksum)
+    if path.exists():
+        return path.read_bytes()
+    try:
+        thumbnail = make_thumbnail(read_image())
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    # thumbnail is written to temporary file at first - so other requests never read half-written thumbnail
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp_file:
+        tmp_file.write(thumbnail)
+    os.replace(tmp_file.name, path)
+    return thumbnail
@@ -0,0 +1,144 @@
+""" Adding of Entries with big image/audio without holding several copies of them in memory:
+    - multipart upload for add_entry - image/audio are sent as files (Django saves big files to temporary files by chunks),
+      or as <media>_base64 parts which are decoded chunk by chunk
+    - bulk import (add_entries_bulk) - JSON array or NDJSON lines of Entries, they are saved one by one
+      (in one transaction for every chunk), so only one Entry with its media is in memory at once.
+    Media is decoded into temporary file (in memory only while it's small) and then it's written to external storage by chunks
+    and published there after commit of transaction with Entry (or it's read only once into binary column if media is stored in DB -
+    see media_storage.py)"""
+import base64
+import json
+import tempfile
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from diary.models import DiaryUser, Entry
+from diary.entry_media import ENTRY_MEDIA_FIELDS
+from diary.reference_data import get_reference_row
+from diary.serializers import EntrySerializer
+
+# size of part of base64 text which is decoded at once (multiple of 4 - so every part is decoded separately)
+BASE64_DECODE_CHUNK_SIZE = 64 * 1024
+ENTRIES_BULK_CHUNK_SIZE = 50
+# fields of Entry which are validated by EntrySerializer (user, category, tags and media are checked separately)
+ENTRY_TEXT_FIELDS = ('title', 'date_time', 'description', 'text', 'image_name', 'audio_name')
+
+
+def base64_text_chunks(value, chunk_size=BASE64_DECODE_CHUNK_SIZE):
+    # value is str (from JSON) or file (part of multipart request)
+    if isinstance(value, str):
+        for start in range(0, len(value), chunk_size):
+            yield value[start:start + chunk_size].encode('ascii')
+    else:
+        yield from value.chunks(chunk_size)
+
+
+def decode_base64_to_file(value):
+    # line breaks and spaces in base64 text are ignored (as in base64.decodebytes)
+    decoded = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    rest = b''
+    for chunk in base64_text_chunks(value):
+        chunk = rest + b''.join(chunk.split())
+        end = len(chunk) - len(chunk) % 4
+        decoded.write(base64.b64decode(chunk[:end], validate=True))
+        rest = chunk[end:]
+    if rest:
+        raise ValueError('base64 value has wrong length')
+    decoded.seek(0)
+    return decoded
+
+
+def entry_media_of_item(item):
+    # {media: file} - from uploaded file (image/audio) or from base64 value (image_base64/audio_base64)
+    media_files = {}
+    for media in ENTRY_MEDIA_FIELDS:
+        if hasattr(item.get(media), 'chunks'):
+            media_files[media] = item[media]
+        elif item.get(f'{media}_base64'):
+            media_files[media] = decode_base64_to_file(item[f'{media}_base64'])
+    return media_files
+
+
+def new_entry_of_item(item, users_exist):
+    # returns (not saved Entry, ids of its Tags, None) or (None, None, error)
+    # users_exist - {user_id: bool}, it's filled here for new users (so every User is checked only once in bulk import)
+    if isinstance(item, Exception):
+        # NDJSON line which is not valid JSON (see NDJSONParser)
+        return None, None, f'{item}'
+    if not isinstance(item, dict):
+        return None, None, 'every Entry should be JSON object'
+    text_data = {field: item[field] for field in ENTRY_TEXT_FIELDS if field in item}
+    if text_data.get('date_time'):
+        text_data['date_time'] = datetime.strptime(text_data['date_time'][:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    serializer = EntrySerializer(data=text_data, fields=ENTRY_TEXT_FIELDS)
+    if not serializer.is_valid():
+        return None, None, f'incoming Entry data is not valid. Errors: {serializer.errors}'
+
+    user_id = str(item.get('user_id', ''))
+    if user_id not in users_exist:
+        users_exist[user_id] = user_id.isdigit() and DiaryUser.objects.filter(pk=user_id).exists()
+    category_id = str(item.get('category_id', ''))
+    tags = item.get('tags') or []
+    if isinstance(tags, str):
+        # in multipart request tags are sent as JSON string
+        tags = json.loads(tags)
+    tags_ids = [str(tag.get('tag_id', '')) if isinstance(tag, dict) else '' for tag in tags]
+    if not users_exist[user_id]:
+        return None, None, f'not found User with id: {user_id}'
+    if not category_id.isdigit() or not get_reference_row('entry_categories', int(category_id)):
+        return None, None, f'not found EntryCategory with id: {category_id}'
+    wrong_tags = [tag_id for tag_id in tags_ids if not tag_id.isdigit() or not get_reference_row('entry_tags', int(tag_id))]
+    if wrong_tags:
+        return None, None, f'not found EntryTags with ids: {", ".join(wrong_tags)}'
+
+    entry = Entry(user_id=int(user_id), category_id=int(category_id), **serializer.validated_data)
+    for media, file in entry_media_of_item(item).items():
+        if not getattr(entry, f'{media}_name') and isinstance(file, UploadedFile):
+            setattr(entry, f'{media}_name', file.name[:100])
+        entry.set_media_file(media, file)
+    return entry, list(dict.fromkeys(int(tag_id) for tag_id in tags_ids)), None
+
+
+def entry_saved_data(entry):
+    # saved Entry without its image/audio (they are not sent back - only their size, checksum and type)
+    return EntrySerializer(entry, fields=[field for field in EntrySerializer().fields if field not in ENTRY_MEDIA_FIELDS]).data
+
+
+def save_entries_in_chunks(items, chunk_size=ENTRIES_BULK_CHUNK_SIZE):
+    # items - list or any iterable (like generator of NDJSON lines). Items are taken one by one - media of Entry is released
+    # right after saving of Entry. Every chunk is saved in one transaction, Tags of all Entries of chunk are saved by one query
+    items = iter(items)
+    results = []
+    users_exist = {}
+    while True:
+        chunk_results = []
+        chunk_saved = []
+        try:
+            with transaction.atomic():
+                tags_links = []
+                for index, item in zip(range(len(results), len(results) + chunk_size), items):
+                    try:
+                        entry, tags_ids, error = new_entry_of_item(item, users_exist)
+                    except Exception as e:
+                        entry, tags_ids, error = None, None, f'{e}'
+                    if entry:
+                        # result is added before saving - if saving fails, it's changed to error with all saved Entries of chunk
+                        chunk_saved.append(len(chunk_results))
+                        chunk_results.append({'index': index, 'res': 'good'})
+                        entry.save()
+                        chunk_results[-1]['entry_saved_id'] = entry.pk
+                        tags_links.extend(Entry.tag.through(entry_id=entry.pk, entrytag_id=tag_id) for tag_id in tags_ids)
+                    else:
+                        chunk_results.append({'index': index, 'res': 'error', 'error': error})
+                    # media of Entry is not kept in memory until the end of chunk
+                    del item, entry
+                Entry.tag.through.objects.bulk_create(tags_links)
+        except Exception as e:
+            # nothing of chunk is saved
+            for position in chunk_saved:
+                chunk_results[position] = {'index': chunk_results[position]['index'], 'res': 'error',
+                                           'error': f'Error in Saving Entry: {e}'}
+        if not chunk_results:
+            return results
+        results.extend(chunk_results)
@@ -0,0 +1,44 @@
+""" This script can be run from command line as 'python manage.py benchmark_api'
+    and it's requesting all endpoints of API_SCHEMA with their examples and printing latencies, SQL queries and memory of every endpoint.
+    Results can be saved as JSON (--output) and compared with results of another commit (--compare).
+    For meaningful numbers DB should have data - see generate_diary_data command"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+from diary.benchmark import BENCHMARK_REGRESSION_THRESHOLD, compare_benchmark_results, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks all API endpoints (latency percentiles, SQL queries, peak memory) and saves results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20, help='count of measured requests of every endpoint')
+        parser.add_argument('--warmup', type=int, default=2, help='count of requests of every endpoint before measuring')
+        parser.add_argument('--endpoint', action='append', help='name of endpoint (func) for benchmark, can be set several times (by default - all endpoints)')
+        parser.add_argument('--output', help='JSON file for results')
+        parser.add_argument('--compare', help='JSON file with previous results - changes of latencies and queries are printed')
+        parser.add_argument('--threshold', type=float, default=BENCHMARK_REGRESSION_THRESHOLD, help='growth of p50 latency (in percents) which is regression')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests should be at least 1')
+        old_results = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as results_file:
+                old_results = json.load(results_file)
+        print('START script: benchmark_api!')
+
+        def print_result(name, result):
+            print(f"{name}: status {result['status']}, p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+                  f"queries {result['queries']} ({result['queries_ms']} ms), peak memory {result['peak_memory_kb']} KB, "
+                  f"response {result['response_bytes']} bytes")
+
+        results = run_benchmark(options['requests'], options['warmup'], options['endpoint'], on_result=print_result)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as results_file:
+                json.dump(results, results_file, indent=2)
+            print(f"\nResults are saved to: {options['output']}")
+        if old_results:
+            print(f"\nComparing with results of commit {old_results.get('commit')} ({old_results.get('created_at')}):")
+            for line in compare_benchmark_results(old_results, results, options['threshold']):
+                print(line)
+        print('FINISH script: benchmark_api!')
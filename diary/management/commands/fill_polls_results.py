@@ -0,0 +1,50 @@
+""" This script can be run from command line as 'python manage.py fill_polls_results'
+    and it's calculating and storing results (total_score, total_prc, total_cat) for already existing Users Completed Polls
+    (results of new polls are stored when they are completed by 'add_user_answers_with_cp' endpoint)"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Sum
+from diary.models import UsersCompletedPoll, UsersAnswer, QuestionsGroup, POLL_RESULT_FIELDS, calc_poll_result
+
+
+class Command(BaseCommand):
+    help = 'Calculates and stores results of Users Completed Polls which have no stored results yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='recalculate results of all polls (also of polls with already stored results)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='count of polls which are calculated and saved at once')
+
+    def handle(self, *args, **options):
+        print('START script: fill_polls_results!')
+        polls = UsersCompletedPoll.objects.all() if options['all'] else UsersCompletedPoll.objects.filter(total_score__isnull=True)
+        polls_ids = list(polls.order_by('id').values_list('id', flat=True))
+        questions_groups = QuestionsGroup.objects.in_bulk()
+        filled, without_answers, errors = 0, 0, 0
+
+        for i in range(0, len(polls_ids), options['batch_size']):
+            batch_ids = polls_ids[i:i + options['batch_size']]
+            # scores of all polls of batch by one query
+            scores = dict(UsersAnswer.objects.filter(user_completed_poll__in=batch_ids).order_by()
+                          .values_list('user_completed_poll').annotate(total_score=Sum(F('answer__order') - 1)))
+            batch = UsersCompletedPoll.objects.filter(pk__in=batch_ids).only('id', 'questions_group_id', *POLL_RESULT_FIELDS)
+            polls_for_update = []
+            for poll in batch:
+                if poll.pk not in scores:
+                    without_answers += 1
+                    continue
+                try:
+                    result = calc_poll_result(scores[poll.pk], questions_groups[poll.questions_group_id])
+                except Exception as e:
+                    errors += 1
+                    print(f'Error: can not calc results for ComplitedPoll: {poll.pk}. Error: {e}')
+                    continue
+                for key, value in result.items():
+                    setattr(poll, key, value)
+                polls_for_update.append(poll)
+            with transaction.atomic():
+                UsersCompletedPoll.objects.bulk_update(polls_for_update, POLL_RESULT_FIELDS)
+            filled += len(polls_for_update)
+
+            print(f'Stored results for {filled} of {len(polls_ids)} polls...')
+
+        print(f'FINISH script: fill_polls_results! Results are stored for {filled} polls. Polls without answers: {without_answers}. Errors: {errors}')
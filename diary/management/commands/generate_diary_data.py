@@ -0,0 +1,55 @@
+""" This script can be run from command line as 'python manage.py generate_diary_data'
+    and it's generating synthetic dataset of given size for load testing and benchmarks (see benchmark_api command):
+    Users with Timelines, Events, Reactions, completed polls with Answers, Entries with image/audio and Journeys.
+    Rows are inserted by the same bulk loader as in load_diary_data command"""
+import time
+from django.core.management.base import BaseCommand
+from diary.bulk_loader import DiaryDataLoader
+from diary.synthetic_data import SyntheticDataset
+
+
+class Command(BaseCommand):
+    help = 'Generates synthetic dataset (Users with all their data) for load testing and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--events-per-user', type=int, default=20)
+        parser.add_argument('--reactions-per-event', type=int, default=1)
+        parser.add_argument('--questions-groups', type=int, default=2)
+        parser.add_argument('--questions-per-group', type=int, default=5)
+        parser.add_argument('--choices-per-group', type=int, default=4)
+        parser.add_argument('--polls-per-user', type=int, default=2, help='completed polls of every User (with answers to all Questions of group)')
+        parser.add_argument('--entries-per-user', type=int, default=5)
+        parser.add_argument('--media-size', type=int, default=10 * 1024, help='size of image and audio of every Entry in bytes (0 - Entries without media)')
+        parser.add_argument('--journeys-per-user', type=int, default=2)
+        parser.add_argument('--prefix', default='load', help='prefix of names and emails of generated rows (for several datasets in the same DB)')
+        parser.add_argument('--seed', type=int, default=1, help='seed of random values - the same params give the same dataset')
+        parser.add_argument('--batch-size', type=int, default=500, help='count of rows of one Model which are inserted at once')
+
+    def handle(self, *args, **options):
+        print('START script: generate_diary_data!')
+        dataset = SyntheticDataset(prefix=options['prefix'], users=options['users'], events_per_user=options['events_per_user'],
+                                   reactions_per_event=options['reactions_per_event'], questions_groups=options['questions_groups'],
+                                   questions_per_group=options['questions_per_group'], choices_per_group=options['choices_per_group'],
+                                   polls_per_user=options['polls_per_user'], entries_per_user=options['entries_per_user'],
+                                   media_size=options['media_size'], journeys_per_user=options['journeys_per_user'], seed=options['seed'])
+        started_at = time.monotonic()
+        # rows which already exist (by names) are not inserted again - so dataset can be generated again with more Users
+        # (only new Users get their Events, Entries, polls, etc)
+        stats = {}
+        for rows in (dataset.rows, dataset.answers_rows, dataset.reactions_rows):
+            # Answers and Reactions reference rows by ids - so they are generated after all other rows are inserted
+            loader = DiaryDataLoader(batch_size=options['batch_size'], skip_existing=True)
+            for model_name, item in loader.load(rows()).items():
+                stats[model_name] = item
+
+        print()
+        for model_name, item in stats.items():
+            print(f'{model_name}: generated {item["loaded"]} rows (already existing: {item["skipped"]}, errors: {item["errors"]}), '
+                  f'{item["loaded"] / (item["seconds"] or 1e-9):.0f} rows/s')
+        loaded = sum(item['loaded'] for item in stats.values())
+        seconds = time.monotonic() - started_at
+        print(f'Total: generated {loaded} rows in {seconds:.2f} s ({loaded / (seconds or 1e-9):.0f} rows/s)')
+        if 'UsersCompletedPoll' in stats:
+            print("Results of generated polls are not calculated yet - run 'python manage.py fill_polls_results'")
+        print('FINISH script: generate_diary_data!')
@@ -0,0 +1,48 @@
+""" This script can be run from command line as 'python manage.py load_diary_data <files>'
+    and it's loading big datasets (JSON, NDJSON or CSV files) into any Models of diary app.
+    Rows can reference rows of other Models by names instead of ids (see NATURAL_KEYS in bulk_loader.py), for example:
+    {"model": "Question", "question_text": "Is this question awesome?", "questions_group": "Group1"}
+    Rows are inserted by batches (bulk_create) in order of dependencies of Models, and throughput is printed for every Model"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from diary.bulk_loader import DiaryDataLoader, LOADER_BATCH_SIZE, read_data_file
+
+
+class Command(BaseCommand):
+    help = 'Loads rows of diary Models from JSON, NDJSON or CSV files (with references by natural keys)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help='JSON, NDJSON (.ndjson/.jsonl) or CSV files')
+        parser.add_argument('--model', help='Model of rows without "model" key (by default - name of file, like questions.csv or Question.ndjson)')
+        parser.add_argument('--batch-size', type=int, default=LOADER_BATCH_SIZE, help='count of rows of one Model which are inserted at once')
+        parser.add_argument('--ignore-conflicts', action='store_true', help='rows which break unique constraints are ignored by DB '
+                                                                             '(then auto dates of rows are set to time of loading)')
+        parser.add_argument('--skip-existing', action='store_true', help='rows with natural keys which already exist in DB are not inserted')
+
+    def handle(self, *args, **options):
+        print('START script: load_diary_data!')
+        loader = DiaryDataLoader(batch_size=options['batch_size'], ignore_conflicts=options['ignore_conflicts'],
+                                 skip_existing=options['skip_existing'])
+        started_at = time.monotonic()
+
+        def items():
+            for path in options['files']:
+                print(f'\nloading file: {path}...')
+                yield from read_data_file(path, options['model'])
+
+        try:
+            stats = loader.load(items())
+        except (OSError, ValueError, DatabaseError) as e:
+            raise CommandError(f'Error in loading data: {e}. Rows which were loaded before: {loader.stats}')
+
+        print()
+        for model_name, item in stats.items():
+            print(f'{model_name}: loaded {item["loaded"]} rows ({item["links"]} Many-To-Many links), skipped {item["skipped"]}, errors {item["errors"]}, '
+                  f'{item["seconds"]:.2f} s, {item["loaded"] / (item["seconds"] or 1e-9):.0f} rows/s')
+        loaded = sum(item['loaded'] for item in stats.values())
+        seconds = time.monotonic() - started_at
+        print(f'Total: loaded {loaded} rows in {seconds:.2f} s ({loaded / (seconds or 1e-9):.0f} rows/s)')
+        if 'UsersCompletedPoll' in stats or 'UsersAnswer' in stats:
+            print("Results of loaded polls are not calculated yet - run 'python manage.py fill_polls_results'")
+        print('FINISH script: load_diary_data!')
@@ -0,0 +1,56 @@
+""" This script can be run from command line as 'python manage.py move_entry_media_to_storage'
+    and it's moving image/audio of already existing Entries from DB (BinaryField columns of entries table)
+    to external storage which is set in ENTRY_MEDIA_STORAGE in settings.py (new media is written there right away).
+    Entries are moved by batches - every batch is read from DB, written to storage and updated in DB by one transaction"""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from diary.models import Entry
+from diary.entry_media import ENTRY_MEDIA_FIELDS, guess_media_content_type
+from diary.media_storage import get_entry_media_storage
+
+
+class Command(BaseCommand):
+    help = 'Moves image/audio of Entries from DB to external storage (ENTRY_MEDIA_STORAGE)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='count of Entries which are moved at once (all their media is in memory together)')
+        parser.add_argument('--vacuum', action='store_true', help='run VACUUM after moving (only for SQLite) - so DB file becomes smaller')
+
+    def handle(self, *args, **options):
+        print('START script: move_entry_media_to_storage!')
+        storage = get_entry_media_storage()
+        if not storage:
+            print('FINISH script: move_entry_media_to_storage! Nothing is moved - ENTRY_MEDIA_STORAGE is not set in settings.py')
+            return
+
+        for media in ENTRY_MEDIA_FIELDS:
+            media_fields = [media, f'{media}_size', f'{media}_checksum', f'{media}_content_type', f'{media}_in_storage']
+            moved, moved_bytes, last_id = 0, 0, 0
+            while True:
+                # keyset by id - Entries which are already moved are not read again
+                batch = list(Entry.objects.filter(pk__gt=last_id, **{f'{media}__isnull': False}).order_by('id')
+                             .only('id', f'{media}_name', *media_fields)[:options['batch_size']])
+                if not batch:
+                    break
+                last_id = batch[-1].pk
+                for entry in batch:
+                    value = bytes(getattr(entry, media))
+                    if value:
+                        checksum, size, head = storage.save(value)
+                        setattr(entry, f'{media}_size', size)
+                        setattr(entry, f'{media}_checksum', checksum)
+                        setattr(entry, f'{media}_content_type', guess_media_content_type(head, getattr(entry, f'{media}_name')))
+                        moved_bytes += size
+                    setattr(entry, f'{media}_in_storage', bool(value))
+                    setattr(entry, media, None)
+                with transaction.atomic():
+                    Entry.objects.bulk_update(batch, media_fields)
+                moved += len(batch)
+
+                print(f'Moved {media} of {moved} Entries ({moved_bytes} bytes)...')
+            print(f'Moved {media} of {moved} Entries ({moved_bytes} bytes) to storage')
+
+        if options['vacuum'] and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+        print('FINISH script: move_entry_media_to_storage!')
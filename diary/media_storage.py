@@ -0,0 +1,117 @@
+""" External storage of Entry image/audio (instead of BinaryField columns of entries table).
+    It's turned on by ENTRY_MEDIA_STORAGE in settings.py - then new media is written to this storage
+    and only its checksum, size and content type (and flag <media>_in_storage) stay in the row of Entry.
+    FileSystemMediaStorage is content-addressed: file name is sha256 of bytes (the same as <media>_checksum),
+    so the same image/audio of many Entries is stored only once.
+    Media of new Entries is published in storage only after commit of their transaction (see save_media_on_commit).
+    Media which is already in DB can be moved to storage by 'python manage.py move_entry_media_to_storage'"""
+import hashlib
+import os
+import tempfile
+from functools import lru_cache, partial
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+MEDIA_STORAGE_CHUNK_SIZE = 64 * 1024
+# first bytes of media are returned from saving - they are enough for detecting of content type
+MEDIA_HEAD_SIZE = 16
+
+
+class FileSystemMediaStorage:
+    def __init__(self, root=None):
+        self.root = Path(root or getattr(settings, 'ENTRY_MEDIA_ROOT', Path(settings.BASE_DIR) / 'entry_media'))
+
+    def path(self, checksum):
+        # files are spread by subfolders (by first symbols of checksum) - so there are not too many files in one folder
+        return self.root / checksum[:2] / checksum[2:4] / checksum
+
+    def exists(self, checksum):
+        return self.path(checksum).exists()
+
+    def stage(self, content):
+        # content - bytes or file, it's written by chunks to temporary file of storage and hashed at the same time.
+        # returns (checksum, size, first bytes, staged file) - media is not found by its checksum until it's published,
+        # and staged file is deleted when it's closed (or when it's not referenced anymore)
+        self.root.mkdir(parents=True, exist_ok=True)
+        sha256 = hashlib.sha256()
+        size = 0
+        head = b''
+        staged_file = tempfile.NamedTemporaryFile(dir=self.root, prefix='staged-')
+        try:
+            for chunk in media_chunks(content):
+                sha256.update(chunk)
+                size += len(chunk)
+                if len(head) < MEDIA_HEAD_SIZE:
+                    head += chunk[:MEDIA_HEAD_SIZE - len(head)]
+                staged_file.write(chunk)
+            staged_file.flush()
+        except Exception:
+            staged_file.close()
+            raise
+        return sha256.hexdigest(), size, head, staged_file
+
+    def publish(self, checksum, staged_file):
+        # staged file becomes media with this checksum (if the same bytes are not stored yet)
+        try:
+            path = self.path(checksum)
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(staged_file.name, path)
+                except FileExistsError:
+                    # the same bytes were just published by another request
+                    pass
+        finally:
+            staged_file.close()
+
+    def save(self, content):
+        # media is published right away. returns (checksum, size, first bytes)
+        checksum, size, head, staged_file = self.stage(content)
+        self.publish(checksum, staged_file)
+        return checksum, size, head
+
+    def read(self, checksum, start=None, end=None):
+        # the whole value or only part of it from start to end (both inclusive - as in 'Range' header)
+        with open(self.path(checksum), 'rb') as media_file:
+            if start is None:
+                return media_file.read()
+            media_file.seek(start)
+            return media_file.read(end - start + 1)
+
+
+def media_chunks(content):
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        content = memoryview(content)
+        for start in range(0, len(content), MEDIA_STORAGE_CHUNK_SIZE):
+            yield bytes(content[start:start + MEDIA_STORAGE_CHUNK_SIZE])
+    else:
+        content.seek(0)
+        while chunk := content.read(MEDIA_STORAGE_CHUNK_SIZE):
+            yield chunk
+
+
+@lru_cache(maxsize=None)
+def get_entry_media_storage():
+    # storage for new media (None - media is stored in DB)
+    storage_class = getattr(settings, 'ENTRY_MEDIA_STORAGE', None)
+    return import_string(storage_class)() if storage_class else None
+
+
+def get_stored_media_storage():
+    # storage of media which was already moved out of DB (it's still read from there, even if new media is stored in DB again)
+    return get_entry_media_storage() or FileSystemMediaStorage()
+
+
+def save_media_on_commit(storage, content):
+    # media of Entry is published in storage only when transaction with saving of Entry is committed -
+    # if it's rolled back, staged file is deleted together with callback (so storage has no files of not saved Entries).
+    # returns (checksum, size, first bytes)
+    checksum, size, head, staged_file = storage.stage(content)
+    transaction.on_commit(partial(storage.publish, checksum, staged_file))
+    return checksum, size, head
+
+
+def read_stored_media(checksum, start=None, end=None):
+    return get_stored_media_storage().read(checksum, start, end)
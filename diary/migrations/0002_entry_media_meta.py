@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:45
+
+from django.db import migrations, models
+import hashlib
+import mimetypes
+
+# copy of helpers of diary/entry_media.py as they were when this migration was made - so it doesn't depend on later changes of app code
+ENTRY_MEDIA_FIELDS = ('image', 'audio')
+MEDIA_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 0, 'image/png'),
+    (b'\xff\xd8\xff', 0, 'image/jpeg'),
+    (b'GIF87a', 0, 'image/gif'),
+    (b'GIF89a', 0, 'image/gif'),
+    (b'WEBP', 8, 'image/webp'),
+    (b'BM', 0, 'image/bmp'),
+    (b'\x00\x00\x01\x00', 0, 'image/x-icon'),
+    (b'WAVE', 8, 'audio/wav'),
+    (b'ID3', 0, 'audio/mpeg'),
+    (b'\xff\xfb', 0, 'audio/mpeg'),
+    (b'\xff\xf3', 0, 'audio/mpeg'),
+    (b'\xff\xf2', 0, 'audio/mpeg'),
+    (b'OggS', 0, 'audio/ogg'),
+    (b'fLaC', 0, 'audio/flac'),
+    (b'ftyp', 4, 'audio/mp4'),
+]
+
+
+def guess_media_content_type(data, name=None):
+    head = bytes(data[:16])
+    for signature, offset, content_type in MEDIA_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return content_type
+    if name:
+        content_type, _ = mimetypes.guess_type(name)
+        if content_type:
+            return content_type
+    return 'application/octet-stream'
+
+
+def fill_entries_media_meta(apps, schema_editor):
+    # calculating metadata for already existing image/audio of Entries - one Entry at a time, so only one blob is kept in memory
+    Entry = apps.get_model('diary', 'Entry')
+    for entry_id in Entry.objects.values_list('id', flat=True):
+        entry = Entry.objects.only('id', *ENTRY_MEDIA_FIELDS, *[f'{media}_name' for media in ENTRY_MEDIA_FIELDS]).get(pk=entry_id)
+        meta = {}
+        for media in ENTRY_MEDIA_FIELDS:
+            value = bytes(getattr(entry, media) or b'')
+            meta[f'{media}_size'] = len(value) if value else None
+            meta[f'{media}_checksum'] = hashlib.sha256(value).hexdigest() if value else None
+            meta[f'{media}_content_type'] = guess_media_content_type(value, getattr(entry, f'{media}_name')) if value else None
+        Entry.objects.filter(pk=entry_id).update(**meta)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='audio_checksum',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='audio_content_type',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='audio_size',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='image_checksum',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='image_content_type',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='image_size',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_entries_media_meta, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0002_entry_media_meta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userscompletedpoll',
+            name='total_cat',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='userscompletedpoll',
+            name='total_prc',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='userscompletedpoll',
+            name='total_score',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:53
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicated_emails(apps, schema_editor):
+    # unique constraint can't be created if there are already duplicated Users - they should be merged or deleted by Admin before
+    DiaryUser = apps.get_model('diary', 'DiaryUser')
+    duplicates = list(DiaryUser.objects.annotate(email_lower=Lower('email')).values('email_lower')
+                      .annotate(users_count=Count('id')).filter(users_count__gt=1).values_list('email_lower', flat=True)[:20])
+    if duplicates:
+        raise RuntimeError(f'Can not create unique constraint for emails of DiaryUsers - there are duplicated emails in DB: {duplicates}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0003_users_completed_poll_result'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicated_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='diaryuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='diary_users_email_lower_unique'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0004_diary_users_email_lower_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diaryuser',
+            index=models.Index(fields=['email'], name='diary_users_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['category', 'date_time', 'id'], name='entries_cat_dt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineeventcategory',
+            index=models.Index(fields=['category_name'], name='tl_event_cats_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineeventtemplate',
+            index=models.Index(fields=['event_category', 'event'], name='tl_event_templs_cat_event_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userscompletedpoll',
+            index=models.Index(fields=['user', 'questions_group', 'completed_at'], name='users_cp_user_qg_dt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userstimelineevent',
+            index=models.Index(fields=['timeline', 'created_at'], name='users_tl_events_tl_dt_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0006_data_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsersTimelineProjection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('events', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('timeline', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='diary.userstimeline')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_projection', to='diary.diaryuser')),
+            ],
+            options={
+                'db_table': 'users_timeline_projections',
+            },
+        ),
+    ]
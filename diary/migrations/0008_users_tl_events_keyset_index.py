@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0007_users_timeline_projection'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userstimelineevent',
+            name='users_tl_events_tl_dt_idx',
+        ),
+        migrations.AddIndex(
+            model_name='userstimelineevent',
+            index=models.Index(fields=['timeline', 'created_at', 'id'], name='users_tl_events_tl_dt_id_idx'),
+        ),
+    ]
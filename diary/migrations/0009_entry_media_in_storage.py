@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0008_users_tl_events_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='audio_in_storage',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='image_in_storage',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0009_entry_media_in_storage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersanswer',
+            index=models.Index(fields=['created_at'], name='users_answers_dt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userstimelineevent',
+            index=models.Index(fields=['created_at'], name='users_tl_events_dt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userstimelineeventreaction',
+            index=models.Index(fields=['created_at'], name='users_tl_reactions_dt_idx'),
+        ),
+    ]
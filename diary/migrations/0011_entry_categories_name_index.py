@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0010_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entrycategory',
+            index=models.Index(fields=['name'], name='entry_cats_name_idx'),
+        ),
+    ]
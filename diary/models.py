@@ -1,8 +1,25 @@
 from django.db import models
+from django.db.models.functions import Lower
+from diary.entry_media import ENTRY_MEDIA_FIELDS, guess_media_content_type
+from diary.media_storage import get_entry_media_storage, read_stored_media, save_media_on_commit
+import hashlib
 
 TECHNICAL_TL_CATEGORY = 'App Achievements'
 TECH_TL_QG_PASSED_EVENT_TEMPLATE = 'Passed {questions_group_name} poll'
 TECH_TL_REG_NU_EVENT_TEMPLATE = 'Registration in App'
+POLL_RESULT_FIELDS = ('total_score', 'total_prc', 'total_cat')
+UNKNOWN_POLL_RESULT_CAT = 'Unknown'
+
+
+def calc_poll_result(total_score, questions_group):
+    # total_score is a sum of scores of all answers of poll (score of answer = order of Choice - 1).
+    # Category of result is found by ranges of scores in QuestionsGroup.result_types
+    total_cat = UNKNOWN_POLL_RESULT_CAT
+    for res_type, range_values in questions_group.result_types.items():
+        if total_score >= range_values[0] and total_score <= range_values[1]:
+            total_cat = res_type
+    total_prc = 100.0*total_score/questions_group.max_score
+    return {'total_score': total_score, 'total_prc': total_prc, 'total_cat': total_cat}
 
 class QuestionsGroup(models.Model):
     class Meta:
@@ -36,6 +53,9 @@ For example:
         tl_event_template = TimelineEventTemplate(event_category=tech_tl_event_cat, event=tl_event)
         tl_event_template.save()
 
+        # max_score or result_types could be changed - so stored results of polls of this group are not actual anymore
+        UsersCompletedPoll.objects.filter(questions_group=self).update(**dict.fromkeys(POLL_RESULT_FIELDS))
+
 
 class Question(models.Model):
     class Meta:
@@ -64,6 +84,14 @@ class Choice(models.Model):
 class DiaryUser(models.Model):
     class Meta:
         db_table = 'diary_users'
+        # duplicates of emails are checked by DB (emails are compared in lower case), not by reading DB before inserting
+        constraints = [
+            models.UniqueConstraint(Lower('email'), name='diary_users_email_lower_unique'),
+        ]
+        # emails are saved in lower case, so Users are found by exact email
+        indexes = [
+            models.Index(fields=['email'], name='diary_users_email_idx'),
+        ]
     
     name = models.CharField(max_length=200, null=True, blank=True)
     email = models.CharField(max_length=200)
@@ -79,18 +107,41 @@ class DiaryUser(models.Model):
 class UsersCompletedPoll(models.Model):
     class Meta:
         db_table = 'users_completed_polls'
+        # for finding the last completed poll of User for exact QuestionsGroup
+        indexes = [
+            models.Index(fields=['user', 'questions_group', 'completed_at'], name='users_cp_user_qg_dt_idx'),
+        ]
     
     user = models.ForeignKey(DiaryUser, on_delete=models.CASCADE)
     questions_group = models.ForeignKey(QuestionsGroup, on_delete=models.CASCADE)
     completed_at = models.DateTimeField(auto_now_add=True)
+    # results of poll are stored when all its answers are saved (see save_result), 
+    # and they are reset to None when answers of poll, their Choices or its QuestionsGroup are changed (see also signals.py)
+    total_score = models.IntegerField(null=True, blank=True, editable=False)
+    total_prc = models.FloatField(null=True, blank=True, editable=False)
+    total_cat = models.CharField(max_length=100, null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"user: {self.user}; qst_grp: {str(self.questions_group)[:20]}; dt: {self.completed_at}"
+
+    def save_result(self):
+        # returns False if poll has no answers yet (then there is no result)
+        total_score = self.usersanswer_set.aggregate(total_score=models.Sum(models.F('answer__order') - 1))['total_score']
+        if total_score is None:
+            return False
+        for key, value in calc_poll_result(total_score, self.questions_group).items():
+            setattr(self, key, value)
+        self.save(update_fields=POLL_RESULT_FIELDS)
+        return True
     
 
 class UsersAnswer(models.Model):
     class Meta:
         db_table = 'users_answers'
+        # for lists of answers by dates (date hierarchy in Admin)
+        indexes = [
+            models.Index(fields=['created_at'], name='users_answers_dt_idx'),
+        ]
     
     user = models.ForeignKey(DiaryUser, on_delete=models.CASCADE)
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
@@ -101,6 +152,10 @@ class UsersAnswer(models.Model):
     def __str__(self):
         return f"user: {self.user}; qst: {str(self.question)[:20]}; ans: {str(self.answer)[:20]}; dt: {self.created_at}"
 
+    def save(self, **kwargs):
+        super().save(**kwargs)  # Call the "real" save() method.
+        UsersCompletedPoll.objects.filter(pk=self.user_completed_poll_id).update(**dict.fromkeys(POLL_RESULT_FIELDS))
+
 
 class UsersTimeline(models.Model):
     class Meta:
@@ -117,6 +172,9 @@ class UsersTimeline(models.Model):
 class TimelineEventCategory(models.Model):
     class Meta:
         db_table = 'timeline_event_categories'
+        indexes = [
+            models.Index(fields=['category_name'], name='tl_event_cats_name_idx'),
+        ]
     
     category_name = models.CharField(max_length=100)
 
@@ -127,6 +185,9 @@ class TimelineEventCategory(models.Model):
 class TimelineEventTemplate(models.Model):
     class Meta:
         db_table = 'timeline_event_templates'
+        indexes = [
+            models.Index(fields=['event_category', 'event'], name='tl_event_templs_cat_event_idx'),
+        ]
     
     event_category = models.ForeignKey(TimelineEventCategory, on_delete=models.CASCADE)
     event = models.CharField(max_length=200)
@@ -138,6 +199,12 @@ class TimelineEventTemplate(models.Model):
 class UsersTimelineEvent(models.Model):
     class Meta:
         db_table = 'users_timeline_events'
+        # for reading Events of Timeline ordered by time (and by id for the same time - as in pagination by keyset)
+        indexes = [
+            models.Index(fields=['timeline', 'created_at', 'id'], name='users_tl_events_tl_dt_id_idx'),
+            # for lists of Events of all Users by dates (date hierarchy in Admin)
+            models.Index(fields=['created_at'], name='users_tl_events_dt_idx'),
+        ]
     
     user = models.ForeignKey(DiaryUser, on_delete=models.CASCADE)
     created_at = models.DateTimeField()
@@ -166,6 +233,10 @@ class EventReactionCategory(models.Model):
 class UsersTimelineEventReaction(models.Model):
     class Meta:
         db_table = 'users_timeline_event_reactions'
+        # for lists of Reactions by dates (date hierarchy in Admin)
+        indexes = [
+            models.Index(fields=['created_at'], name='users_tl_reactions_dt_idx'),
+        ]
     
     user = models.ForeignKey(DiaryUser, on_delete=models.CASCADE)
     event = models.ForeignKey(UsersTimelineEvent, on_delete=models.CASCADE)
@@ -179,6 +250,21 @@ class UsersTimelineEventReaction(models.Model):
         return f"user: {self.user}; event: {str(self.event)[:20]}; reaction: {str(self.reaction)[:20]}; created_at: {self.created_at}"
 
 
+class UsersTimelineProjection(models.Model):
+    # Denormalized last Timeline of User - all its Events with their Reactions in one JSON document.
+    # It's updated on every change of Events/Reactions (see timeline_projection.py), so Timeline of User is read by one query
+    class Meta:
+        db_table = 'users_timeline_projections'
+    
+    user = models.OneToOneField(DiaryUser, on_delete=models.CASCADE, related_name='timeline_projection')
+    timeline = models.ForeignKey(UsersTimeline, on_delete=models.CASCADE)
+    events = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"user: {self.user}; timeline: {self.timeline_id}; events: {len(self.events)}"
+
+
 class JourneyType(models.Model):
     class Meta:
         db_table = 'journey_types'
@@ -230,6 +316,10 @@ class EntryTag(models.Model):
 class EntryCategory(models.Model):
     class Meta:
         db_table = 'entry_categories'
+        # Entries are found by name of their Category (get_entries_by_cat_name)
+        indexes = [
+            models.Index(fields=['name'], name='entry_cats_name_idx'),
+        ]
     
     name = models.CharField(max_length=100)
     description = models.CharField(max_length=500, null=True, blank=True)
@@ -241,6 +331,10 @@ class EntryCategory(models.Model):
 class Entry(models.Model):
     class Meta:
         db_table = 'entries'
+        # for reading Entries of Category ordered by date_time (and by id for the same date_time - as in pagination by Categories)
+        indexes = [
+            models.Index(fields=['category', 'date_time', 'id'], name='entries_cat_dt_idx'),
+        ]
     
     user = models.ForeignKey(DiaryUser, on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
@@ -253,6 +347,85 @@ class Entry(models.Model):
     audio_name = models.CharField(max_length=100, null=True, blank=True)
     category = models.ForeignKey(EntryCategory, on_delete=models.CASCADE)
     tag = models.ManyToManyField(EntryTag, blank=True, null=True, related_name='entries_of_tag')
+    # metadata of image/audio calculated at write time - 
+    # so lists of Entries never need to read binary columns from DB just for showing sizes or checksums
+    image_size = models.IntegerField(null=True, blank=True, editable=False)
+    image_checksum = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    image_content_type = models.CharField(max_length=100, null=True, blank=True, editable=False)
+    audio_size = models.IntegerField(null=True, blank=True, editable=False)
+    audio_checksum = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    audio_content_type = models.CharField(max_length=100, null=True, blank=True, editable=False)
+    # image/audio is in external storage (see media_storage.py) - binary column is empty, and media is found there by its checksum
+    image_in_storage = models.BooleanField(default=False, editable=False)
+    audio_in_storage = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return self.title
+
+    def update_media_meta(self, media):
+        value = getattr(self, media)
+        if value:
+            value = bytes(value)
+            setattr(self, f'{media}_size', len(value))
+            setattr(self, f'{media}_checksum', hashlib.sha256(value).hexdigest())
+            setattr(self, f'{media}_content_type', guess_media_content_type(value, getattr(self, f'{media}_name')))
+            storage = get_entry_media_storage()
+            if storage:
+                save_media_on_commit(storage, value)
+                setattr(self, media, None)
+            setattr(self, f'{media}_in_storage', bool(storage))
+        elif not getattr(self, f'{media}_in_storage'):
+            setattr(self, f'{media}_size', None)
+            setattr(self, f'{media}_checksum', None)
+            setattr(self, f'{media}_content_type', None)
+
+    def set_media_file(self, media, file):
+        # uploaded (or decoded) file is written to external storage by chunks - without reading it into memory
+        # (it's published there when Entry is saved and committed), or it's read into binary column if media is stored in DB
+        storage = get_entry_media_storage()
+        if storage:
+            checksum, size, head = save_media_on_commit(storage, file)
+            setattr(self, media, None)
+            setattr(self, f'{media}_size', size)
+            setattr(self, f'{media}_checksum', checksum)
+            setattr(self, f'{media}_content_type', guess_media_content_type(head, getattr(self, f'{media}_name')))
+            setattr(self, f'{media}_in_storage', True)
+        else:
+            file.seek(0)
+            setattr(self, media, file.read())
+
+    def clear_media(self, media):
+        setattr(self, media, None)
+        setattr(self, f'{media}_in_storage', False)
+
+    def get_media_bytes(self, media):
+        # bytes of image/audio from binary column or from external storage
+        if getattr(self, f'{media}_in_storage'):
+            return read_stored_media(getattr(self, f'{media}_checksum'))
+        return bytes(getattr(self, media) or b'')
+
+    def save(self, **kwargs):
+        # binary fields which were deferred in query (not loaded from DB) can't be changed, so their metadata stays the same
+        deferred_fields = self.get_deferred_fields()
+        update_fields = kwargs.get('update_fields')
+        for media in ENTRY_MEDIA_FIELDS:
+            if media not in deferred_fields and (update_fields is None or media in update_fields):
+                self.update_media_meta(media)
+                if update_fields is not None:
+                    kwargs['update_fields'] = list(kwargs['update_fields']) + [f'{media}_size', f'{media}_checksum', f'{media}_content_type',
+                                                                               f'{media}_in_storage']
+        super().save(**kwargs)  # Call the "real" save() method.
+
+
+class DataVersion(models.Model):
+    # Version of some data (whole table or part of table - like Timeline of exact User), it's increased on every change of this data.
+    # Versions are used for ETag/Last-Modified headers in GET endpoints (see data_versions.py)
+    class Meta:
+        db_table = 'data_versions'
+    
+    key = models.CharField(max_length=200, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.key}: {self.version}'
@@ -0,0 +1,26 @@
+""" Parsers of request body for bulk endpoints: NDJSON (one JSON object in every line) is read from request stream
+    line by line - so big imports are not loaded into memory at once"""
+import json
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    # request.data is a generator of parsed lines: dict (or other JSON value) for every not empty line,
+    # and ValueError for the line which is not valid JSON - so one bad line doesn't fail all other lines
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+
+        def parse_lines():
+            if stream is None:
+                return
+            # number of line in body (empty lines are counted too) - so the line can be found in file which was sent
+            for line_number, line in enumerate(stream, start=1):
+                try:
+                    line = line.decode(encoding).strip()
+                    if line:
+                        yield json.loads(line)
+                except ValueError as e:
+                    yield ValueError(f'not valid JSON in line {line_number}: {e}')
+        return parse_lines()
@@ -0,0 +1,39 @@
+""" Compiled documents of polls: QuestionsGroup with all its Questions (ordered by 'order') and their Choices (ordered by 'order')
+    in one dict, as it's shown in get_qc_by_q_group_name. Document is compiled only once for a version of the poll
+    and then it's taken from memory. Version of the poll (POLL_KEY in DataVersion) is increased on every change of the group,
+    its Questions, Choices or links between them (in Admin or by API - see signals.py), so other processes of app
+    also see that their documents are old and compile them again"""
+from diary.models import Question, Choice
+
+POLL_KEY = 'poll:{group_id}'
+
+# in-process cache - {id of QuestionsGroup: (version of poll, document)}
+POLL_DOCUMENTS = {}
+
+
+def compile_poll_document(group_id):
+    # 2 queries: Questions of group and all links Question-Choice of these Questions.
+    # Questions are keyed by id - so Questions with the same text are not merged
+    questions = Question.objects.filter(questions_group__id=group_id).order_by('order', 'id').values_list('id', 'question_text')
+    questions_choices = {}
+    for question_id, choice_id, choice_text in Choice.question.through.objects.filter(question__questions_group__id=group_id)\
+            .order_by('choice__order', 'choice__id').values_list('question_id', 'choice_id', 'choice__choice_text'):
+        questions_choices.setdefault(question_id, []).append({'choice_id': choice_id, 'choice_text': choice_text})
+    return {'group_id': group_id,
+            'data_list': [{'question_text': question_text,
+                           'group_id': group_id,
+                           'question_id': question_id,
+                           'choices': questions_choices.get(question_id, [])} for question_id, question_text in questions]}
+
+
+def get_poll_document(group_id, version):
+    cached = POLL_DOCUMENTS.get(group_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    document = compile_poll_document(group_id)
+    POLL_DOCUMENTS[group_id] = (version, document)
+    return document
+
+
+def poll_keys_of_groups(groups_ids):
+    return [POLL_KEY.format(group_id=group_id) for group_id in set(groups_ids) if group_id]
@@ -0,0 +1,160 @@
+""" Cache of small reference tables which are managed by Admin (groups of questions, categories, templates, types, countries, tags):
+    every table is read from DB only once for a version of the table and then its rows are taken from memory (or from shared
+    Django cache if REFERENCE_DATA_CACHE_ALIAS is set in settings.py). Version of the table (its key in DataVersion) is increased
+    on every change of its rows (see signals.py), so other processes of app also see that their cached rows are old.
+    Versions of all tables are read by one query once for request, and tables which are read inside of transaction
+    are not cached (transaction can be rolled back) - they are kept only till the end of request"""
+from contextvars import ContextVar
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from diary.models import DataVersion, TECHNICAL_TL_CATEGORY
+
+# table name: (model name, fields of rows in cache)
+REFERENCE_TABLES = {
+    'questions_groups': ('QuestionsGroup', ('id', 'group_name')),
+    'timeline_event_categories': ('TimelineEventCategory', ('id', 'category_name')),
+    'timeline_event_templates': ('TimelineEventTemplate', ('id', 'event_category_id', 'event')),
+    'event_reaction_categories': ('EventReactionCategory', ('id', 'category_name')),
+    'entry_categories': ('EntryCategory', ('id', 'name')),
+    'entry_tags': ('EntryTag', ('id', 'name')),
+    'journey_types': ('JourneyType', ('id', 'name')),
+    'journey_countries': ('JourneyCountry', ('id', 'name', 'lang', 'flag')),
+}
+REFERENCE_MODELS = {model_name: table for table, (model_name, fields) in REFERENCE_TABLES.items()}
+REFERENCE_DATA_CACHE_ALIAS = getattr(settings, 'REFERENCE_DATA_CACHE_ALIAS', None)
+REFERENCE_DATA_CACHE_KEY = 'diary:reference_data:{table}'
+
+# in-process cache - {table name: (version of table, {'rows': tuple of dicts, 'indexes': {index name: dict}})}
+REFERENCE_DATA = {}
+# reference data of current request - {'versions': {table name: version of table}, 'tables': {table name: rows read inside of transaction}}
+# (it's started on every request - see signals.py; without request version of table is read on every access)
+REQUEST_REFERENCE_DATA = ContextVar('request_reference_data', default=None)
+
+
+def start_request_reference_data():
+    REQUEST_REFERENCE_DATA.set({'versions': {}, 'tables': {}})
+
+
+def finish_request_reference_data():
+    REQUEST_REFERENCE_DATA.set(None)
+
+
+def read_reference_versions(tables):
+    # version is (number, date of change) - so versions of tables which were deleted and created again (in new DB) are also different
+    versions = {key: (version, updated_at) for key, version, updated_at in
+                DataVersion.objects.filter(key__in=tables).values_list('key', 'version', 'updated_at')}
+    return {table: versions.get(table, (0, None)) for table in tables}
+
+
+def get_reference_version(table):
+    request_data = REQUEST_REFERENCE_DATA.get()
+    if request_data is None:
+        return read_reference_versions([table])[table]
+    if table not in request_data['versions']:
+        request_data['versions'].update(read_reference_versions([name for name in REFERENCE_TABLES if name not in request_data['versions']]))
+    return request_data['versions'][table]
+
+
+def use_reference_versions(data_versions):
+    # versions which were already read for ETag of response (see data_versions.py) - so rows in response are of the same versions
+    request_data = REQUEST_REFERENCE_DATA.get()
+    if request_data is None:
+        return
+    for item in data_versions:
+        version = (item['version'], item['updated_at'])
+        if item['key'] in REFERENCE_TABLES and request_data['versions'].get(item['key']) != version:
+            request_data['versions'][item['key']] = version
+            request_data['tables'].pop(item['key'], None)
+
+
+def load_reference_table(table):
+    model_name, fields = REFERENCE_TABLES[table]
+    rows = tuple(apps.get_model('diary', model_name).objects.order_by('id').values(*fields))
+    indexes = {'id': {row['id']: row for row in rows}}
+    for field in fields[1:]:
+        # the first row wins for the same value - the same as .filter(...).first() by id
+        index = indexes[field] = {}
+        for row in rows:
+            index.setdefault(row[field], row['id'])
+    if table == 'timeline_event_templates':
+        index = indexes['event_category_id,event'] = {}
+        for row in rows:
+            index.setdefault((row['event_category_id'], row['event']), row['id'])
+    return {'rows': rows, 'indexes': indexes}
+
+
+def get_reference_table(table):
+    # version is read before rows - so rows in cache are never older than their version
+    version = get_reference_version(table)
+    request_data = REQUEST_REFERENCE_DATA.get()
+    if request_data is not None and table in request_data['tables']:
+        return request_data['tables'][table]
+    if REFERENCE_DATA_CACHE_ALIAS:
+        cached = caches[REFERENCE_DATA_CACHE_ALIAS].get(REFERENCE_DATA_CACHE_KEY.format(table=table))
+    else:
+        cached = REFERENCE_DATA.get(table)
+    if cached and cached[0] == version:
+        return cached[1]
+    data = load_reference_table(table)
+    if connection.in_atomic_block:
+        if request_data is not None:
+            request_data['tables'][table] = data
+    elif REFERENCE_DATA_CACHE_ALIAS:
+        caches[REFERENCE_DATA_CACHE_ALIAS].set(REFERENCE_DATA_CACHE_KEY.format(table=table), (version, data), timeout=None)
+    else:
+        REFERENCE_DATA[table] = (version, data)
+    return data
+
+
+def get_reference_rows(table):
+    # all rows of table ordered by id (as dicts with fields from REFERENCE_TABLES)
+    return get_reference_table(table)['rows']
+
+
+def get_reference_id(table, field, value):
+    # id of the first row with such value of field (or None) - without query to DB
+    return get_reference_table(table)['indexes'][field].get(value)
+
+
+def get_reference_row(table, row_id):
+    # row of table by its id (or None) - without query to DB
+    return get_reference_table(table)['indexes']['id'].get(row_id)
+
+
+def get_tl_event_template_id(category_id, event):
+    return get_reference_table('timeline_event_templates')['indexes']['event_category_id,event'].get((category_id, event))
+
+
+def invalidate_reference_data(table=None):
+    # changed table is read again in this process right away (other processes see new version of table)
+    tables = [table] if table else list(REFERENCE_TABLES)
+    request_data = REQUEST_REFERENCE_DATA.get()
+    for table in tables:
+        REFERENCE_DATA.pop(table, None)
+        if REFERENCE_DATA_CACHE_ALIAS:
+            caches[REFERENCE_DATA_CACHE_ALIAS].delete(REFERENCE_DATA_CACHE_KEY.format(table=table))
+        if request_data is not None:
+            request_data['versions'].pop(table, None)
+            request_data['tables'].pop(table, None)
+
+
+def warm_reference_data():
+    for table in REFERENCE_TABLES:
+        get_reference_table(table)
+
+
+def get_tech_tl_event_ids(event):
+    # returns (id of technical Category, id of its Template for this event) - they are created in DB if they don't exist yet
+    tech_tl_event_cat_id = get_reference_id('timeline_event_categories', 'category_name', TECHNICAL_TL_CATEGORY)
+    if not tech_tl_event_cat_id:
+        tech_tl_event_cat = apps.get_model('diary', 'TimelineEventCategory')(category_name=TECHNICAL_TL_CATEGORY)
+        tech_tl_event_cat.save()
+        tech_tl_event_cat_id = tech_tl_event_cat.pk
+    tech_tl_event_templ_id = get_tl_event_template_id(tech_tl_event_cat_id, event)
+    if not tech_tl_event_templ_id:
+        tech_tl_event_templ = apps.get_model('diary', 'TimelineEventTemplate')(event_category_id=tech_tl_event_cat_id, event=event)
+        tech_tl_event_templ.save()
+        tech_tl_event_templ_id = tech_tl_event_templ.pk
+    return tech_tl_event_cat_id, tech_tl_event_templ_id
@@ -0,0 +1,257 @@
+""" Metrics of requests (RequestMetricsMiddleware): for every request - its time, count and time of SQL queries, time of serializers,
+    size of response and repeated queries (the same SQL with the same params - duplicates, and the same SQL with any params
+    many times in one request - usually it's N+1 problem).
+    Metrics are aggregated in memory of process by endpoints (func of API_SCHEMA) and they are shown by 'metrics/' endpoint
+    in Prometheus text format (every process of app has its own metrics - they are summed by Prometheus).
+    With REQUEST_METRICS_HEADER in settings.py metrics of request are also sent back in 'Server-Timing' header.
+    'metrics/' endpoint is shown only for staff users (logged in Admin), for METRICS_TOKEN in 'Authorization: Bearer' header
+    or for requests from METRICS_ALLOWED_IPS"""
+import bisect
+import hashlib
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+# upper bounds (in seconds) of buckets of histogram of durations of requests
+REQUEST_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# the same SQL (with any params) which is repeated so many times in one request is counted as N+1 queries
+SIMILAR_QUERIES_THRESHOLD = 5
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# metrics of current request - serializers add their time to it (see DynamicFieldsModelSerializer)
+CURRENT_REQUEST_METRICS = ContextVar('current_request_metrics', default=None)
+# {(endpoint, method): aggregated metrics} - they are changed under lock (requests can be handled by several threads of process)
+REQUEST_METRICS = {}
+REQUEST_METRICS_LOCK = threading.Lock()
+# counters in Prometheus format: (name, description, key of aggregated metrics)
+REQUEST_METRICS_COUNTERS = (
+    ('diary_request_queries_total', 'SQL queries of requests', 'queries'),
+    ('diary_request_queries_duration_seconds_total', 'Time of SQL queries of requests', 'queries_time'),
+    ('diary_request_serializer_duration_seconds_total', 'Time of serializers of requests', 'serializer_time'),
+    ('diary_response_size_bytes_total', 'Size of responses', 'response_bytes'),
+    ('diary_request_duplicated_queries_total', 'Queries which were repeated with the same SQL and params in one request', 'duplicated_queries'),
+    ('diary_request_n_plus_one_total', f'Requests with the same SQL repeated at least {SIMILAR_QUERIES_THRESHOLD} times', 'n_plus_one'),
+)
+
+
+def query_fingerprint(sql):
+    # the same SQL has the same fingerprint in all processes - so it can be found by SQL from DB logs (or from connection.queries)
+    return hashlib.sha256(' '.join(sql.split()).encode('utf-8')).hexdigest()[:16]
+
+
+def params_key(params):
+    # params of query as hashable value (for finding of duplicated queries)
+    if isinstance(params, (list, tuple)):
+        try:
+            return hash(tuple(params))
+        except TypeError:
+            pass
+    return repr(params)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.queries = 0
+        self.queries_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        # {sql: count} and {(sql, params): count}
+        self.similar_queries = {}
+        self.same_queries = {}
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        # it's set as execute wrapper of DB connections - so queries are counted without DEBUG (and without keeping all of them)
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries_time += time.perf_counter() - started_at
+            self.queries += 1
+            self.similar_queries[sql] = self.similar_queries.get(sql, 0) + 1
+            if not many:
+                key = (sql, params_key(params))
+                self.same_queries[key] = self.same_queries.get(key, 0) + 1
+
+    def duplicated_queries(self):
+        return sum(count - 1 for count in self.same_queries.values())
+
+    def most_repeated_query(self):
+        # (sql, count) of SQL which was repeated the most times
+        return max(self.similar_queries.items(), key=lambda item: item[1], default=(None, 0))
+
+    def repeated_query_header(self):
+        # only fingerprint of SQL (not SQL itself - it shows tables and columns of DB to clients) and count of its repeats
+        repeated_sql, repeated_count = self.most_repeated_query()
+        if repeated_count < SIMILAR_QUERIES_THRESHOLD:
+            return None
+        return f'{query_fingerprint(repeated_sql)}; count={repeated_count}'
+
+    def server_timing(self, duration):
+        repeated_sql, repeated_count = self.most_repeated_query()
+        description = f'{self.queries} queries, {self.duplicated_queries()} duplicated'
+        if repeated_count >= SIMILAR_QUERIES_THRESHOLD:
+            description += f', N+1: {repeated_count} similar'
+        return (f'app;dur={duration * 1000:.1f}, db;dur={self.queries_time * 1000:.1f};desc="{description}", '
+                f'serializer;dur={self.serializer_time * 1000:.1f}')
+
+
+@contextmanager
+def serializer_timer():
+    # time of serializer is added to metrics of request (nested serializers are inside of time of the outer one)
+    metrics = CURRENT_REQUEST_METRICS.get()
+    if metrics is None or metrics.serializer_depth:
+        yield
+        return
+    metrics.serializer_depth += 1
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started_at
+        metrics.serializer_depth -= 1
+
+
+def endpoint_name(request):
+    # func of API_SCHEMA for API endpoints, or name of URL (admin - for all pages of Admin section)
+    from diary.views import GET_ENDPOINTS_BY_PATH, POST_ENDPOINTS_BY_PATH
+    endpoint = GET_ENDPOINTS_BY_PATH.get(request.path_info) or POST_ENDPOINTS_BY_PATH.get(request.path_info)
+    if endpoint:
+        return endpoint['func']
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'not_found'
+    if 'admin' in match.namespaces:
+        return 'admin'
+    return match.url_name or 'other'
+
+
+def record_request_metrics(endpoint, method, status, metrics, duration, size):
+    repeated_count = metrics.most_repeated_query()[1]
+    with REQUEST_METRICS_LOCK:
+        item = REQUEST_METRICS.get((endpoint, method))
+        if item is None:
+            item = REQUEST_METRICS[(endpoint, method)] = {
+                'statuses': {}, 'buckets': [0] * (len(REQUEST_DURATION_BUCKETS) + 1), 'duration': 0.0, 'count': 0,
+                'queries': 0, 'queries_time': 0.0, 'serializer_time': 0.0, 'response_bytes': 0, 'duplicated_queries': 0, 'n_plus_one': 0,
+            }
+        item['statuses'][status] = item['statuses'].get(status, 0) + 1
+        item['buckets'][bisect.bisect_left(REQUEST_DURATION_BUCKETS, duration)] += 1
+        item['duration'] += duration
+        item['count'] += 1
+        item['queries'] += metrics.queries
+        item['queries_time'] += metrics.queries_time
+        item['serializer_time'] += metrics.serializer_time
+        item['response_bytes'] += size
+        item['duplicated_queries'] += metrics.duplicated_queries()
+        item['n_plus_one'] += repeated_count >= SIMILAR_QUERIES_THRESHOLD
+
+
+def start_request_metrics(metrics, db_connections):
+    CURRENT_REQUEST_METRICS.set(metrics)
+    for connection in db_connections:
+        connection.execute_wrappers.append(metrics.query_wrapper)
+
+
+def stop_request_metrics(metrics, db_connections):
+    for connection in db_connections:
+        if metrics.query_wrapper in connection.execute_wrappers:
+            connection.execute_wrappers.remove(metrics.query_wrapper)
+    CURRENT_REQUEST_METRICS.set(None)
+
+
+class RequestMetricsMiddleware:
+    # it should be the first in MIDDLEWARE - so time of all other middlewares is in metrics too
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        db_connections = connections.all()
+        start_request_metrics(metrics, db_connections)
+        try:
+            response = self.get_response(request)
+        except Exception:
+            # exception which is not handled by Django (it's shown by web server) - request is not counted
+            stop_request_metrics(metrics, db_connections)
+            raise
+
+        def finish(size):
+            stop_request_metrics(metrics, db_connections)
+            duration = time.perf_counter() - metrics.started_at
+            record_request_metrics(endpoint_name(request), request.method, response.status_code, metrics, duration, size)
+            return duration
+
+        if response.streaming:
+            # rows of streaming response are read from DB while it's sent - so metrics are recorded after the last chunk
+            response.streaming_content = streaming_content_with_metrics(response.streaming_content, finish)
+            return response
+        duration = finish(len(response.content))
+        if getattr(settings, 'REQUEST_METRICS_HEADER', False):
+            response['Server-Timing'] = metrics.server_timing(duration)
+        if getattr(settings, 'REQUEST_METRICS_REPEATED_QUERY_HEADER', False) and metrics.repeated_query_header():
+            response['X-Repeated-Query'] = metrics.repeated_query_header()
+        return response
+
+
+def streaming_content_with_metrics(content, finish):
+    size = 0
+    try:
+        for chunk in content:
+            size += len(chunk)
+            yield chunk
+    finally:
+        finish(size)
+
+
+def label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_request_metrics():
+    # aggregated metrics in Prometheus text format (version 0.0.4)
+    with REQUEST_METRICS_LOCK:
+        items = [(endpoint, method, {**item, 'statuses': dict(item['statuses']), 'buckets': list(item['buckets'])})
+                 for (endpoint, method), item in sorted(REQUEST_METRICS.items())]
+    lines = ['# HELP diary_requests_total Requests by endpoints and statuses', '# TYPE diary_requests_total counter']
+    for endpoint, method, item in items:
+        for status, count in sorted(item['statuses'].items()):
+            lines.append(f'diary_requests_total{{endpoint="{label_value(endpoint)}",method="{method}",status="{status}"}} {count}')
+
+    lines += ['# HELP diary_request_duration_seconds Time of requests', '# TYPE diary_request_duration_seconds histogram']
+    for endpoint, method, item in items:
+        labels = f'endpoint="{label_value(endpoint)}",method="{method}"'
+        cumulative = 0
+        for bound, count in zip([*REQUEST_DURATION_BUCKETS, '+Inf'], item['buckets']):
+            cumulative += count
+            lines.append(f'diary_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'diary_request_duration_seconds_sum{{{labels}}} {item["duration"]}')
+        lines.append(f'diary_request_duration_seconds_count{{{labels}}} {item["count"]}')
+
+    for name, description, key in REQUEST_METRICS_COUNTERS:
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+        for endpoint, method, item in items:
+            lines.append(f'{name}{{endpoint="{label_value(endpoint)}",method="{method}"}} {item[key]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_allowed(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_active and user.is_staff:
+        return True
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    authorization = request.headers.get('Authorization', '')
+    if token and authorization.startswith('Bearer ') and hmac.compare_digest(authorization[len('Bearer '):].encode(), token.encode()):
+        return True
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+
+
+def metrics(request):
+    if not metrics_allowed(request):
+        return HttpResponseForbidden('metrics are shown only for staff users, by token or for allowed IPs')
+    return HttpResponse(render_request_metrics(), content_type=METRICS_CONTENT_TYPE)
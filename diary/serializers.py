@@ -1,110 +1,132 @@
 from rest_framework import serializers
 from diary.models import *
+from diary.request_metrics import serializer_timer
 
 
-class DiaryUserSerializer(serializers.ModelSerializer):
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    # ModelSerializer which takes an additional 'fields' argument 
+    # that controls which fields should be shown in result (for projection like '?fields=id,name' in GET endpoints)
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    # time of serializing and validating is added to metrics of request (see request_metrics.py)
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+    def run_validation(self, data=serializers.empty):
+        with serializer_timer():
+            return super().run_validation(data)
+
+
+class DiaryUserSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = DiaryUser
         fields = '__all__'
 
 
-class UsersCompletedPollSerializer(serializers.ModelSerializer):
+class UsersCompletedPollSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = UsersCompletedPoll
         fields = '__all__'
 
 
-class QuestionsGroupSerializer(serializers.ModelSerializer):
+class QuestionsGroupSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = QuestionsGroup
         fields = '__all__'
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Question
         fields = '__all__'
 
 
-class ChoiceSerializer(serializers.ModelSerializer):
+class ChoiceSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Choice
         fields = '__all__'
 
 
-class UsersAnswerSerializer(serializers.ModelSerializer):
+class UsersAnswerSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = UsersAnswer
         fields = '__all__'
 
 
-class UsersTimelineSerializer(serializers.ModelSerializer):
+class UsersTimelineSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = UsersTimeline
         fields = '__all__'
 
 
-class TimelineEventCategorySerializer(serializers.ModelSerializer):
+class TimelineEventCategorySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = TimelineEventCategory
         fields = '__all__'
 
 
-class TimelineEventTemplateSerializer(serializers.ModelSerializer):
+class TimelineEventTemplateSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = TimelineEventTemplate
         fields = '__all__'
 
 
-class UsersTimelineEventSerializer(serializers.ModelSerializer):
+class UsersTimelineEventSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = UsersTimelineEvent
         fields = '__all__'
 
 
-class EventReactionCategorySerializer(serializers.ModelSerializer):
+class EventReactionCategorySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = EventReactionCategory
         fields = '__all__'
 
 
-class UsersTimelineEventReactionSerializer(serializers.ModelSerializer):
+class UsersTimelineEventReactionSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = UsersTimelineEventReaction
         fields = '__all__'
 
 
-class EntrySerializer(serializers.ModelSerializer):
+class EntrySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Entry
         fields = '__all__'
 
 
-class EntryCategorySerializer(serializers.ModelSerializer):
+class EntryCategorySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = EntryCategory
         fields = '__all__'
 
 
-class EntryTagSerializer(serializers.ModelSerializer):
+class EntryTagSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = EntryTag
         fields = '__all__'
 
 
-class JourneySerializer(serializers.ModelSerializer):
+class JourneySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Journey
         fields = '__all__'
 
 
-class JourneyTypeSerializer(serializers.ModelSerializer):
+class JourneyTypeSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = JourneyType
         fields = '__all__'
 
 
-class JourneyCountrySerializer(serializers.ModelSerializer):
+class JourneyCountrySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = JourneyCountry
         fields = '__all__'
\ No newline at end of file
@@ -0,0 +1,112 @@
+""" Signals of diary app - they are connected in DiaryConfig.ready() (apps.py)"""
+from django.core.signals import request_started, request_finished
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from diary.models import (QuestionsGroup, Question, Choice, UsersCompletedPoll, UsersAnswer, UsersTimeline, UsersTimelineEvent,
+                          UsersTimelineEventReaction, POLL_RESULT_FIELDS)
+from diary.reference_data import REFERENCE_MODELS, invalidate_reference_data, start_request_reference_data, finish_request_reference_data
+from diary.data_versions import VERSIONED_MODELS, USER_TIMELINE_MODELS, data_keys_of_instance, bump_data_versions
+from diary.poll_documents import poll_keys_of_groups
+from diary.timeline_projection import reset_timeline_projection, update_projection_event, update_projection_reaction
+
+
+@receiver(request_started)
+def request_reference_data_started(sender, **kwargs):
+    start_request_reference_data()
+
+
+@receiver(request_finished)
+def request_reference_data_finished(sender, **kwargs):
+    finish_request_reference_data()
+
+
+@receiver([post_save, post_delete])
+def reference_data_changed(sender, **kwargs):
+    # any change of reference table (in Admin or by API) resets its cached rows (and its version is increased - see versioned_data_changed)
+    table = REFERENCE_MODELS.get(sender.__name__)
+    if table and sender._meta.app_label == 'diary':
+        invalidate_reference_data(table)
+
+
+@receiver([post_save, post_delete])
+def versioned_data_changed(sender, instance, **kwargs):
+    # any change of tracked Models (in Admin or by API) increases version of their data - so ETag of GET endpoints is changed
+    if (sender.__name__ in VERSIONED_MODELS or sender.__name__ in USER_TIMELINE_MODELS) and sender._meta.app_label == 'diary':
+        bump_data_versions(*data_keys_of_instance(instance))
+
+
+@receiver(m2m_changed, sender=Choice.question.through)
+def choices_of_questions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_data_versions(VERSIONED_MODELS['Choice'])
+    # links are changed from Question (question.choices_of_questions) or from Choice (choice.question) -
+    # for clearing Questions of Choice they are found before links are removed
+    if action in ('post_add', 'post_remove', 'pre_clear'):
+        if reverse:
+            groups_ids = [instance.questions_group_id]
+        elif pk_set:
+            groups_ids = Question.objects.filter(pk__in=pk_set).values_list('questions_group_id', flat=True)
+        else:
+            groups_ids = instance.question.values_list('questions_group_id', flat=True)
+        bump_data_versions(*poll_keys_of_groups(groups_ids))
+
+
+@receiver(post_save, sender=QuestionsGroup)
+@receiver(post_delete, sender=QuestionsGroup)
+def questions_group_changed(sender, instance, **kwargs):
+    bump_data_versions(*poll_keys_of_groups([instance.pk]))
+
+
+@receiver(pre_save, sender=Question)
+def question_moving(sender, instance, **kwargs):
+    # Question which is moved to another group is also removed from poll of its old group
+    if instance.pk:
+        old_group_id = Question.objects.filter(pk=instance.pk).values_list('questions_group_id', flat=True).first()
+        if old_group_id != instance.questions_group_id:
+            bump_data_versions(*poll_keys_of_groups([old_group_id]))
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    bump_data_versions(*poll_keys_of_groups([instance.questions_group_id]))
+
+
+@receiver(post_save, sender=Choice)
+@receiver(pre_delete, sender=Choice)
+def choice_changed(sender, instance, **kwargs):
+    # Choice can be linked with Questions of several groups (before deleting - while links still exist)
+    if not kwargs.get('created'):
+        bump_data_versions(*poll_keys_of_groups(instance.question.values_list('questions_group_id', flat=True)))
+
+
+@receiver(post_save, sender=Choice)
+def choice_order_changed(sender, instance, created, **kwargs):
+    # score of answer is order of its Choice - so stored results of polls with answers by this Choice are not actual anymore
+    if not created:
+        UsersCompletedPoll.objects.filter(usersanswer__answer=instance).update(**dict.fromkeys(POLL_RESULT_FIELDS))
+
+
+@receiver(post_delete, sender=UsersAnswer)
+def users_answer_deleted(sender, instance, **kwargs):
+    # answer can be deleted by itself, by deleting of queryset or by cascade (with its Question, Choice or User) -
+    # in all cases stored results of its poll are not actual anymore
+    UsersCompletedPoll.objects.filter(pk=instance.user_completed_poll_id).update(**dict.fromkeys(POLL_RESULT_FIELDS))
+
+
+@receiver(post_save, sender=UsersTimeline)
+def users_timeline_created(sender, instance, created, **kwargs):
+    if created:
+        reset_timeline_projection(instance)
+
+
+@receiver(post_save, sender=UsersTimelineEvent)
+@receiver(post_delete, sender=UsersTimelineEvent)
+def users_timeline_event_changed(sender, instance, **kwargs):
+    update_projection_event(instance, deleted='created' not in kwargs)
+
+
+@receiver(post_save, sender=UsersTimelineEventReaction)
+@receiver(post_delete, sender=UsersTimelineEventReaction)
+def users_timeline_event_reaction_changed(sender, instance, **kwargs):
+    update_projection_reaction(instance, deleted='created' not in kwargs)
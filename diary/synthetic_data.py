@@ -0,0 +1,145 @@
+""" Synthetic dataset for load testing and benchmarks (command 'python manage.py generate_diary_data'):
+    Users with their Timelines, Events, Reactions, completed polls with Answers, Entries with image/audio of given size and Journeys.
+    Rows are generated lazily and inserted by DiaryDataLoader (bulk_loader.py) - so dataset of any size is never kept in memory.
+    Names of generated rows start with prefix - so several datasets can be generated in the same DB.
+    Random values depend only on seed - the same params give the same dataset"""
+import random
+from datetime import datetime, timedelta, timezone
+from diary.models import Choice, DiaryUser, Question, UsersCompletedPoll, UsersTimelineEvent
+from diary.bulk_loader import LOADER_QUERY_CHUNK_SIZE
+
+SYNTHETIC_START_DT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+SYNTHETIC_EMOTIONS = ('happy', 'calm', 'sad', 'excited', 'tired')
+# first bytes of generated media - so content type of image/audio is detected as for real files
+SYNTHETIC_IMAGE_HEAD = b'\x89PNG\r\n\x1a\n'
+SYNTHETIC_AUDIO_HEAD = b'ID3'
+
+
+class SyntheticDataset:
+    def __init__(self, prefix='load', users=100, events_per_user=20, reactions_per_event=1, questions_groups=2, questions_per_group=5,
+                 choices_per_group=4, polls_per_user=2, entries_per_user=5, media_size=10 * 1024, journeys_per_user=2, seed=1):
+        self.prefix = prefix
+        self.users = users
+        self.events_per_user = events_per_user
+        self.reactions_per_event = reactions_per_event
+        self.questions_groups = questions_groups
+        self.questions_per_group = questions_per_group
+        self.choices_per_group = choices_per_group
+        self.polls_per_user = polls_per_user
+        self.entries_per_user = entries_per_user
+        self.media_size = media_size
+        self.journeys_per_user = journeys_per_user
+        self.random = random.Random(seed)
+
+    def name(self, value):
+        return f'{self.prefix} {value}'
+
+    def email(self, user_number):
+        return f'{self.prefix}-user-{user_number}@load.test'
+
+    def created_at(self):
+        return SYNTHETIC_START_DT + timedelta(seconds=self.random.randrange(365 * 24 * 3600))
+
+    def media(self, head):
+        return head + self.random.randbytes(max(self.media_size - len(head), 0)) if self.media_size else None
+
+    def group_name(self, group_number):
+        return self.name(f'Group {group_number}')
+
+    def reference_rows(self):
+        # Categories, Templates, Tags, Types and Countries which are used by generated rows
+        yield 'TimelineEventCategory', {'category_name': self.name('Events')}
+        for template_number in range(1, 6):
+            yield 'TimelineEventTemplate', {'event': self.name(f'Event {template_number}'), 'event_category': self.name('Events')}
+        yield 'EventReactionCategory', {'category_name': self.name('Reactions')}
+        yield 'EntryCategory', {'name': self.name('Notes')}
+        for tag_number in range(1, 4):
+            yield 'EntryTag', {'name': self.name(f'tag {tag_number}')}
+        yield 'JourneyType', {'name': self.name('Journeys')}
+        for country_number in range(1, 6):
+            yield 'JourneyCountry', {'name': self.name(f'Country {country_number}'), 'lang': 'english', 'flag': '🏳'}
+
+    def polls_rows(self):
+        # every group has its own Choices which are linked with all Questions of group (as in initial values of app)
+        for group_number in range(1, self.questions_groups + 1):
+            group_name = self.group_name(group_number)
+            max_score = self.questions_per_group * (self.choices_per_group - 1)
+            yield 'QuestionsGroup', {'group_name': group_name, 'max_score': max_score,
+                                     'result_types': {'good': [0, max_score // 2], 'bad': [max_score // 2 + 1, max_score]}}
+            questions = [f'{group_name} question {number}' for number in range(1, self.questions_per_group + 1)]
+            for order, question_text in enumerate(questions, 1):
+                yield 'Question', {'question_text': question_text, 'order': order, 'questions_group': group_name}
+            for order in range(1, self.choices_per_group + 1):
+                yield 'Choice', {'choice_text': f'{group_name} choice {order}', 'order': order, 'question': questions}
+
+    def user_rows(self, user_number):
+        email = self.email(user_number)
+        yield 'DiaryUser', {'name': self.name(f'User {user_number}'), 'email': email}
+        yield 'UsersTimeline', {'user': email, 'start_dt': SYNTHETIC_START_DT}
+        for _ in range(self.events_per_user):
+            yield 'UsersTimelineEvent', {'user': email, 'timeline': email, 'category': self.name('Events'),
+                                         'event_template': self.name(f'Event {self.random.randint(1, 5)}'), 'event': self.name('event'),
+                                         'created_at': self.created_at(), 'description': self.name('event description'),
+                                         'emotion': self.random.choice(SYNTHETIC_EMOTIONS)}
+        for group_number in range(self.polls_per_user if self.questions_groups else 0):
+            yield 'UsersCompletedPoll', {'user': email, 'questions_group': self.group_name(group_number % self.questions_groups + 1),
+                                         'completed_at': self.created_at()}
+        for entry_number in range(1, self.entries_per_user + 1):
+            yield 'Entry', {'user': email, 'title': self.name(f'Entry {entry_number}'), 'date_time': self.created_at(),
+                            'description': self.name('entry description'), 'text': self.name('entry text ') * 20,
+                            'image': self.media(SYNTHETIC_IMAGE_HEAD), 'image_name': 'image.png',
+                            'audio': self.media(SYNTHETIC_AUDIO_HEAD), 'audio_name': 'audio.mp3',
+                            'category': self.name('Notes'), 'tag': self.random.sample([self.name(f'tag {number}') for number in range(1, 4)], 2)}
+        for journey_number in range(1, self.journeys_per_user + 1):
+            yield 'Journey', {'user': email, 'title': self.name(f'Journey {journey_number}'), 'type': self.name('Journeys'),
+                              'dates': 'summer', 'description': self.name('journey description'),
+                              'country': self.random.sample([self.name(f'Country {number}') for number in range(1, 6)], 2)}
+
+    def rows(self):
+        # rows which reference other rows by natural keys
+        yield from self.reference_rows()
+        yield from self.polls_rows()
+        # Users which already exist (from previous generating with the same prefix) are skipped with all their rows
+        for start in range(1, self.users + 1, LOADER_QUERY_CHUNK_SIZE):
+            numbers = range(start, min(start + LOADER_QUERY_CHUNK_SIZE, self.users + 1))
+            existing = set(DiaryUser.objects.filter(email__in=[self.email(number) for number in numbers]).values_list('email', flat=True))
+            for user_number in numbers:
+                if self.email(user_number) not in existing:
+                    yield from self.user_rows(user_number)
+
+    def answers_rows(self):
+        # Answers of generated polls - polls have no natural keys, so they are read from DB after loading (by keyset)
+        groups_names = [self.group_name(number) for number in range(1, self.questions_groups + 1)]
+        groups_questions = {}
+        for question_id, group_id in Question.objects.filter(questions_group__group_name__in=groups_names).values_list('id', 'questions_group_id'):
+            groups_questions.setdefault(group_id, []).append(question_id)
+        questions_choices = {}
+        for question_id, choice_id in (Choice.question.through.objects.filter(question__questions_group__group_name__in=groups_names)
+                                       .values_list('question_id', 'choice_id')):
+            questions_choices.setdefault(question_id, []).append(choice_id)
+        # polls which already have Answers (from previous generating) are skipped
+        polls = UsersCompletedPoll.objects.filter(user__email__startswith=f'{self.prefix}-user-', questions_group__group_name__in=groups_names,
+                                                  usersanswer__isnull=True)
+        last_id = 0
+        while batch := list(polls.filter(pk__gt=last_id).order_by('id').values_list('id', 'user_id', 'questions_group_id', 'completed_at')[:LOADER_QUERY_CHUNK_SIZE]):
+            last_id = batch[-1][0]
+            for poll_id, user_id, group_id, completed_at in batch:
+                for question_id in groups_questions.get(group_id, []):
+                    if questions_choices.get(question_id):
+                        yield 'UsersAnswer', {'user_id': user_id, 'question_id': question_id, 'answer_id': self.random.choice(questions_choices[question_id]),
+                                              'user_completed_poll_id': poll_id, 'created_at': completed_at}
+
+    def reactions_rows(self):
+        # Reactions of generated Users to generated Events (Events have no natural keys too)
+        if not self.reactions_per_event:
+            return
+        events = UsersTimelineEvent.objects.filter(user__email__startswith=f'{self.prefix}-user-', userstimelineeventreaction__isnull=True)
+        last_id = 0
+        while batch := list(events.filter(pk__gt=last_id).order_by('id').values_list('id', 'created_at')[:LOADER_QUERY_CHUNK_SIZE]):
+            last_id = batch[-1][0]
+            for event_id, created_at in batch:
+                for _ in range(self.reactions_per_event):
+                    yield 'UsersTimelineEventReaction', {'user': self.email(self.random.randint(1, self.users)), 'event_id': event_id,
+                                                         'created_at': created_at + timedelta(minutes=self.random.randint(1, 600)),
+                                                         'category': self.name('Reactions'), 'reaction': self.name('reaction'),
+                                                         'emotion': self.random.choice(SYNTHETIC_EMOTIONS)}
@@ -0,0 +1,736 @@
+""" Tests of diary app - they are run by 'python manage.py test diary'"""
+import contextlib
+import io
+import json
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as dj_timezone
+from diary.models import (Choice, DiaryUser, Entry, EntryCategory, EntryTag, Journey, JourneyCountry, JourneyType, Question, QuestionsGroup,
+                          TimelineEventCategory, TimelineEventTemplate, UsersAnswer, UsersCompletedPoll, UsersTimeline, UsersTimelineEvent,
+                          UsersTimelineProjection, POLL_RESULT_FIELDS)
+from diary.admin import EstimatedCountPaginator
+from diary.bulk_loader import DiaryDataLoader
+from diary.entry_media import entry_media_path
+from diary.entry_uploads import save_entries_in_chunks
+from diary.media_storage import get_entry_media_storage
+from diary.data_versions import bump_data_versions
+from diary.poll_documents import POLL_KEY
+from diary.reference_data import REFERENCE_DATA, get_reference_row
+from diary.request_metrics import REQUEST_METRICS, SIMILAR_QUERIES_THRESHOLD, RequestMetrics, query_fingerprint
+from diary.timeline_projection import TIMELINES_ORDERING
+from diary.views import ENTRIES_IN_CAT_ORDERING, GET_ENDPOINTS
+
+
+class ConstantQueriesTest(TestCase):
+    # lists of Entries and Journeys are read by fixed count of queries - whatever count of rows and of their Tags/Countries
+    # (Tags and Countries of all rows are loaded by one query, not by one query for every row)
+    ROWS_COUNT = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = DiaryUser.objects.create(name='Test User', email='test-user@diary.test')
+        cls.categories = [EntryCategory.objects.create(name=f'category {number}') for number in range(1, 3)]
+        cls.tags = [EntryTag.objects.create(name=f'tag {number}') for number in range(1, 4)]
+        cls.journey_type = JourneyType.objects.create(name='weekend')
+        cls.countries = [JourneyCountry.objects.create(name=f'country {number}', lang='english', flag=f'flag {number}') for number in range(1, 4)]
+
+    def add_entries_and_journeys(self, count):
+        for number in range(count):
+            entry = Entry.objects.create(user=self.user, title=f'entry {number}', category=self.categories[number % len(self.categories)],
+                                         text='text of entry')
+            entry.tag.set(self.tags[:number % len(self.tags) + 1])
+            journey = Journey.objects.create(user=self.user, title=f'journey {number}', type=self.journey_type)
+            journey.country.set(self.countries[:number % len(self.countries) + 1])
+
+    def get_with_constant_queries(self, queries_count, url, rows_key):
+        # the same count of queries for N rows and for 3N rows - returns rows of both responses
+        results = []
+        for count in (self.ROWS_COUNT, self.ROWS_COUNT * 2):
+            self.add_entries_and_journeys(count)
+            with self.assertNumQueries(queries_count):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['res'], 'good')
+            results.append(response.json()[rows_key])
+        return results
+
+    def test_get_entries(self):
+        results = self.get_with_constant_queries(3, '/get_entries/?need_full_data=false', 'data')
+        self.assertEqual([len(entries) for entries in results], [self.ROWS_COUNT, self.ROWS_COUNT * 3])
+        self.assertTrue(all(entry['tags'] for entry in results[-1]))
+
+    def test_get_entries_by_cat_name(self):
+        results = self.get_with_constant_queries(3, '/get_entries_by_cat_name/?need_full_data=false&page_size=100', 'data')
+        self.assertEqual([sum(len(category['entries']) for category in categories) for categories in results],
+                         [self.ROWS_COUNT, self.ROWS_COUNT * 3])
+        self.assertTrue(all(entry['tags'] for category in results[-1] for entry in category['entries']))
+
+    def test_get_journeys_with_countries(self):
+        results = self.get_with_constant_queries(2, '/get_journeys_with_countries/', 'data_list')
+        self.assertEqual([len(journeys) for journeys in results], [self.ROWS_COUNT, self.ROWS_COUNT * 3])
+        self.assertTrue(all(journey['countries'] for journey in results[-1]))
+
+
+class KeysetPaginationTest(TestCase):
+    # pages are read by cursor of the last row on previous page - all rows are read once and in order
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [DiaryUser.objects.create(name=f'user {number}', email=f'user-{number}@diary.test') for number in range(5)]
+        category = EntryCategory.objects.create(name='category 1')
+        cls.entries = [Entry.objects.create(user=cls.users[0], category=category, title=f'entry {number}') for number in range(5)]
+
+    def read_pages(self, url, page_of_response):
+        rows, cursor = [], ''
+        for _ in range(10):
+            response = self.client.get(f'{url}&cursor={cursor}' if cursor else url)
+            self.assertEqual(response.status_code, 200)
+            page, cursor = page_of_response(response.json())
+            self.assertLessEqual(len(page), 2)
+            rows.extend(page)
+            if not cursor:
+                return rows
+        self.fail('pages are not finished')
+
+    def test_common_get_pages(self):
+        users = self.read_pages('/get_users/?page_size=2&fields=id,email', lambda res: (res['data'], res['next_cursor']))
+        self.assertEqual(users, [{'id': user.pk, 'email': user.email} for user in self.users])
+
+    def test_entries_pages_inside_category(self):
+        entries = self.read_pages('/get_entries_by_cat_name/?category_name=category 1&need_full_data=false&page_size=2',
+                                  lambda res: (res['data'][0]['entries'], res['data'][0]['next_cursor']))
+        self.assertEqual([entry['id'] for entry in entries], [entry.pk for entry in self.entries])
+
+    def test_invalid_cursor(self):
+        # cursor of other shape (like just a number) is invalid - not an error of reading it
+        for url in ('/get_users/?cursor=NQ==', '/get_users/?cursor=bm90IGpzb24=', '/get_entries_by_cat_name/?category_name=category 1&need_full_data=false&cursor=WzVd'):
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('invalid cursor', response.json()['data']['error'])
+
+
+class StreamingResponsesTest(TestCase):
+    # streaming responses have the same envelope and rows as usual responses - but with all rows (without pages)
+    @classmethod
+    def setUpTestData(cls):
+        user, *_ = [DiaryUser.objects.create(name=f'user {number}', email=f'user-{number}@diary.test') for number in range(3)]
+        categories = [EntryCategory.objects.create(name=f'category {number}') for number in range(1, 3)]
+        for number in range(5):
+            Entry.objects.create(user=user, category=categories[number % 2], title=f'entry {number}')
+
+    def streamed_json(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_common_get(self):
+        streamed = self.streamed_json('/get_users/?stream=true&fields=id,email')
+        self.assertEqual(streamed, {'res': 'good', 'data': self.client.get('/get_users/?fields=id,email').json()['data']})
+        self.assertEqual(len(streamed['data']), 3)
+
+    def test_entries_by_categories(self):
+        streamed = self.streamed_json('/get_entries_by_cat_name/?need_full_data=false&stream=true')
+        self.assertEqual(streamed['res'], 'good')
+        self.assertEqual([(category['category'], [entry['title'] for entry in category['entries']]) for category in streamed['data']],
+                         [('category 1', ['entry 0', 'entry 2', 'entry 4']), ('category 2', ['entry 1', 'entry 3'])])
+
+    def test_entries_grouped_by_categories_in_pages(self):
+        # pages of Categories (by one pass over Entries ordered by Category) - the same groups as in streaming response
+        response = self.client.get('/get_entries_by_cat_name/?need_full_data=false&page_size=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(category['category'], [entry['title'] for entry in category['entries']], bool(category['next_cursor']))
+                          for category in response.json()['data']],
+                         [('category 1', ['entry 0', 'entry 2'], True), ('category 2', ['entry 1', 'entry 3'], False)])
+
+
+class PollResultsTest(TestCase):
+    # stored results of poll are reset when anything they are calculated from is changed
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = DiaryUser.objects.create(name='Test User', email='test-user@diary.test')
+        group = QuestionsGroup.objects.create(group_name='Test Group', max_score=4, result_types={'good': [0, 2], 'bad': [3, 4]})
+        cls.questions = [Question.objects.create(questions_group=group, question_text=f'question {number}', order=number) for number in range(1, 3)]
+        cls.choices = [Choice.objects.create(choice_text=f'choice {order}', order=order) for order in range(1, 4)]
+        for choice in cls.choices:
+            choice.question.set(cls.questions)
+        cls.poll = UsersCompletedPoll.objects.create(user=cls.user, questions_group=group)
+        for question in cls.questions:
+            UsersAnswer.objects.create(user=cls.user, question=question, answer=cls.choices[1], user_completed_poll=cls.poll)
+
+    def setUp(self):
+        self.assertTrue(self.poll.save_result())
+        self.assertEqual(self.poll.total_score, 2)
+
+    def assert_result_reset(self):
+        self.poll.refresh_from_db()
+        self.assertIsNone(self.poll.total_score)
+        self.assertTrue(self.poll.save_result())
+        return self.poll.total_score
+
+    def test_choice_order_changed(self):
+        self.choices[1].order = 3
+        self.choices[1].save()
+        self.assertEqual(self.assert_result_reset(), 4)
+
+    def test_answers_deleted_by_cascade(self):
+        self.questions[0].delete()
+        self.assertEqual(self.assert_result_reset(), 1)
+
+    def test_answers_deleted_by_queryset(self):
+        UsersAnswer.objects.filter(question=self.questions[1]).delete()
+        self.assertEqual(self.assert_result_reset(), 1)
+
+
+class PollDocumentTest(TestCase):
+    # compiled document of poll is taken from memory only for the current version of poll
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = QuestionsGroup.objects.create(group_name='Test Group', max_score=4, result_types={'good': [0, 2], 'bad': [3, 4]})
+        cls.question = Question.objects.create(questions_group=cls.group, question_text='question 1', order=1)
+        cls.choice = Choice.objects.create(choice_text='choice 1', order=1)
+        cls.choice.question.set([cls.question])
+
+    def get_poll(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get('/get_qc_by_q_group_name/?questions_group=Test Group', **headers)
+
+    def poll_texts(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [(question['question_text'], [choice['choice_text'] for choice in question['choices']]) for question in response.json()['data']['data_list']]
+
+    def test_changes_of_poll(self):
+        response = self.get_poll()
+        self.assertEqual(self.poll_texts(response), [('question 1', ['choice 1'])])
+        self.assertEqual(self.get_poll(response['ETag']).status_code, 304)
+        self.question.question_text = 'question 2'
+        self.question.save()
+        response = self.get_poll(response['ETag'])
+        self.assertEqual(self.poll_texts(response), [('question 2', ['choice 1'])])
+        self.choice.question.clear()
+        self.assertEqual(self.poll_texts(self.get_poll(response['ETag'])), [('question 2', [])])
+
+    def test_change_in_other_process(self):
+        response = self.get_poll()
+        # queryset update doesn't send signals - as change made by another process of app (it increases version of poll)
+        Choice.objects.filter(pk=self.choice.pk).update(choice_text='choice 2')
+        self.assertEqual(self.get_poll(response['ETag']).status_code, 304)
+        bump_data_versions(POLL_KEY.format(group_id=self.group.pk))
+        self.assertEqual(self.poll_texts(self.get_poll(response['ETag'])), [('question 1', ['choice 2'])])
+
+
+class UserRegistrationTest(TestCase):
+    # User, his Timeline and his first Timeline Event are saved all together - or nothing of them is saved
+    def add_user(self, email):
+        return self.client.post('/add_user/', data={'name': 'Test User', 'email': email}, content_type='application/json')
+
+    def saved_rows(self):
+        return DiaryUser.objects.count(), UsersTimeline.objects.count(), UsersTimelineEvent.objects.count()
+
+    def test_new_user(self):
+        response = self.add_user('Test-User@diary.test')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(UsersTimelineEvent.objects.get(pk=response.json()['data']['new_user_timeline_event_saved_id']).user.email,
+                         'test-user@diary.test')
+        self.assertEqual(self.saved_rows(), (1, 1, 1))
+
+    def test_existing_email(self):
+        self.add_user('test-user@diary.test')
+        response = self.add_user('TEST-USER@diary.test')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already exist', response.json()['data']['error'])
+        self.assertEqual(self.saved_rows(), (1, 1, 1))
+
+    def test_failed_event_saves_nothing(self):
+        with patch.object(UsersTimelineEvent.objects, 'create', side_effect=IntegrityError('event is not saved')):
+            response = self.add_user('test-user@diary.test')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('event is not saved', response.json()['data']['error'])
+        self.assertEqual(self.saved_rows(), (0, 0, 0))
+
+
+class PollAnswersTest(TestCase):
+    # completed poll, its answers, stored results and its Timeline Event are saved all together - or nothing of them is saved
+    def setUp(self):
+        response = self.client.post('/add_user/', data={'name': 'Test User', 'email': 'test-user@diary.test'}, content_type='application/json')
+        self.user_id = response.json()['data']['new_user_saved_id']
+        self.group = QuestionsGroup.objects.create(group_name='Test Group', max_score=2, result_types={'good': [0, 1], 'bad': [2, 2]})
+        self.questions = [Question.objects.create(questions_group=self.group, question_text=f'question {number}', order=number)
+                          for number in range(1, 3)]
+        self.choices = [Choice.objects.create(choice_text=f'choice {order}', order=order) for order in range(1, 3)]
+        for choice in self.choices:
+            choice.question.set(self.questions)
+
+    def post_answers(self, choices):
+        return self.client.post('/add_user_answers_with_cp/', content_type='application/json', data={
+            'completed_poll': {'user_id': self.user_id, 'questions_group_id': self.group.pk},
+            'user_answers': [{'user_id': self.user_id, 'question_id': question.pk, 'choice_id': choice_id}
+                             for question, choice_id in zip(self.questions, choices)]})
+
+    def test_poll_is_saved_with_results(self):
+        response = self.post_answers([self.choices[0].pk, self.choices[1].pk])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']['ans_saved_ids']), 2)
+        poll = UsersCompletedPoll.objects.get(pk=response.json()['data']['cp_saved_id'])
+        self.assertEqual((poll.total_score, poll.total_cat), (1, 'good'))
+        self.assertTrue(UsersTimelineEvent.objects.filter(user_id=self.user_id, event__contains='Test Group').exists())
+
+    def test_bad_answer_saves_nothing(self):
+        response = self.post_answers([self.choices[0].pk, 999999])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UsersCompletedPoll.objects.exists())
+        self.assertFalse(UsersAnswer.objects.exists())
+        self.assertFalse(UsersTimelineEvent.objects.filter(user_id=self.user_id, event__contains='Test Group').exists())
+
+
+class TimelineProjectionTest(TestCase):
+    # document of Timeline of User is always for the last Timeline (by start_dt) - the same as it's found on reading
+    def setUp(self):
+        response = self.client.post('/add_user/', data={'name': 'Test User', 'email': 'test-user@diary.test'}, content_type='application/json')
+        self.user_id = response.json()['data']['new_user_saved_id']
+        self.timeline = UsersTimeline.objects.get(pk=response.json()['data']['new_user_timeline_saved_id'])
+
+    def timeline_events(self):
+        response = self.client.get(f'/get_tl_events_by_user/?user_id={self.user_id}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']['timeline_events']
+
+    def test_older_timeline_keeps_document(self):
+        self.assertEqual(len(self.timeline_events()), 1)
+        # Timeline with older start_dt (like loaded from fixture - raw save keeps its dates) is not the last Timeline of User
+        UsersTimeline(user_id=self.user_id, start_dt=self.timeline.start_dt - timedelta(days=30)).save_base(raw=True)
+        self.assertEqual(UsersTimelineProjection.objects.get(user_id=self.user_id).timeline_id, self.timeline.pk)
+        self.assertEqual(len(self.timeline_events()), 1)
+
+    def test_new_timeline_resets_document(self):
+        self.assertEqual(len(self.timeline_events()), 1)
+        new_timeline = UsersTimeline.objects.create(user_id=self.user_id)
+        projection = UsersTimelineProjection.objects.get(user_id=self.user_id)
+        self.assertEqual((projection.timeline_id, projection.events), (new_timeline.pk, []))
+        # the last Timeline has no Events yet
+        response = self.client.get(f'/get_tl_events_by_user/?user_id={self.user_id}')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f'his Timeline: {new_timeline.pk}', response.json()['data']['error'])
+
+
+class ReferenceDataCacheTest(TransactionTestCase):
+    # cached reference rows are checked by version of table - changes of other processes (without signals in this process)
+    # and rolled back changes are seen on the next reading (TransactionTestCase - as outside of transaction cache is filled)
+    def setUp(self):
+        self.category = EntryCategory.objects.create(name='category 1')
+
+    def test_rows_are_cached_for_version_of_table(self):
+        self.assertEqual(get_reference_row('entry_categories', self.category.pk)['name'], 'category 1')
+        # only version of table is read
+        with self.assertNumQueries(1):
+            self.assertEqual(get_reference_row('entry_categories', self.category.pk)['name'], 'category 1')
+
+    def test_change_in_other_process(self):
+        self.assertEqual(get_reference_row('entry_categories', self.category.pk)['name'], 'category 1')
+        # queryset update doesn't send signals - as change made by another process of app
+        EntryCategory.objects.filter(pk=self.category.pk).update(name='category 2')
+        bump_data_versions('entry_categories')
+        self.assertEqual(get_reference_row('entry_categories', self.category.pk)['name'], 'category 2')
+
+    def test_rolled_back_rows_are_not_cached(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                new_category = EntryCategory.objects.create(name='category 2')
+                self.assertIsNotNone(get_reference_row('entry_categories', new_category.pk))
+                raise ValueError('category is rolled back')
+        self.assertNotIn(new_category.pk, REFERENCE_DATA.get('entry_categories', (None, {'indexes': {'id': {}}}))[1]['indexes']['id'])
+        self.assertIsNone(get_reference_row('entry_categories', new_category.pk))
+
+
+    def test_etag_and_rows_of_the_same_version(self):
+        category = TimelineEventCategory.objects.create(category_name='Good Events')
+        template = TimelineEventTemplate.objects.create(event_category=category, event='Some Good Event')
+        response = self.client.get('/get_tl_event_cats_with_templates/')
+        self.assertEqual(response.json()['data'][0]['event_templates'], ['Some Good Event'])
+        # versions for ETag are also versions of cached rows - they are read by one query (rows are taken from cache)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/get_tl_event_cats_with_templates/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        TimelineEventTemplate.objects.filter(pk=template.pk).update(event='Awesome Event')
+        bump_data_versions('timeline_event_templates')
+        new_response = self.client.get('/get_tl_event_cats_with_templates/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(new_response.status_code, 200)
+        self.assertNotEqual(new_response['ETag'], response['ETag'])
+        self.assertEqual(new_response.json()['data'][0]['event_templates'], ['Awesome Event'])
+
+class DiaryDataLoaderTest(TestCase):
+    # rows of files are loaded with their dates, references by ids and by natural keys are told apart by columns (not by values)
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = DiaryUser.objects.create(name='Test User', email='test-user@diary.test')
+        EntryCategory.objects.create(name='category 1')
+        cls.category = EntryCategory.objects.create(name='2024')
+
+    def load(self, model, rows):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return DiaryDataLoader().load((model, row) for row in rows)[model]
+
+    def test_dates_of_loaded_rows(self):
+        started_at = dj_timezone.now()
+        stats = self.load('UsersTimeline', [{'user': self.user.email, 'start_dt': '2020-01-02 03:04:05', 'description': 'loaded'},
+                                            {'user': self.user.email, 'description': 'new'}])
+        self.assertEqual(stats['loaded'], 2)
+        self.assertEqual(UsersTimeline.objects.get(description='loaded').start_dt, datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+        self.assertGreaterEqual(UsersTimeline.objects.get(description='new').start_dt, started_at)
+        # the field of Model keeps its auto_now_add
+        self.assertGreaterEqual(UsersTimeline.objects.create(user=self.user).start_dt, started_at)
+
+    def test_references_by_natural_keys_and_ids(self):
+        stats = self.load('Entry', [{'user': self.user.email, 'category': '2024', 'title': 'by name of digits'},
+                                    {'user_id': str(self.user.pk), 'category_id': str(self.category.pk), 'title': 'by ids from CSV'},
+                                    {'user_id': self.user.pk, 'category': self.category.pk, 'title': 'by ids from JSON'}])
+        self.assertEqual((stats['loaded'], stats['errors']), (3, 0))
+        self.assertEqual(set(Entry.objects.values_list('category_id', flat=True)), {self.category.pk})
+
+    def test_rejected_rows(self):
+        stats = self.load('Entry', [{'user': self.user.email, 'category': 'not existing', 'title': 'not found category'},
+                                    {'user': self.user.email, 'category_id': 'category 1', 'title': 'name in column of id'},
+                                    {'user': self.user.email, 'category': 'category 1', 'title': 'good'}])
+        self.assertEqual((stats['loaded'], stats['errors']), (1, 2))
+        self.assertEqual(list(Entry.objects.values_list('title', flat=True)), ['good'])
+
+
+class EntryMediaResponseTest(TestCase):
+    # raw bytes of media - whole, by byte range and not modified (without reading of bytes)
+    IMAGE = b'\x89PNG\r\n\x1a\n' + bytes(range(100))
+
+    @classmethod
+    def setUpTestData(cls):
+        user = DiaryUser.objects.create(name='Test User', email='test-user@diary.test')
+        entry = Entry(user=user, category=EntryCategory.objects.create(name='category 1'), title='entry')
+        entry.set_media_file('image', io.BytesIO(cls.IMAGE))
+        entry.save()
+        cls.url = entry_media_path(entry.pk, 'image')
+
+    def test_whole_media(self):
+        response = self.client.get(self.url)
+        self.assertEqual((response.status_code, response['Content-Type'], response['Accept-Ranges']), (200, 'image/png', 'bytes'))
+        self.assertEqual(response.content, self.IMAGE)
+
+    def test_byte_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=8-11')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, f'bytes 8-11/{len(self.IMAGE)}'))
+        self.assertEqual(response.content, self.IMAGE[8:12])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-4')
+        self.assertEqual((response.status_code, response.content), (206, self.IMAGE[-4:]))
+
+    def test_range_not_satisfiable(self):
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.IMAGE)}-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, f'bytes */{len(self.IMAGE)}'))
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        # only metadata of media is read
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.content), (304, b''))
+        # range of other version of media (If-Range with old ETag) - the whole new media is sent
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"old"')
+        self.assertEqual((response.status_code, response.content), (200, self.IMAGE))
+
+
+class EntriesBulkTest(TestCase):
+    # bulk import of Entries: bad rows are rejected with their reasons, and chunk which fails on saving is rolled back as a whole
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = DiaryUser.objects.create(name='Test User', email='test-user@diary.test')
+        cls.category = EntryCategory.objects.create(name='category 1')
+
+    def post_ndjson(self, lines):
+        return self.client.post('/add_entries_bulk/', data='\n'.join(lines), content_type='application/x-ndjson')
+
+    def entry_line(self, title, **fields):
+        return json.dumps({'user_id': self.user.pk, 'category_id': self.category.pk, 'title': title, **fields})
+
+    def test_rejected_lines(self):
+        response = self.post_ndjson([self.entry_line('good'), '{"title": "not finished', '', self.entry_line('bad', category_id=999999)])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['data']['results']
+        self.assertEqual([item['res'] for item in results], ['good', 'error', 'error'])
+        self.assertIn('not valid JSON in line 2', results[1]['error'])
+        self.assertEqual(results[2]['error'], 'not found EntryCategory with id: 999999')
+        self.assertEqual(list(Entry.objects.values_list('title', flat=True)), ['good'])
+
+    def test_failed_chunk_is_rolled_back(self):
+        lines = [self.entry_line(f'entry {number}', tags=[{'tag_id': EntryTag.objects.create(name=f'tag {number}').pk}]) for number in range(3)]
+        with patch.object(Entry.tag.through.objects, 'bulk_create', side_effect=IntegrityError('links are not saved')):
+            response = self.post_ndjson(lines)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual({item['error'] for item in response.json()['data']['results']}, {'Error in Saving Entry: links are not saved'})
+        self.assertFalse(Entry.objects.exists())
+
+
+class TimelineEventsTestCase(TestCase):
+    # User (with Timeline) and Category with Template for adding of Events by add_timeline_events_bulk
+    def setUp(self):
+        response = self.client.post('/add_user/', data={'name': 'Test User', 'email': 'test-user@diary.test'}, content_type='application/json')
+        self.user_id = response.json()['data']['new_user_saved_id']
+        category = TimelineEventCategory.objects.create(category_name='Good Events')
+        TimelineEventTemplate.objects.create(event_category=category, event='Some Good Event')
+
+    def event_line(self, event, **fields):
+        return json.dumps({'created_at': '2025-10-30 21:22:23', 'user_id': self.user_id, 'link': '', 'event_category': 'Good Events',
+                           'event_template': 'Some Good Event', 'event': event, 'emotion': '🙂', **fields})
+
+    def post_ndjson(self, lines):
+        return self.client.post('/add_timeline_events_bulk/', data='\n'.join(lines), content_type='application/x-ndjson')
+
+    def timeline_events(self):
+        return [event['event'] for event in self.client.get(f'/get_tl_events_by_user/?user_id={self.user_id}').json()['data']['timeline_events']]
+
+
+class TimelineEventsBulkTest(TimelineEventsTestCase):
+    # bulk import of Timeline Events: bad rows are rejected, chunk which fails on saving is rolled back with its Timeline document
+    def test_rejected_lines(self):
+        response = self.post_ndjson([self.event_line('good'), 'not json', self.event_line('bad', event_category='Not Existing'),
+                                     json.dumps({'event': 'without fields'})])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['data']['results']
+        self.assertEqual([item['res'] for item in results], ['good', 'error', 'error', 'error'])
+        self.assertIn('not valid JSON in line 2', results[1]['error'])
+        self.assertEqual(results[2]['error'], 'incoming data is not valid')
+        self.assertTrue(results[3]['error'].startswith('missed fields: created_at, user_id'))
+        self.assertIn('good', self.timeline_events())
+
+    def test_failed_chunk_is_rolled_back(self):
+        events_before = self.timeline_events()
+        with patch('diary.timeline_events_bulk.bump_data_versions', side_effect=IntegrityError('versions are not saved')):
+            response = self.post_ndjson([self.event_line('first'), self.event_line('second')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual({item['error'] for item in response.json()['data']['results']}, {'Error in Saving timeline_event: versions are not saved'})
+        self.assertFalse(UsersTimelineEvent.objects.filter(event__in=['first', 'second']).exists())
+        self.assertEqual(self.timeline_events(), events_before)
+
+
+class TimelineEventsPagesTest(TimelineEventsTestCase):
+    # pages of Timeline Events by cursors - the newest Events are first, 'before' gives older pages and 'after' - newer ones
+    def setUp(self):
+        super().setUp()
+        self.post_ndjson([self.event_line(f'event {day}', created_at=f'2025-10-{day:02} 12:00:00') for day in range(1, 6)])
+
+    def page(self, params):
+        response = self.client.get(f'/get_tl_events_by_user/?user_id={self.user_id}&{params}')
+        self.assertEqual(response.status_code, 200)
+        return [event['event'] for event in response.json()['data']['timeline_events']], response.json()
+
+    def test_pages_before_and_after(self):
+        events, res = self.page('limit=2&category=Good Events')
+        pages = [events]
+        while res['next_cursor']:
+            events, res = self.page(f'limit=2&category=Good Events&before={res["next_cursor"]}')
+            pages.append(events)
+        self.assertEqual(pages, [['event 5', 'event 4'], ['event 3', 'event 2'], ['event 1']])
+        # the nearest newer Events than the last page
+        events, res = self.page(f'limit=2&category=Good Events&after={res["prev_cursor"]}')
+        self.assertEqual(events, ['event 3', 'event 2'])
+
+    def test_page_by_timestamp(self):
+        self.assertEqual(self.page('before=2025-10-03T00:00:00&category=Good Events')[0], ['event 2', 'event 1'])
+
+
+class EntryMediaStorageTest(TestCase):
+    # media of Entry is published in external storage only when Entry is committed - rolled back Entries leave no files
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = DiaryUser.objects.create(name='Test User', email='test-user@diary.test')
+        cls.category = EntryCategory.objects.create(name='category 1')
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.root = Path(root)
+        settings = override_settings(ENTRY_MEDIA_STORAGE='diary.media_storage.FileSystemMediaStorage', ENTRY_MEDIA_ROOT=root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # storage is created once for process - so it's created again with settings of test (and again after test)
+        get_entry_media_storage.cache_clear()
+        self.addCleanup(get_entry_media_storage.cache_clear)
+
+    def stored_files(self):
+        # published media (staged files are in root folder of storage)
+        return sorted(path.name for path in self.root.rglob('*') if path.is_file() and path.parent != self.root)
+
+    def new_entry(self, image):
+        entry = Entry(user=self.user, category=self.category, title='entry')
+        entry.set_media_file('image', io.BytesIO(image))
+        return entry
+
+    def test_committed_entry_publishes_media(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                entry = self.new_entry(b'image bytes')
+                entry.save()
+                self.assertEqual(self.stored_files(), [], 'media is published before commit')
+        self.assertEqual(self.stored_files(), [entry.image_checksum])
+        self.assertEqual(entry.get_media_bytes('image'), b'image bytes')
+
+    def test_same_media_is_stored_once_and_read_by_range(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            entries = [self.new_entry(b'image bytes') for _ in range(2)]
+            for entry in entries:
+                entry.save()
+        self.assertEqual(self.stored_files(), [entries[0].image_checksum])
+        response = self.client.get(entry_media_path(entries[1].pk, 'image'), HTTP_RANGE='bytes=6-10')
+        self.assertEqual((response.status_code, response.content), (206, b'bytes'))
+
+    def test_rolled_back_entry_leaves_no_files(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    self.new_entry(b'image bytes').save()
+                    raise ValueError('chunk is rolled back')
+        self.assertEqual(list(self.root.rglob('*')), [])
+
+    def test_bulk_import_publishes_media_of_saved_entries(self):
+        items = [{'user_id': self.user.pk, 'category_id': self.category.pk, 'title': 'entry', 'image_base64': 'aW1hZ2UgYnl0ZXM='},
+                 {'user_id': self.user.pk, 'category_id': self.category.pk, 'title': 'entry', 'tags': [{'tag_id': 999999}]}]
+        with self.captureOnCommitCallbacks(execute=True):
+            results = save_entries_in_chunks(items)
+        self.assertEqual([item['res'] for item in results], ['good', 'error'])
+        self.assertEqual(self.stored_files(), [Entry.objects.get().image_checksum])
+
+
+class BigTableAdminTest(TestCase):
+    # changelists of big tables are read by fixed count of queries and count of rows of whole table is estimated
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(username='admin', email='admin@diary.test', password='admin')
+
+    def add_users(self, count):
+        # every new User has his first Timeline Event
+        for _ in range(count):
+            number = DiaryUser.objects.count()
+            self.client.post('/add_user/', data={'name': f'user {number}', 'email': f'user-{number}@diary.test'}, content_type='application/json')
+
+    def test_changelist_with_constant_queries(self):
+        self.client.force_login(self.admin_user)
+        queries = []
+        for count in (2, 4):
+            self.add_users(count)
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get('/admin/diary/userstimelineevent/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['cl'].result_list), UsersTimelineEvent.objects.count())
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
+
+    def test_estimated_count_of_whole_table(self):
+        self.add_users(3)
+        UsersTimelineEvent.objects.filter(pk=UsersTimelineEvent.objects.order_by('id').first().pk).delete()
+        events = UsersTimelineEvent.objects.order_by('id')
+        with patch('diary.admin.ESTIMATED_COUNT_THRESHOLD', 0):
+            # SQLite has no statistics - the biggest id is the estimation (deleted rows are not seen)
+            if connection.vendor == 'sqlite':
+                self.assertEqual(EstimatedCountPaginator(events, 100).count, events.last().pk)
+            # filtered list is counted exactly
+            self.assertEqual(EstimatedCountPaginator(events.filter(emotion__isnull=False), 100).count, 2)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class QueryPlansTest(TestCase):
+    # hot queries of endpoints are read by indexes - without full scan of any table
+    # (line of plan like 'SCAN users_timeline_events' - the whole table is read; 'SCAN ... USING INDEX' - only index is read)
+    def assert_no_full_scan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = [row[-1] for row in cursor.fetchall()]
+            tables = set(connection.introspection.table_names(cursor))
+        full_scans = [line for line in plan if (match := re.match(r'SCAN (\w+)', line)) and match.group(1) in tables and 'USING' not in line]
+        self.assertEqual(full_scans, [], f'full scan of table in plan: {plan}')
+        return plan
+
+    def assert_ordered_by_index(self, queryset):
+        # rows are read in order of index - without sorting of all found rows ('USE TEMP B-TREE FOR ORDER BY')
+        plan = self.assert_no_full_scan(queryset)
+        self.assertFalse([line for line in plan if 'TEMP B-TREE' in line], f'sorting of rows in plan: {plan}')
+
+    def test_user_by_email(self):
+        self.assert_no_full_scan(DiaryUser.objects.filter(email='test-user@diary.test'))
+
+    def test_keyset_pages_of_get_endpoints(self):
+        # the next page of common_get_func (the first page is read from the beginning of table - it's stopped by LIMIT)
+        for func_name, endpoint_info in GET_ENDPOINTS.items():
+            if endpoint_info.get('model'):
+                with self.subTest(func_name):
+                    self.assert_ordered_by_index(endpoint_info['model'].objects.order_by('pk').filter(pk__gt=100)[:51])
+
+    def test_last_completed_poll_of_user_and_group(self):
+        # as in get_user_cp_result_by_q_group_name (.last() reads the first row in reversed order)
+        self.assert_ordered_by_index(UsersCompletedPoll.objects.filter(user__id=1, questions_group__group_name='Test Group')
+                                     .only('id', 'questions_group_id', *POLL_RESULT_FIELDS).order_by('completed_at').reverse()[:1])
+
+    def test_last_timeline_of_user(self):
+        # Timelines of one User are sorted (there are only a few of them), but not all Timelines
+        self.assert_no_full_scan(UsersTimeline.objects.filter(user__id=1).order_by(*TIMELINES_ORDERING).reverse().values_list('id', flat=True)[:1])
+
+    def test_timeline_events_pages(self):
+        # pages of tl_events_page - by cursor before/after and by Category
+        created_at = datetime(2025, 10, 30, 21, 22, 23, tzinfo=timezone.utc)
+        events = UsersTimelineEvent.objects.filter(timeline__id=1)
+        before = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=5)
+        self.assert_ordered_by_index(events.filter(before).order_by('-created_at', '-id')[:51])
+        self.assert_ordered_by_index(events.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=5)).order_by('created_at', 'id')[:51])
+        self.assert_ordered_by_index(events.filter(created_at__lt=created_at).order_by('-created_at', '-id')[:51])
+        self.assert_ordered_by_index(events.filter(category_id=1).filter(before).order_by('-created_at', '-id')[:51])
+
+    def test_timeline_events_by_timeline(self):
+        self.assert_no_full_scan(UsersTimelineEvent.objects.filter(timeline__id=1).order_by('-created_at', '-id')[:50])
+
+    def test_entries_by_category(self):
+        entries = Entry.objects.filter(category__name='category 1')
+        self.assert_no_full_scan(entries.values('id').order_by('category__name', *ENTRIES_IN_CAT_ORDERING))
+        # the same query with page of Entries for every Category (as in get_entries_by_cat_name)
+        entries = entries.annotate(row_number=Window(RowNumber(), partition_by=F('category__name'), order_by=ENTRIES_IN_CAT_ORDERING))
+        self.assert_no_full_scan(entries.filter(row_number__lte=51).values('id').order_by('category__name', *ENTRIES_IN_CAT_ORDERING))
+
+
+class RequestMetricsTest(TestCase):
+    # metrics of requests are aggregated by endpoints and shown only for allowed clients
+    def setUp(self):
+        REQUEST_METRICS.clear()
+        self.addCleanup(REQUEST_METRICS.clear)
+
+    def test_metrics_of_endpoint(self):
+        DiaryUser.objects.create(name='Test User', email='test-user@diary.test')
+        for _ in range(2):
+            self.assertEqual(self.client.get('/get_users/').status_code, 200)
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        lines = response.content.decode().splitlines()
+        self.assertIn('diary_requests_total{endpoint="get_users",method="GET",status="200"} 2', lines)
+        self.assertIn('diary_request_duration_seconds_count{endpoint="get_users",method="GET"} 2', lines)
+        # one query for every request - page of Users (DiaryUser has no Many-To-Many fields)
+        self.assertIn('diary_request_queries_total{endpoint="get_users",method="GET"} 2', lines)
+
+    def test_metrics_are_not_public(self):
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='10.0.0.1').status_code, 403)
+        with override_settings(METRICS_TOKEN='metrics-token'):
+            self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer wrong-token').status_code, 403)
+            self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer metrics-token').status_code, 200)
+        self.client.force_login(User.objects.create(username='staff', is_staff=True))
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='10.0.0.1').status_code, 200)
+
+    def test_repeated_query_header_without_sql(self):
+        metrics = RequestMetrics()
+        sql = 'SELECT "entry_tags"."name" FROM "entry_tags" WHERE "entry_tags"."id" = %s'
+        for tag_id in range(SIMILAR_QUERIES_THRESHOLD):
+            metrics.query_wrapper(lambda *args: None, sql, (tag_id,), False, {})
+        self.assertEqual(metrics.repeated_query_header(), f'{query_fingerprint(sql)}; count={SIMILAR_QUERIES_THRESHOLD}')
+        self.assertNotIn('entry_tags', metrics.repeated_query_header())
+        self.assertIn(f'N+1: {SIMILAR_QUERIES_THRESHOLD} similar', metrics.server_timing(0.1))
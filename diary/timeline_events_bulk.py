@@ -0,0 +1,88 @@
+""" Adding of many Timeline Events by one request (endpoint add_timeline_events_bulk): Events are taken in chunks,
+    for every chunk Timelines of all its Users are found by one query, Categories and Templates are taken from cache
+    of reference tables, and all valid Events of chunk are inserted by one bulk_create in one transaction.
+    bulk_create doesn't send signals - so versions of data and Timeline documents of Users are changed here explicitly"""
+from datetime import datetime, timezone
+from itertools import islice
+from django.db import transaction
+from diary.models import UsersTimeline, UsersTimelineEvent
+from diary.data_versions import USER_TIMELINE_KEY, bump_data_versions
+from diary.reference_data import get_reference_id, get_tl_event_template_id
+from diary.timeline_projection import add_projection_events
+
+TL_EVENTS_BULK_CHUNK_SIZE = 500
+TL_EVENT_BULK_FIELDS = ('created_at', 'user_id', 'link', 'event_category', 'event_template', 'event', 'emotion')
+
+
+def tl_event_of_item(item, timelines):
+    # returns (not saved UsersTimelineEvent, None) or (None, error) - checks are the same as in add_timeline_event
+    if isinstance(item, Exception):
+        return None, f'{item}'
+    if not isinstance(item, dict):
+        return None, 'every Event should be JSON object'
+    missed_fields = [field for field in TL_EVENT_BULK_FIELDS if field not in item]
+    if missed_fields:
+        return None, f'missed fields: {", ".join(missed_fields)}'
+    try:
+        created_at = datetime.strptime(str(item['created_at'])[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    except ValueError as e:
+        return None, f'{e}'
+    user_timeline = timelines.get(str(item['user_id']))
+    category = get_reference_id('timeline_event_categories', 'category_name', item['event_category'])
+    event_template = get_tl_event_template_id(category, item['event_template'])
+    if not (user_timeline and category and item['event'] and item['emotion'] and event_template):
+        return None, 'incoming data is not valid'
+    return UsersTimelineEvent(user_id=user_timeline[0], timeline_id=user_timeline[1], category_id=category, event=item['event'],
+                              link=item['link'], emotion=item['emotion'], event_template_id=event_template,
+                              created_at=created_at), None
+
+
+def add_timeline_events_chunk(items, start_index):
+    # Timeline of User is the first one (the same as in add_timeline_event), users are keyed by str - ids can be sent as str
+    users_ids = {str(item['user_id']) for item in items if isinstance(item, dict) and 'user_id' in item}
+    timelines = {}
+    for user_id, timeline_id in UsersTimeline.objects.filter(user__id__in=[x for x in users_ids if x.isdigit()])\
+            .order_by('id').values_list('user_id', 'id'):
+        timelines.setdefault(str(user_id), (user_id, timeline_id))
+
+    results = []
+    events = []
+    for index, item in enumerate(items, start=start_index):
+        event, error = tl_event_of_item(item, timelines)
+        if event:
+            events.append((index, event))
+            results.append({'index': index, 'res': 'good'})
+        else:
+            results.append({'index': index, 'res': 'error', 'error': error})
+    if not events:
+        return results
+
+    try:
+        with transaction.atomic():
+            UsersTimelineEvent.objects.bulk_create([event for index, event in events])
+            users_events = {}
+            for index, event in events:
+                users_events.setdefault((event.user_id, event.timeline_id), []).append(event)
+            for (user_id, timeline_id), user_events in users_events.items():
+                add_projection_events(user_id, timeline_id, user_events)
+            bump_data_versions(*[USER_TIMELINE_KEY.format(user_id=user_id) for user_id, timeline_id in users_events])
+    except Exception as e:
+        # nothing of chunk is saved
+        for index, event in events:
+            results[index - start_index] = {'index': index, 'res': 'error', 'error': f'Error in Saving timeline_event: {e}'}
+        return results
+
+    for index, event in events:
+        results[index - start_index]['event_saved_id'] = event.pk
+    return results
+
+
+def save_timeline_events_in_chunks(items, chunk_size=TL_EVENTS_BULK_CHUNK_SIZE):
+    # items - list or any iterable (like generator of NDJSON lines), it's read chunk by chunk
+    items = iter(items)
+    results = []
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return results
+        results.extend(add_timeline_events_chunk(chunk, len(results)))
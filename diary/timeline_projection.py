@@ -0,0 +1,141 @@
+""" Denormalized Timeline of User (UsersTimelineProjection): the last Timeline of User with all its Events and their Reactions
+    in one JSON document. Document is changed incrementally on every change of Event or Reaction (by signals - see signals.py,
+    or explicitly for bulk writes) and it's built from scratch only if it doesn't exist yet (on the first reading).
+    Names of Categories and Templates are not stored in document - they are taken from cache of reference tables on reading,
+    so renaming of Category in Admin doesn't need updating of all documents"""
+from datetime import datetime
+from django.db import transaction
+from django.utils import timezone as dj_timezone
+from diary.models import UsersTimeline, UsersTimelineEvent, UsersTimelineEventReaction, UsersTimelineProjection
+from diary.reference_data import get_reference_row
+
+TL_EVENT_DT_FORMAT = '%Y-%m-%dT%H:%M:%S'
+TL_EVENT_FIELDS = ('id', 'event', 'created_at', 'description', 'emotion', 'category_id', 'event_template_id')
+TL_EVENT_REACTION_FIELDS = ('id', 'user_id', 'created_at', 'reaction', 'description', 'emotion', 'category_id')
+# the last Timeline of User is the last one by this ordering (Timelines with the same start_dt - by id)
+TIMELINES_ORDERING = ('start_dt', 'id')
+
+
+def projection_item(obj, fields):
+    # obj can be Model instance or dict from .values()
+    item = {field: obj[field] for field in fields} if isinstance(obj, dict) else {field: getattr(obj, field) for field in fields}
+    item['created_at'] = datetime.strftime(item['created_at'], TL_EVENT_DT_FORMAT) if item['created_at'] else None
+    return item
+
+
+def sort_projection_events(events):
+    # the newest Events are first (the same as order_by('-created_at', '-id'))
+    events.sort(key=lambda item: (item['created_at'] or '', item['id']), reverse=True)
+
+
+def timeline_events_items(rows, reactions=None):
+    # items of document for Events (rows are dicts from .values(*TL_EVENT_FIELDS)) with all their Reactions (by one query).
+    # reactions - queryset of Reactions of these Events (by default - they are found by ids of Events)
+    if reactions is None:
+        reactions = UsersTimelineEventReaction.objects.filter(event__in=[row['id'] for row in rows])
+    events_reactions = {}
+    for item in reactions.order_by('created_at', 'id').values('event_id', *TL_EVENT_REACTION_FIELDS):
+        events_reactions.setdefault(item['event_id'], []).append(projection_item(item, TL_EVENT_REACTION_FIELDS))
+    items = []
+    for row in rows:
+        item = projection_item(row, TL_EVENT_FIELDS)
+        item['reactions'] = events_reactions.get(row['id'], [])
+        items.append(item)
+    return items
+
+
+def build_timeline_projection(user_id):
+    # document from scratch - for the last Timeline of User (returns None if User has no Timeline)
+    last_tl = UsersTimeline.objects.filter(user__id=user_id).order_by(*TIMELINES_ORDERING).only('id', 'user_id').last()
+    if not last_tl:
+        return None
+    events = timeline_events_items(UsersTimelineEvent.objects.filter(timeline__id=last_tl.pk).values(*TL_EVENT_FIELDS),
+                                   UsersTimelineEventReaction.objects.filter(event__timeline__id=last_tl.pk))
+    sort_projection_events(events)
+    projection, _ = UsersTimelineProjection.objects.update_or_create(user_id=last_tl.user_id, defaults={'timeline_id': last_tl.pk, 'events': events})
+    return projection
+
+
+def reset_timeline_projection(timeline):
+    # new Timeline becomes the last one only if it's not older than Timeline of document (by TIMELINES_ORDERING - new Timeline has the biggest id),
+    # then document starts from empty list of Events. Timeline with older start_dt (added in Admin or loaded) doesn't change document,
+    # and if document doesn't exist yet - it will be built on reading
+    UsersTimelineProjection.objects.filter(user_id=timeline.user_id, timeline__start_dt__lte=timeline.start_dt)\
+        .update(timeline_id=timeline.pk, events=[], updated_at=dj_timezone.now())
+
+
+def change_projection(user_id, timeline_id, change):
+    # change(events) changes list of Events of document in place. Document is locked while changing,
+    # and if document doesn't exist yet - nothing to change (it will be built on reading)
+    with transaction.atomic(savepoint=False):
+        projection = UsersTimelineProjection.objects.select_for_update().filter(user_id=user_id).first()
+        if projection and (timeline_id is None or projection.timeline_id == timeline_id):
+            change(projection.events)
+            projection.save(update_fields=['events', 'updated_at'])
+
+
+def update_projection_event(event, deleted=False):
+    def change(events):
+        old_item = next((item for item in events if item['id'] == event.pk), None)
+        if old_item:
+            events.remove(old_item)
+        if not deleted:
+            item = projection_item(event, TL_EVENT_FIELDS)
+            item['reactions'] = old_item['reactions'] if old_item else []
+            events.append(item)
+            sort_projection_events(events)
+    change_projection(event.user_id, event.timeline_id, change)
+
+
+def add_projection_events(user_id, timeline_id, events):
+    # new Events of one Timeline which are created by bulk_create (without signals) - they are added to document by one change
+    def change(items):
+        for event in events:
+            item = projection_item(event, TL_EVENT_FIELDS)
+            item['reactions'] = []
+            items.append(item)
+        sort_projection_events(items)
+    change_projection(user_id, timeline_id, change)
+
+
+def update_projection_reaction(reaction, deleted=False, event_owner_id=None):
+    # Reaction can be made by any User - so document of owner of Event is changed
+    if event_owner_id is None:
+        event_owner_id = UsersTimelineEvent.objects.filter(pk=reaction.event_id).values_list('user_id', flat=True).first()
+    if event_owner_id is None:
+        return
+
+    def change(events):
+        event_item = next((item for item in events if item['id'] == reaction.event_id), None)
+        if event_item:
+            event_item['reactions'] = [item for item in event_item['reactions'] if item['id'] != reaction.pk]
+            if not deleted:
+                event_item['reactions'].append(projection_item(reaction, TL_EVENT_REACTION_FIELDS))
+                event_item['reactions'].sort(key=lambda item: (item['created_at'] or '', item['id']))
+    change_projection(event_owner_id, None, change)
+
+
+def timeline_event_view(item):
+    # Event of document as it's shown in get_tl_events_by_user
+    category = get_reference_row('timeline_event_categories', item['category_id']) or {}
+    template = get_reference_row('timeline_event_templates', item['event_template_id']) or {}
+    templ_name = template.get('event')
+    return {
+        'id': item['id'],
+        'event': item['event'],
+        'created_at': item['created_at'],
+        'description': item['description'],
+        'emotion': item['emotion'],
+        'cat_name': category.get('category_name'),
+        'templ_name': templ_name,
+        'custom_event': item['event'] if templ_name == 'Custom' else '',
+        'reactions': [{
+            'id': reaction['id'],
+            'user_id': reaction['user_id'],
+            'created_at': reaction['created_at'],
+            'reaction': reaction['reaction'],
+            'description': reaction['description'],
+            'emotion': reaction['emotion'],
+            'cat_name': (get_reference_row('event_reaction_categories', reaction['category_id']) or {}).get('category_name'),
+        } for reaction in item['reactions']],
+    }
@@ -1,9 +1,12 @@
 from django.urls import path
 from diary import views 
+from diary.request_metrics import metrics
 
-get_apis = [path(f"{v['func']}/", getattr(views, v['func'])) for k,v in views.API_SCHEMA['all_get_apis'].items() if 'func' in v and hasattr(views, v['func'])]
-post_apis = [path(f"{v['func']}/", getattr(views, v['func'])) for k,v in views.API_SCHEMA['all_post_apis'].items() if 'func' in v and hasattr(views, v['func'])]
+get_apis = [path(api_path[1:], getattr(views, v['func'])) for api_path, v in views.GET_ENDPOINTS_BY_PATH.items() if hasattr(views, v['func'])]
+post_apis = [path(api_path[1:], getattr(views, v['func'])) for api_path, v in views.POST_ENDPOINTS_BY_PATH.items() if hasattr(views, v['func'])]
 
 urlpatterns = [
-    path("", views.get_all_apis),
-] + get_apis + post_apis
\ No newline at end of file
+    path("", views.get_all_apis, name='get_all_apis'),
+    # metrics of requests in Prometheus format (see request_metrics.py)
+    path("metrics/", metrics, name='metrics'),
+] + get_apis + post_apis
@@ -2,13 +2,34 @@ from rest_framework.decorators import api_view
 from rest_framework.views import Response, exception_handler
 from rest_framework import status as http_status
 from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.decorators import renderer_classes, parser_classes
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+from django.db import transaction, IntegrityError
 from django.db.models import F, Q
+from django.db.models import BinaryField
+from django.db.models import Window
+from django.db.models.functions import Substr, RowNumber
+from django.http import StreamingHttpResponse, HttpResponse
 from diary.models import *
 from .serializers import *
-import copy
+from .entry_media import ENTRY_MEDIA_FIELDS, entry_media_path, parse_range_header, PassthroughRenderer
+from .entry_thumbnails import get_image_thumbnail, THUMBNAIL_CONTENT_TYPE
+from .media_storage import read_stored_media
+from .data_versions import conditional_on_data_versions, get_data_versions, event_owner_id, USER_TIMELINE_KEY
+from .timeline_projection import build_timeline_projection, timeline_event_view, timeline_events_items, TIMELINES_ORDERING, TL_EVENT_FIELDS
+from .parsers import NDJSONParser
+from .entry_uploads import new_entry_of_item, entry_saved_data, save_entries_in_chunks, ENTRIES_BULK_CHUNK_SIZE
+from .timeline_events_bulk import save_timeline_events_in_chunks, TL_EVENTS_BULK_CHUNK_SIZE
+from .poll_documents import get_poll_document, POLL_KEY
+from .reference_data import get_reference_rows, get_reference_id, get_tl_event_template_id, get_tech_tl_event_ids, invalidate_reference_data
 from datetime import datetime, timezone
 import base64
-from functools import wraps
+import json
+from functools import wraps, partial, lru_cache
+from types import MappingProxyType
+from itertools import islice
 
 
 EMOTIONS_DICT = {
@@ -17,6 +38,24 @@ EMOTIONS_DICT = {
     'bad': '🙁'
 }
 
+# Keyset (cursor) pagination for all common GET endpoints (endpoints in API_SCHEMA with 'model' and 'serializer').
+# Every such endpoint returns not more than 'page_size' rows (ordered by id) and 'next_cursor' token for the next page.
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_TL_EVENTS_LIMIT = 50
+MAX_PAGE_SIZE = 1000
+# Streaming mode (GET param stream=true) - rows are read from DB by chunks with server-side cursor 
+# and written to response as JSON incrementally, so memory doesn't depend on count of rows
+STREAM_CHUNK_SIZE = 2000
+STREAM_BUFFER_SIZE = 64 * 1024
+COMMON_GET_PARAMS_DESCRIPTION = f"""
+                Also as not required, but possible GET params you can send values for:
+                - page_size (int) - max count of rows in Result (by default: {DEFAULT_PAGE_SIZE}, max: {MAX_PAGE_SIZE})
+                - cursor (str) - value of 'next_cursor' from previous Result for getting the next page of rows
+                (if 'next_cursor' in Result is null - there is no more rows)
+                - fields (str) - comma-separated list of needed fields (for example: fields=id,name), by default all fields will be shown
+                - stream (bool) - if stream=true - ALL rows (starting from 'cursor' if it's set) will be sent as streaming response without pagination
+            """
+
 API_SCHEMA = {
     'all_get_apis': {
         'All Questions Groups:': {
@@ -112,6 +151,7 @@ API_SCHEMA = {
             'func': 'get_qc_by_q_group_name',
             'description': """
                 Endpont for getting ALL Questions with their Choices (of answers) for one Question Group.
+                Questions and Choices are ordered by their "order" field.
                 Allow only GET method! 
                 As GET param (at the end of URL, after "?" symbol) you should send value for:
                 - questions_group
@@ -328,10 +368,15 @@ API_SCHEMA = {
                 As GET param (at the end of URL, after "?" symbol) you should send value for:
                 - need_full_data - because the full data response contains base64 (binary) data of image and for audio
                 and as plain text is too big for show it in browser (but it can be easily readed by script request).
-                So if you want just to see in browser how it can looks like - set need_full_data=false as query param.
-                But if you really need full data in response - set need_full_data=true as query param.
+                So by default in Result there are only links to raw image/audio (image_url, audio_url - it's 'get_entry_media' endpoint) 
+                and their sizes in bytes (image_size, audio_size) - set need_full_data=false as query param for that.
+                But if you really need full data in response (also with base64 values) - set need_full_data=true as query param.
                 If you didn't set this param anyway - the response will be shown cutted as if you set need_full_data=false.
 
+                Also as not required, but possible GET param you can send value for:
+                - stream (bool) - if stream=true - Entries will be sent as streaming response (rows are read from DB and written by chunks), 
+                it's for getting very big count of Entries by script request
+
                 Example of request is below and you can try it by clicking Link on that page:
                 Example of possible Result is also below:
             """,
@@ -346,8 +391,12 @@ API_SCHEMA = {
                     "description": "about starting my Diary",
                     "text": "Hello, Diary! I write you my first entry. Don't know what to write about but I like the whole process of it!",
                     "cat_name": "Notes",
-                    "image_base64": "iVBORw0KGgoAAAANSUhE... (end cutted because of very long length)",
-                    "audio_base64": "//uQxAAAAAAAAAAAAAAA... (end cutted because of very long length)",
+                    "image_size": 3240,
+                    "image_checksum": "9f2b4c1de0a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1a0b9c8d7e6f5a4b3c2",
+                    "image_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=1&media=image",
+                    "audio_size": 52114,
+                    "audio_checksum": "1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2b",
+                    "audio_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=1&media=audio",
                     "tags": [
                         "note"
                     ]
@@ -360,8 +409,12 @@ API_SCHEMA = {
                     "description": "it's a long story about what we did last summer",
                     "text": "So I should tell a very long story about it. I will start from the beginning...",
                     "cat_name": "Long stories",
-                    "image_base64": "AAABAA0AMDAQAAEABABo... (end cutted because of very long length)",
-                    "audio_base64": "//uQxAAAAAAAAAAAAAAA... (end cutted because of very long length)",
+                    "image_size": 3240,
+                    "image_checksum": "9f2b4c1de0a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1a0b9c8d7e6f5a4b3c2",
+                    "image_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=2&media=image",
+                    "audio_size": 52114,
+                    "audio_checksum": "1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2b",
+                    "audio_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=2&media=audio",
                     "tags": [
                         "long-read",
                         "scary"
@@ -378,8 +431,9 @@ API_SCHEMA = {
                 - entry_id - as a result will be shown data about this exact Entry
                 - need_full_data - because the full data response contains base64 (binary) data of image and for audio
                 and as plain text is too big for show it in browser (but it can be easily readed by script request).
-                So if you want just to see in browser how it can looks like - set need_full_data=false as query param.
-                But if you really need full data in response - set need_full_data=true as query param.
+                So by default in Result there are only links to raw image/audio (image_url, audio_url - it's 'get_entry_media' endpoint), 
+                their sizes in bytes and checksums (sha256) - set need_full_data=false as query param for that.
+                But if you really need full data in response (also with base64 values) - set need_full_data=true as query param.
                 If you didn't set this param anyway - the response will be shown cutted as if you set need_full_data=false.
 
                 Example of request is below and you can try it by clicking Link on that page:
@@ -394,8 +448,12 @@ API_SCHEMA = {
                     "description": "about starting my Diary",
                     "text": "Hello, Diary! I write you my first entry. Don't know what to write about but I like the whole process of it!",
                     "cat_name": "Notes",
-                    "image_base64": "iVBORw0KGgoAAAANSUhE... (end cutted because of very long length)",
-                    "audio_base64": "//uQxAAAAAAAAAAAAAAA... (end cutted because of very long length)",
+                    "image_size": 3240,
+                    "image_checksum": "9f2b4c1de0a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1a0b9c8d7e6f5a4b3c2",
+                    "image_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=1&media=image",
+                    "audio_size": 52114,
+                    "audio_checksum": "1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2b",
+                    "audio_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=1&media=audio",
                     "tags": [
                         "note"
                     ]
@@ -409,17 +467,24 @@ API_SCHEMA = {
                 As GET param (at the end of URL, after "?" symbol) you should send value for:
                 - need_full_data - because the full data response contains base64 (binary) data of image
                 and as plain text is too big for show it in browser (but it can be easily readed by script request).
-                So if you want just to see in browser how it can looks like - set need_full_data=false as query param.
-                But if you really need full data in response - set need_full_data=true as query param.
+                So by default in Result there are only links to raw image/audio (image_url, audio_url - it's 'get_entry_media' endpoint) 
+                and their sizes in bytes (image_size, audio_size) - set need_full_data=false as query param for that.
+                But if you really need full data in response (also with base64 values) - set need_full_data=true as query param.
                 If you didn't set this param anyway - the response will be shown cutted as if you set need_full_data=false.
 
                 Also as not required, but possible GET param you can send value for:
                 - category_name - as a result will be shown Entries from this Entries Category
+                - page_size (int) - max count of Entries for every Category (by default: 100, max: 1000), 
+                Entries inside of Category are ordered by date_time. If Category has more Entries - there will be 'next_cursor' for this Category
+                - cursor (str) - value of 'next_cursor' of some Category from previous Result - for getting the next page of Entries of this Category
+                (it can be used only together with category_name)
+                - stream (bool) - if stream=true - Entries will be sent as streaming response (rows are read from DB and written by chunks), 
+                it's for getting very big count of Entries by script request
 
                 Example of request is below and you can try it by clicking Link on that page:
                 Example of possible Result is also below:
             """,
-            'detail': 'GET data should contains 1 value: need_full_data (bool). Also GET data can contain 1 value: category_name (str). You can try with Example - click on the link in it', 
+            'detail': 'GET data should contains 1 value: need_full_data (bool). Also GET data can contain values: category_name (str), page_size (int), cursor (str). You can try with Example - click on the link in it', 
             'example of GET URL with params': f'?category_name=Notes&need_full_data=false',
             'result example': [
                 {
@@ -433,13 +498,18 @@ API_SCHEMA = {
                             "description": "about starting my Diary",
                             "text": "Hello, Diary! I write you my first entry. Don't know what to write about but I like the whole process of it!",
                             "cat_name": "Notes",
-                            "image_base64": "iVBORw0KGgoAAAAN... (end cutted because of very long length)",
-                            "audio_base64": "SUQzBAAAAAAAIlRT... (end cutted because of very long length)",
+                            "image_size": 3240,
+                            "image_checksum": "9f2b4c1de0a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1a0b9c8d7e6f5a4b3c2",
+                            "image_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=1&media=image",
+                            "audio_size": 52114,
+                            "audio_checksum": "1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2b",
+                            "audio_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=1&media=audio",
                             "tags": [
                                 "note"
                             ]
                         }
-                    ]
+                    ],
+                    "next_cursor": None
                 },
                 {
                     "category": "Long stories",
@@ -452,17 +522,44 @@ API_SCHEMA = {
                             "description": "it's a long story about what we did last summer",
                             "text": "So I should tell a very long story about it. I will start from the beginning...",
                             "cat_name": "Long stories",
-                            "image_base64": "iVBORw0KGgoAAAAN... (end cutted because of very long length)",
-                            "audio_base64": "SUQzBAAAAAAAIlRT... (end cutted because of very long length)",
+                            "image_size": 3240,
+                            "image_checksum": "9f2b4c1de0a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d3e2f1a0b9c8d7e6f5a4b3c2",
+                            "image_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=2&media=image",
+                            "audio_size": 52114,
+                            "audio_checksum": "1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2b",
+                            "audio_url": "http://127.0.0.1:8000/get_entry_media/?entry_id=2&media=audio",
                             "tags": [
                                 "long-read",
                                 "scary"
                             ]
                         }
-                    ]
+                    ],
+                    "next_cursor": None
                 }
             ]
         },
+        'Get Entry media (raw image or audio) by id:': {
+            'func': 'get_entry_media',
+            'description': """
+                Endpont for getting raw image or audio of exact Diary Entry (as binary file, not as base64 string).
+                It's the link which is shown as image_url/audio_url in Entries endpoints, 
+                so it can be used directly in <img> or <audio> tags on client side.
+                Allow only GET method! 
+                As GET param (at the end of URL, after "?" symbol) you should send values for:
+                - entry_id
+                - media - 'image' or 'audio'
+                - thumbnail (optional, only for image) - with thumbnail=true small JPEG thumbnail of image (not bigger than 150x150) is sent. 
+                Thumbnail is made on the first request and then it's cached (if Pillow is not installed - original image is sent)
+
+                Response has correct Content-Type, Content-Length and ETag headers 
+                and it supports 'Range' header (response with status 206 and only requested part of bytes) - 
+                so audio can be played in browser from any moment without downloading the whole file.
+
+                Example of request is below and you can try it by clicking Link on that page:
+            """,
+            'detail': 'GET data should contains 2 values: entry_id (int), media (str: image or audio). You can try with Example - click on the link in it', 
+            'example of GET URL with params': f'?entry_id=1&media=image'
+        },
         'All Timelines:': {
             'func': 'get_timelines',
             'model': UsersTimeline,
@@ -626,15 +723,24 @@ API_SCHEMA = {
         'All Timeline Events by user_id:': {
             'func': 'get_tl_events_by_user',
             'description': """
-                Endpont for getting Timeline Events for some Diary User.
+                Endpont for getting Timeline Events for some Diary User (from his last Timeline, the newest Events are first).
+                Every Event contains all its Reactions (of any Users).
                 Allow only GET method! 
                 As GET param (at the end of URL, after "?" symbol) you should send value for:
                 - user_id
 
+                Also as not required, but possible GET params (for infinite scroll) you can send values for:
+                - limit (int) - max count of Events in Result (by default: 50, max: 1000)
+                - before (str) - Events which are older than that: value of 'next_cursor' from previous Result or timestamp (like 2025-10-30T21:22:23)
+                - after (str) - Events which are newer than that: value of 'prev_cursor' from previous Result or timestamp
+                - category (str) - only Events of this Timeline Event Category
+                If any of these params is sent - in Result there are also 'next_cursor' (for older Events, it's null if there are no more Events) 
+                and 'prev_cursor' (for newer Events).
+
                 Example of request is below and you can try it by clicking Link on that page:
                 Example of possible Result is also below:
             """,
-            'detail': 'GET data should contains 1 values: user_id (int). You can try with Example - click on the link in it', 
+            'detail': 'GET data should contains 1 values: user_id (int). Also GET data can contain values: limit (int), before (str), after (str), category (str). You can try with Example - click on the link in it', 
             'example of GET URL with params': f'?user_id=1',
             'result example': {
                 "user_id": 1,
@@ -647,7 +753,18 @@ API_SCHEMA = {
                         "emotion": "😐",
                         "cat_name": "App Achievements",
                         "templ_name": "Registration in App",
-                        "custom_event": ""
+                        "custom_event": "",
+                        "reactions": [
+                            {
+                                "id": 1,
+                                "user_id": 1,
+                                "created_at": "2025-02-09T18:55:00",
+                                "reaction": "yeee",
+                                "description": "I'm very happy after registration in App",
+                                "emotion": "🙂",
+                                "cat_name": "Happy reactions"
+                            }
+                        ]
                     },
                     {
                         "id": 2,
@@ -657,7 +774,8 @@ API_SCHEMA = {
                         "emotion": "🙂",
                         "cat_name": "Another Category",
                         "templ_name": "Good Event",
-                        "custom_event": ""
+                        "custom_event": "",
+                        "reactions": []
                     }  
                 ]
             }
@@ -801,6 +919,8 @@ API_SCHEMA = {
                 and also adding finished Complited Poll for that QuestionsGroup.
                 After adding Completed Poll will be automaticly added:
                 - Timeline Event like 'Passed {questions_group_name} poll' with Emotion 'Good' (🙂)
+                Results of poll are stored right away - if they can't be calculated (for example, because of wrong result_types of QuestionsGroup), 
+                poll and answers are saved anyway and the reason is shown in 'result_error' of Result.
 
                 Allow only POST method! 
                 As POST data you should send values for:
@@ -877,6 +997,11 @@ API_SCHEMA = {
                 - audio_base64 (str) - this should be a string with base64 code of binary value of your audio. 
                 It will be decoded back to binary format and saved in DB in BinaryField. You can listen the actual audio in Admin Panel in Entries Section with simple player
                 - tags (list of dicts) - this should be a list of dicts and each dict should have a key 'tag_id' with value of already existing Tag id.
+
+                For big image/audio you can send the same values as multipart/form-data (Content-Type: multipart/form-data):
+                image/audio are sent as files in parts "image" and "audio" (or base64 text of them as files in parts "image_base64" and "audio_base64" -
+                they are decoded chunk by chunk), tags are sent as JSON string (for example: [{"tag_id": 1}]).
+                In this case image/audio are not sent back in result (only their size, checksum and type).
                 
                 Example is below and you can try it with form on that page: 
             """,
@@ -895,6 +1020,46 @@ API_SCHEMA = {
                 "tags": [{"tag_id": 1}, {"tag_id": 2}]
             }
         },
+        'Add Entries in bulk': {
+            'func': 'add_entries_bulk',
+            'description': """
+                Endpont for adding many Diary User Entries by one request (for example - for import of old Entries with their images and audio).
+                Allow only POST method! 
+                As POST data you should send JSON array of Entries (Content-Type: application/json)
+                or NDJSON - one JSON object of Entry in every line (Content-Type: application/x-ndjson).
+                NDJSON is read line by line - so even big imports don't need a lot of memory.
+                Every Entry should contain the same values as for "Add Entry".
+                As GET param (at the end of URL, after "?" symbol) you can send value for:
+                - chunk_size (int, optional, default is 50, max is 1000) - Entries are saved one by one, 
+                but every chunk of them is saved in one transaction (if saving of chunk fails - nothing of this chunk is saved)
+
+                Result contains result for every Entry by its index in incoming data (with entry_saved_id for saved Entries).
+                Example is below and you can try it with form on that page: 
+            """,
+            'detail': 'POST data should be JSON array (or NDJSON lines) of Entries, every Entry contains the same values as for add_entry: date_time (str), user_id (int), category_id (int), title (str), description (str), text (str), image_name (str), image_base64 (str), audio_name (str), audio_base64 (str), tags (list of dicts). You can try with Example - copy this JSON to the form below and click "POST" button', 
+            'example of POST data': [
+                {
+                    "date_time": "2025-10-30 21:22:23",
+                    "user_id": 1,
+                    "category_id": 1,
+                    "title": "Awesome Title",
+                    "description": "some description",
+                    "text": "a long story about something",
+                    "image_name": "small_photo",
+                    "image_base64": "R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7",
+                    "tags": [{"tag_id": 1}]
+                },
+                {
+                    "date_time": "2025-10-31 10:00:00",
+                    "user_id": 1,
+                    "category_id": 1,
+                    "title": "One more Title",
+                    "description": "",
+                    "text": "one more story without image and audio",
+                    "tags": []
+                }
+            ]
+        },
         'Add Timeline Event by user_id': {
             'func': 'add_timeline_event',
             'description': """
@@ -922,6 +1087,50 @@ API_SCHEMA = {
                 "emotion": "🙂"
             }
         },
+        'Add Timeline Events in bulk': {
+            'func': 'add_timeline_events_bulk',
+            'description': """
+                Endpont for adding many Diary User Timeline Events by one request (for example - for import of old Events).
+                Allow only POST method! 
+                As POST data you should send JSON array of Events (Content-Type: application/json)
+                or NDJSON - one JSON object of Event in every line (Content-Type: application/x-ndjson).
+                Every Event should contain the same values as for "Add Timeline Event by user_id":
+                - created_at (str timestamp with format: '%Y-%m-%d %H:%M:%S', for example: '2025-10-30 21:22:23')
+                - user_id (int)
+                - link (str)
+                - event_category (str name of category)
+                - event_template (str text of template)
+                - event (str text of event)
+                - emotion (str)
+                As GET param (at the end of URL, after "?" symbol) you can send value for:
+                - chunk_size (int, optional, default is 500, max is 1000) - Events are saved by chunks of this size,
+                every chunk is saved in one transaction (if saving of chunk fails - nothing of this chunk is saved)
+
+                Result contains result for every Event by its index in incoming data (with event_saved_id for saved Events).
+                Example is below and you can try it with form on that page: 
+            """,
+            'detail': 'POST data should be JSON array (or NDJSON lines) of Events, every Event contains 7 values: created_at (str), user_id (int), link (str), event_category (str), event_template (str), event (str), emotion (str). You can try with Example - copy this JSON to the form below and click "POST" button', 
+            'example of POST data': [
+                {
+                    "created_at": "2025-10-30 21:22:23",
+                    "user_id": 1,
+                    "link": "awesome.photo.com",
+                    "event_category": "Good Events",
+                    "event_template": "Some Good Event",
+                    "event": "Some Good Event",
+                    "emotion": "🙂"
+                },
+                {
+                    "created_at": "2025-10-31 10:00:00",
+                    "user_id": 1,
+                    "link": "",
+                    "event_category": "Good Events",
+                    "event_template": "Some Good Event",
+                    "event": "One more Good Event",
+                    "emotion": "😀"
+                }
+            ]
+        },
         'Add Timeline Event Reaction by event_id': {
             'func': 'add_tl_event_reaction',
             'model': UsersTimelineEventReaction,
@@ -1001,6 +1210,24 @@ API_SCHEMA = {
 }
 
 
+# Registry of endpoints - it's built once from API_SCHEMA when app is starting (API_SCHEMA isn't changed while app is running),
+# so endpoint info can be got by func name or by URL path without looking through the whole API_SCHEMA on every request
+def build_endpoints_registry(apis):
+    by_func = {v['func']: MappingProxyType(v) for k,v in apis.items() if 'func' in v}
+    by_path = {f'/{func}/': v for func, v in by_func.items()}
+    return MappingProxyType(by_func), MappingProxyType(by_path)
+
+
+GET_ENDPOINTS, GET_ENDPOINTS_BY_PATH = build_endpoints_registry(API_SCHEMA['all_get_apis'])
+POST_ENDPOINTS, POST_ENDPOINTS_BY_PATH = build_endpoints_registry(API_SCHEMA['all_post_apis'])
+# Root page: {Section: {endpoint name: URL path}}, full URLs are added to it only once for every base URL (see get_all_apis)
+ALL_APIS_PATHS = MappingProxyType({
+    'APIs GET:': MappingProxyType({k: v['func'] for k,v in API_SCHEMA['all_get_apis'].items()}),
+    'APIs POST:': MappingProxyType({k: v['func'] for k,v in API_SCHEMA['all_post_apis'].items()}),
+})
+ALL_APIS_CACHE_SIZE = 32
+
+
 def func_name_defining(func):
     @wraps(func)
     def func_with_name(*args, **kwargs):
@@ -1015,9 +1242,13 @@ def docstring_setup():
         # where defining functions for endpoints it looks to API dict 
         # and set function docstring (description on REST page of endpoint) from API dict by the function name and type of endpoint
         if 'get' in func.__name__:
-            func.__doc__ = next((v.get('description') for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == func.__name__), '')
+            endpoint_dict = GET_ENDPOINTS.get(func.__name__, {})
+            func.__doc__ = endpoint_dict.get('description', '')
+            if 'model' in endpoint_dict:
+                # all common GET endpoints have the same optional params for pagination and projection
+                func.__doc__ += COMMON_GET_PARAMS_DESCRIPTION
         else:
-            func.__doc__ = next((v.get('description') for k,v in API_SCHEMA['all_post_apis'].items() if v['func'] == func.__name__), '')
+            func.__doc__ = POST_ENDPOINTS.get(func.__name__, {}).get('description', '')
         return func
     return set_docstring
 
@@ -1030,7 +1261,7 @@ def custom_exception_handler(exc, context):
     # Now add detailed description how to send proper POST request with example into response.
     if response is not None:
         if isinstance(exc, MethodNotAllowed):
-            endpoint = next((v for k,v in API_SCHEMA['all_post_apis'].items() if v['func'] == context['request'].path[1:-1]), {})
+            endpoint = POST_ENDPOINTS_BY_PATH.get(context['request'].path, {})
             response.data['detail'] = endpoint.get('detail')
             response.data['example of POST data'] = endpoint.get('example of POST data') 
             response.status_code = 200
@@ -1039,13 +1270,122 @@ def custom_exception_handler(exc, context):
 
 
 ##################################### GET API finctions #####################################
-def common_get_func(func_name):
+def encode_cursor(values):
+    # cursor token for keyset pagination - it's urlsafe base64 of JSON list with ordering values of the last row on the page
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+def decode_cursor(cursor, types=(int,)):
+    # types - allowed types of every value of cursor, as it's made by encode_cursor for this endpoint (by default - one id)
     try:
-        endpoint_info = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == func_name), '')
-        data = endpoint_info.get('model').objects.all()
-        serializer = endpoint_info.get('serializer')(data, many=True)
-        if serializer.data:
-            res =  {'res': 'good', 'data': serializer.data}
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        values = None
+    if not isinstance(values, list) or len(values) != len(types) or \
+            not all(isinstance(value, value_types) and not isinstance(value, bool) for value, value_types in zip(values, types)):
+        raise ValueError(f'invalid cursor: {cursor}')
+    return values
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, param='page_size'):
+    page_size = request.GET.get(param, '')
+    if not page_size:
+        return default
+    if not page_size.isdigit() or int(page_size) < 1:
+        raise ValueError(f'{param} should be a positive integer, but got: {page_size}')
+    return min(int(page_size), MAX_PAGE_SIZE)
+
+
+def get_projection_fields(request, serializer_class):
+    fields = [x.strip() for x in request.GET.get('fields', '').split(',') if x.strip()]
+    if not fields:
+        return None
+    possible_fields = list(serializer_class().fields)
+    wrong_fields = [x for x in fields if x not in possible_fields]
+    if wrong_fields:
+        raise ValueError(f'not found such fields: {wrong_fields}. Possible fields: {possible_fields}')
+    return fields
+
+
+def is_stream_request(request):
+    return str(request.GET.get('stream', '')).lower() == 'true'
+
+
+def dump_json(value):
+    # the same JSON format as DRF JSONRenderer uses for usual (not streaming) responses
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def json_array_fragments(rows):
+    yield '['
+    for i, row in enumerate(rows):
+        yield ',' + dump_json(row) if i else dump_json(row)
+    yield ']'
+
+
+def stream_json_response(data_fragments):
+    # it writes the same envelope as usual responses: {"res": "good", "data": [...]}, 
+    # but 'data' goes from iterator of already JSON-encoded fragments and is sent by buffered chunks
+    def stream():
+        buffer = ['{"res":"good","data":']
+        buffer_size = 0
+        for fragment in data_fragments:
+            buffer.append(fragment)
+            buffer_size += len(fragment)
+            if buffer_size >= STREAM_BUFFER_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+                buffer_size = 0
+        buffer.append('}')
+        yield ''.join(buffer)
+
+    return StreamingHttpResponse(stream(), content_type='application/json')
+
+
+def m2m_values_by_id(model, m2m_field_name, objects_ids, value_field):
+    # values of Many-To-Many related objects for many objects by ONE query to the through table: {object_id: [value, value, ...]}.
+    # objects_ids can be a list of ids or a queryset with ids (then it will be a subquery)
+    m2m_field = model._meta.get_field(m2m_field_name)
+    source_name, target_name = m2m_field.m2m_field_name(), m2m_field.m2m_reverse_field_name()
+    rows = m2m_field.remote_field.through.objects.filter(**{f'{source_name}__in': objects_ids}).order_by('id')\
+        .values_list(source_name, f'{target_name}__{value_field}')
+    res = {}
+    for object_id, value in rows:
+        res.setdefault(object_id, []).append(value)
+    return res
+
+
+def common_get_func(func_name, request):
+    try:
+        endpoint_info = GET_ENDPOINTS.get(func_name, {})
+        model = endpoint_info.get('model')
+        fields = get_projection_fields(request, endpoint_info.get('serializer'))
+        page_size = get_page_size(request)
+        cursor = request.GET.get('cursor', '')
+
+        # keyset pagination by primary key - so every page is an indexed range scan, even for tables with millions of rows
+        data = model.objects.order_by('pk')
+        if cursor:
+            data = data.filter(pk__gt=decode_cursor(cursor)[0])
+
+        # Many-To-Many fields are loaded by one additional query for the whole page (not by one query for each row)
+        m2m_fields = [f.name for f in model._meta.many_to_many if not fields or f.name in fields]
+        if fields:
+            # projection - select from DB only columns of requested fields
+            data = data.only(*[x for x in fields if x not in m2m_fields] or ['pk'])
+        data = data.prefetch_related(*m2m_fields)
+
+        if is_stream_request(request):
+            serializer = endpoint_info.get('serializer')(fields=fields)
+            rows = (serializer.to_representation(obj) for obj in data.iterator(chunk_size=STREAM_CHUNK_SIZE))
+            return stream_json_response(json_array_fragments(rows))
+
+        data = list(data[:page_size + 1])
+
+        next_cursor = encode_cursor([data[page_size - 1].pk]) if len(data) > page_size else None
+        serializer = endpoint_info.get('serializer')(data[:page_size], many=True, fields=fields)
+        if serializer.data or cursor:
+            res =  {'res': 'good', 'data': serializer.data, 'next_cursor': next_cursor}
         else:
             res =  {'result example': endpoint_info.get('result example')}
         status=http_status.HTTP_200_OK
@@ -1056,21 +1396,19 @@ def common_get_func(func_name):
     return Response(res, status=status)
 
 
+@lru_cache(maxsize=ALL_APIS_CACHE_SIZE)
+def render_all_apis(base_url):
+    # Root page is the same for the same base URL, so it's made only once for every base URL (host)
+    res = {'ADMIN Section': f'{base_url}admin'}
+    for section, apis in ALL_APIS_PATHS.items():
+        res[section] = {name: f'{base_url}{func}' for name, func in apis.items()}
+    return res
+
+
 @api_view(['GET'])
 def get_all_apis(request):
     try:
-        base_url = request.build_absolute_uri()
-        apis = copy.deepcopy(API_SCHEMA)
-        for item in apis:
-            for key in apis[item]:
-                apis[item][key] = f'{base_url}{apis[item][key]['func']}'
-        all_get_apis = apis['all_get_apis']
-        all_post_apis = apis['all_post_apis']
-        res = {
-            'ADMIN Section': f'{base_url}admin',
-            'APIs GET:': all_get_apis,
-            'APIs POST:': all_post_apis
-        }
+        res = render_all_apis(request.build_absolute_uri())
         status=http_status.HTTP_200_OK
     except Exception as e:
         res = {'res': 'error', 'data': {'error': f'{e}'}}
@@ -1081,67 +1419,52 @@ def get_all_apis(request):
 
 @api_view(['GET'])
 @docstring_setup()
+@conditional_on_data_versions(lambda request: ['questions_groups'])
 @func_name_defining
 def get_q_groups(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
 
 
 @api_view(['GET'])
 @docstring_setup()
+@conditional_on_data_versions(lambda request: ['questions'])
 @func_name_defining
 def get_questions(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
 
 
 @api_view(['GET'])
 @docstring_setup()
+@conditional_on_data_versions(lambda request: ['choices'])
 @func_name_defining
 def get_choices(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
+
+
+def poll_data_keys(request):
+    group_id = get_reference_id('questions_groups', 'group_name', request.GET.get('questions_group', ''))
+    return [POLL_KEY.format(group_id=group_id)]
 
 
 @api_view(['GET'])
 @docstring_setup()
+@conditional_on_data_versions(poll_data_keys)
 def get_qc_by_q_group_name(request):
     try:
         questions_group = request.GET.get('questions_group', '')
         if not questions_group:
             base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
-            endpoint_dict = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_qc_by_q_group_name'), {})
+            endpoint_dict = GET_ENDPOINTS.get('get_qc_by_q_group_name', {})
             res = {'detail': endpoint_dict.get('detail'),
                 'example of GET URL with params': f"{base_url}{endpoint_dict.get('example of GET URL with params')}",
                 'result example': endpoint_dict.get('result example')}
             status=http_status.HTTP_200_OK
         else:
-            data = Choice.objects.prefetch_related('question').prefetch_related('questions_group')\
-                .filter(question__questions_group__group_name=questions_group).all().order_by('question__id', 'order')\
-                .values(
-                    group_id=F('question__questions_group__id'),
-                    group_name=F('question__questions_group__group_name'),
-                    question_id=F('question__id'),
-                    question_text=F('question__question_text'),
-                    ch_id=F('id'),
-                    ch_text=F('choice_text'))
-            if data:
-                group_id = data[0].get('group_id')
-                res_dict = {}
-                for item in data:
-                    if item['question_text'] in res_dict:
-                        res_dict[item['question_text']]['choices'].append({'choice_id': item['ch_id'],
-                                                                        'choice_text': item['ch_text']})
-                    else:
-                        res_dict[item['question_text']] = {'group_id': item['group_id'], 
-                                                        'question_id': item['question_id'], 
-                                                        'choices':[{'choice_id': item['ch_id'],
-                                                                        'choice_text': item['ch_text']},]}
-                res_list = []
-                for key in res_dict:
-                    res_list.append({'question_text': key, 
-                                    'group_id': res_dict[key]['group_id'],
-                                    'question_id': res_dict[key]['question_id'],
-                                    'choices': res_dict[key]['choices']})
-
-                res = {'res': 'good', 'data': {'group_id': group_id, 'data_list': res_list}}
+            group_id = get_reference_id('questions_groups', 'group_name', questions_group)
+            # version of poll was already read for ETag - so compiled document is taken from memory without queries
+            data = get_poll_document(group_id, get_data_versions(request, poll_data_keys)[0]['version']) if group_id else None
+            if data and data['data_list']:
+                res = {'res': 'good', 'data': data}
                 status=http_status.HTTP_200_OK
             else:
                 res = {'res': 'error', 'data': {'error': f'not found questions for this group ({questions_group})'}}
@@ -1157,7 +1480,7 @@ def get_qc_by_q_group_name(request):
 @docstring_setup()
 @func_name_defining
 def get_users(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
 
 
 @api_view(['GET'])
@@ -1167,7 +1490,7 @@ def get_one_user(request):
         inc_email = request.GET.get('email', '')
         if not inc_email:
             base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
-            endpoint_dict = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_one_user'), {})
+            endpoint_dict = GET_ENDPOINTS.get('get_one_user', {})
             res = {'detail': endpoint_dict.get('detail'),
                    'example of GET URL with params': f"{base_url}{endpoint_dict.get('example of GET URL with params')}",
                    'result example': endpoint_dict.get('result example')}
@@ -1195,14 +1518,14 @@ def get_one_user(request):
 @docstring_setup()
 @func_name_defining
 def get_users_answers(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
 
 
 @api_view(['GET'])
 @docstring_setup()
 @func_name_defining
 def get_users_cps(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
 
 
 @api_view(['GET'])
@@ -1214,42 +1537,30 @@ def get_user_cp_result_by_q_group_name(request):
 
         if not user_id or not questions_group_name:
             base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
-            endpoint_dict = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_user_cp_result_by_q_group_name'), {})
+            endpoint_dict = GET_ENDPOINTS.get('get_user_cp_result_by_q_group_name', {})
             res = {'detail': endpoint_dict.get('detail'),
                    'example of GET URL with params': f"{base_url}{endpoint_dict.get('example of GET URL with params')}",
                    'result example': endpoint_dict.get('result example')}
             status=http_status.HTTP_200_OK
         else:
-            last_cp = UsersCompletedPoll.objects.filter(user__id=user_id, questions_group__group_name=questions_group_name).order_by('completed_at').last()
+            # results of poll are stored in UsersCompletedPoll when poll is completed - so here is only one row for reading
+            last_cp = UsersCompletedPoll.objects.filter(user__id=user_id, questions_group__group_name=questions_group_name)\
+                .only('id', 'questions_group_id', *POLL_RESULT_FIELDS).order_by('completed_at').last()
 
             if last_cp:
-                data = UsersAnswer.objects.filter(user_completed_poll__id=last_cp.pk).all()\
-                    .values(
-                        user_name=F('user__name'),
-                        user_cp_created_at=F('user_completed_poll__completed_at'),
-                        question_text=F('question__question_text'),
-                        question_order=F('question__order'),
-                        answer_text=F('answer__choice_text'),
-                        answer_order=F('answer__order')
-                )
-
-                if data:
-                    try:
-                        for item in data:
-                            item['answer_score'] = item['answer_order'] - 1
-                        total_score = sum(x['answer_score'] for x in data)
-                        questions_group = QuestionsGroup.objects.filter(group_name=questions_group_name).first()
-                        total_cat = 'Unknown'
-                        for res_type, range_values in questions_group.result_types.items():
-                            if total_score >= range_values[0] and total_score <= range_values[1]:
-                                total_cat = res_type
-                        total_prc = 100.0*total_score/questions_group.max_score
-                        res = {'res': 'good', 'data': {'total_score': round(total_score), 'total_cat': total_cat, 'total_prc': round(total_prc)}}
+                has_answers = True
+                try:
+                    if last_cp.total_score is None:
+                        # result wasn't stored yet (answers were changed after completing or poll was saved without results) - calc and store it now
+                        has_answers = last_cp.save_result()
+                    if has_answers:
+                        res = {'res': 'good', 'data': {'total_score': round(last_cp.total_score), 'total_cat': last_cp.total_cat, 'total_prc': round(last_cp.total_prc)}}
                         status = http_status.HTTP_200_OK
-                    except Exception as calc_e:
-                        res = {'res': 'error', 'data': {'error': f'can not calc results by scores for this user: {user_id} for this ComplitedPoll: {last_cp.pk}. Error: {calc_e}'}}
-                        status = http_status.HTTP_400_BAD_REQUEST
-                else:
+                except Exception as calc_e:
+                    res = {'res': 'error', 'data': {'error': f'can not calc results by scores for this user: {user_id} for this ComplitedPoll: {last_cp.pk}. Error: {calc_e}'}}
+                    status = http_status.HTTP_400_BAD_REQUEST
+
+                if not has_answers:
                     res = {'res': 'error', 'data': {'error': f'not found answers for this user: {user_id} for this ComplitedPoll: {last_cp.pk}'}}
                     status=http_status.HTTP_400_BAD_REQUEST
             else:
@@ -1271,13 +1582,14 @@ def get_journeys_with_countries(*args, **kwargs):
         res_list = [{key: d[key] for key in results_fields} for d in data]
 
         if res_list:
+            countries = m2m_values_by_id(Journey, 'country', data.values('id'), 'flag')
             for item in res_list:
-                item['countries'] = list(Journey.objects.get(pk=item['journey_id']).country.all().values_list('flag', flat=True))
+                item['countries'] = countries.get(item['journey_id'], [])
             
             res = {'res': 'good', 'data_list': res_list}
             status=http_status.HTTP_200_OK
         else:
-            res =  {'result example': next((v.get('result example') for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_journeys_with_countries'), '')}
+            res =  {'result example': GET_ENDPOINTS.get('get_journeys_with_countries', {}).get('result example', '')}
             status=http_status.HTTP_200_OK
     except Exception as e:
         res = {'res': 'error', 'data': {'error': f'{e}'}}
@@ -1286,37 +1598,75 @@ def get_journeys_with_countries(*args, **kwargs):
     return Response(res, status=status)
 
 
+def entry_media_url(request, entry_id, media):
+    return request.build_absolute_uri(entry_media_path(entry_id, media))
+
+
+def entries_values(data, need_full_data):
+    # binary columns (image, audio) are selected from DB only if full data was requested, 
+    # otherwise there are only their sizes and checksums which were saved together with Entry
+    media_fields = (*ENTRY_MEDIA_FIELDS, *[f'{media}_in_storage' for media in ENTRY_MEDIA_FIELDS]) if need_full_data else ()
+    return data.values('id', 'user_id', 'title', 'date_time', 'description', 'text', *media_fields,
+                       'image_size', 'image_checksum', 'audio_size', 'audio_checksum', cat_name=F('category__name'))
+
+
+def entry_media_value(item, media):
+    # bytes of image/audio from binary column or from external storage (by its checksum)
+    value = item.pop(media) or b''
+    if item.pop(f'{media}_in_storage'):
+        value = read_stored_media(item[f'{media}_checksum'])
+    return value
+
+
+def prepare_entry_item(item, need_full_data, request, tags):
+    # in lists of Entries image/audio are represented by links to 'get_entry_media' endpoint (which sends raw bytes) and by sizes in bytes,
+    # and base64 values are added only if need_full_data=true
+    for media in ENTRY_MEDIA_FIELDS:
+        item[f'{media}_size'] = item[f'{media}_size'] or 0
+        item[f'{media}_url'] = entry_media_url(request, item['id'], media) if item[f'{media}_size'] else None
+        if need_full_data:
+            item[f'{media}_base64'] = base64.b64encode(entry_media_value(item, media)).decode()
+    item['tags'] = tags
+    return item
+
+
+def prepare_entries_items(data, need_full_data, request):
+    # Tags are loaded by one query for the whole list of Entries (not by one query for each Entry)
+    tags = m2m_values_by_id(Entry, 'tag', data.values('id'), 'name')
+    return [prepare_entry_item(item, need_full_data, request, tags.get(item['id'], [])) for item in data]
+
+
+def stream_entries_items(data, need_full_data, request):
+    # streaming version - Entries are read from DB by chunks and Tags are loaded by one query for each chunk
+    data = data.iterator(chunk_size=STREAM_CHUNK_SIZE)
+    while chunk := list(islice(data, STREAM_CHUNK_SIZE)):
+        tags = m2m_values_by_id(Entry, 'tag', [item['id'] for item in chunk], 'name')
+        for item in chunk:
+            yield prepare_entry_item(item, need_full_data, request, tags.get(item['id'], []))
+
+
 @api_view(['GET'])
 @docstring_setup()
 def get_entries(request):
     try:
-        data = Entry.objects.all().values('id', 'user_id', 'title', 'date_time', 'description', 'text', 'image', 'audio', 
-                                          cat_name=F('category__name'))
-        if data:
-            for item in data:
-                item['image_base64'] = base64.b64encode(item['image']).decode()
-                item['audio_base64'] = base64.b64encode(item['audio']).decode()
-                item.pop('image')
-                item.pop('audio')
-                item['tags'] = list(Entry.objects.get(pk=item['id']).tag.all().values_list('name', flat=True))
+        need_full_data = request.GET.get('need_full_data', False)
+        data = entries_values(Entry.objects.all(), str(need_full_data).lower() == 'true')
+        if is_stream_request(request):
+            rows = stream_entries_items(data.order_by('id'), str(need_full_data).lower() == 'true', request)
+            return stream_json_response(json_array_fragments(rows))
 
-            need_full_data = request.GET.get('need_full_data', False)
+        if data.exists():
             if not need_full_data:
                 base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
-                endpoint_dict = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_entries'), {})
+                endpoint_dict = GET_ENDPOINTS.get('get_entries', {})
                 res = {'detail': endpoint_dict.get('detail'),
                        'example of GET URL with params': f"{base_url}{endpoint_dict.get('example of GET URL with params')}",
                        'result example': endpoint_dict.get('result example')}
-            elif need_full_data and str(need_full_data).lower() == 'true':
-                res = {'res': 'good', 'data': data}
             else:
-                for item in data:
-                    item['image_base64'] = f'{item['image_base64'][:20]}... (end cutted because of very long length)'
-                    item['audio_base64'] = f'{item['audio_base64'][:20]}... (end cutted because of very long length)'
-                res = {'res': 'good', 'data': data}
+                res = {'res': 'good', 'data': prepare_entries_items(data, str(need_full_data).lower() == 'true', request)}
             status=http_status.HTTP_200_OK
         else:
-            res =  {'result example': next((v.get('result example') for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_entries'), '')}
+            res =  {'result example': GET_ENDPOINTS.get('get_entries', {}).get('result example', '')}
             status=http_status.HTTP_200_OK
     except Exception as e:
         res = {'res': 'error', 'data': {'error': f'{e}'}}
@@ -1330,43 +1680,39 @@ def get_entries(request):
 def get_entry_by_id(request):
     try:
         entry_id = request.GET.get('entry_id', '')
+        need_full_data = request.GET.get('need_full_data', False)
+        base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
+        endpoint_dict = GET_ENDPOINTS.get('get_entry_by_id', {})
         if not entry_id:
-            base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
-            endpoint_dict = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_entry_by_id'), {})
             res = {'detail': endpoint_dict.get('detail'),
                    'example of GET URL with params': f"{base_url}{endpoint_dict.get('example of GET URL with params')}",
                    'result example': endpoint_dict.get('result example')}
             status=http_status.HTTP_200_OK
         else:
-            last_m = Entry.objects.filter(pk=entry_id).last()
-
-            if last_m:
-                tags = list(Entry.objects.get(pk=last_m.pk).tag.all().values_list('name', flat=True))
-                category = Entry.objects.get(pk=last_m.pk).category
-
-                data =  {
-                    'id': last_m.pk, 
-                    'title': last_m.title,
-                    'date': last_m.date_time,
-                    'description': last_m.description,
-                    'text': last_m.text,
-                    'cat_name': category.name,
-                    'image_base64': base64.b64encode(last_m.image).decode(),
-                    'audio_base64': base64.b64encode(last_m.audio).decode(),
-                    'tags': tags
-                }
-                need_full_data = request.GET.get('need_full_data', False)
+            # one query for Entry with its Category (binary columns only if need_full_data=true) and one query for its Tags
+            entry = entries_values(Entry.objects.filter(pk=entry_id), str(need_full_data).lower() == 'true').first()
+
+            if entry:
                 if not need_full_data:
-                    base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
-                    endpoint_dict = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_entry_by_id'), {})
                     res = {'detail': endpoint_dict.get('detail'),
                         'example of GET URL with params': f"{base_url}{endpoint_dict.get('example of GET URL with params')}",
                         'result example': endpoint_dict.get('result example')}
-                elif need_full_data and str(need_full_data).lower() == 'true':
-                    res = {'res': 'good', 'data': data}
                 else:
-                    data['image_base64'] = f'{data['image_base64'][:20]}... (end cutted because of very long length)'
-                    data['audio_base64'] = f'{data['audio_base64'][:20]}... (end cutted because of very long length)'
+                    data =  {
+                        'id': entry['id'], 
+                        'title': entry['title'],
+                        'date': entry['date_time'],
+                        'description': entry['description'],
+                        'text': entry['text'],
+                        'cat_name': entry['cat_name'],
+                    }
+                    for media in ENTRY_MEDIA_FIELDS:
+                        data[f'{media}_size'] = entry[f'{media}_size'] or 0
+                        data[f'{media}_checksum'] = entry[f'{media}_checksum']
+                        data[f'{media}_url'] = entry_media_url(request, entry['id'], media) if entry[f'{media}_size'] else None
+                        if str(need_full_data).lower() == 'true':
+                            data[f'{media}_base64'] = base64.b64encode(entry_media_value(entry, media)).decode()
+                    data['tags'] = list(EntryTag.objects.filter(entries_of_tag__id=entry['id']).values_list('name', flat=True))
                     res = {'res': 'good', 'data': data}
                 status=http_status.HTTP_200_OK
             else:
@@ -1379,46 +1725,91 @@ def get_entry_by_id(request):
     return Response(res, status=status)
 
 
+def entries_by_cat_fragments(items):
+    # streaming version of grouping Entries by Categories: items should be ordered by category, 
+    # so every Category is opened once and closed when the next Category starts
+    yield '['
+    current_cat = None
+    for i, item in enumerate(items):
+        if i == 0:
+            yield '{"category":' + dump_json(item['cat_name']) + ',"entries":[' + dump_json(item)
+        elif item['cat_name'] != current_cat:
+            yield ']},{"category":' + dump_json(item['cat_name']) + ',"entries":[' + dump_json(item)
+        else:
+            yield ',' + dump_json(item)
+        current_cat = item['cat_name']
+    if current_cat is not None:
+        yield ']}'
+    yield ']'
+
+
+# Entries inside of every Category are ordered by date_time (Entries without date_time are first) and then by id.
+# The same ordering is used for keyset pagination inside Category: cursor is [date_time, id] of the last Entry on the page
+ENTRIES_IN_CAT_ORDERING = [F('date_time').asc(nulls_first=True), F('id').asc()]
+
+
+def entries_after_cursor(data, cursor):
+    date_time, entry_id = decode_cursor(cursor, types=((str, type(None)), int))
+    if date_time is None:
+        return data.filter(Q(date_time__isnull=True, id__gt=entry_id) | Q(date_time__isnull=False))
+    date_time = datetime.fromisoformat(date_time)
+    return data.filter(Q(date_time__gt=date_time) | Q(date_time=date_time, id__gt=entry_id))
+
+
+def entries_cursor(item):
+    return encode_cursor([item['date_time'].isoformat() if item['date_time'] else None, item['id']])
+
+
 @api_view(['GET'])
 @docstring_setup()
 def get_entries_by_cat_name(request):
     try:
         category_name = request.GET.get('category_name', '')
-        if category_name:
-            data = Entry.objects.filter(category__name=category_name).all().values('id', 'user_id', 'title', 'date_time', 'description', 'text', 'image', 'audio',
-                                                                                   cat_name=F('category__name'))
-        else:
-            data = Entry.objects.all().values('id', 'user_id', 'title', 'date_time', 'description', 'text', 'image', 'audio',
-                                              cat_name=F('category__name'))
-        data_list = []
-        if data:
-            for item in data:
-                item['image_base64'] = base64.b64encode(item['image']).decode()
-                item.pop('image')
-                item['audio_base64'] = base64.b64encode(item['audio']).decode()
-                item.pop('audio')
-                item['tags'] = list(Entry.objects.get(pk=item['id']).tag.all().values_list('name', flat=True))
-
-                cat_dict = next((d for d in data_list if d["category"] == item['cat_name']), None)
-                if cat_dict:
-                    cat_dict['entries'].append(item)
-                else:
-                    data_list.append({'category': item['cat_name'], 'entries': [item]})
-            
-            need_full_data = request.GET.get('need_full_data', False)
+        need_full_data = request.GET.get('need_full_data', False)
+        cursor = request.GET.get('cursor', '')
+        base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
+        endpoint_dict = GET_ENDPOINTS.get('get_entries_by_cat_name', {})
+        if cursor and not category_name:
+            raise ValueError('cursor can be used only together with category_name (it is a cursor inside of exact Category)')
+
+        entries = Entry.objects.filter(category__name=category_name) if category_name else Entry.objects.all()
+        if is_stream_request(request):
+            if cursor:
+                entries = entries_after_cursor(entries, cursor)
+            data = entries_values(entries, str(need_full_data).lower() == 'true').order_by('category__name', *ENTRIES_IN_CAT_ORDERING)
+            items = stream_entries_items(data, str(need_full_data).lower() == 'true', request)
+            return stream_json_response(entries_by_cat_fragments(items))
+
+        if entries.exists():
             if not need_full_data:
-                base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
-                endpoint_dict = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_entries_by_cat_name'), {})
                 res = {'detail': endpoint_dict.get('detail'),
                        'example of GET URL with params': f"{base_url}{endpoint_dict.get('example of GET URL with params')}",
                        'result example': endpoint_dict.get('result example')}
-            elif need_full_data and str(need_full_data).lower() == 'true':
-                res = {'res': 'good', 'data': data_list}
             else:
-                for item in data_list:
-                    for entry in item['entries']:
-                        entry['image_base64'] = f'{entry['image_base64'][:20]}... (end cutted because of very long length)'
-                        entry['audio_base64'] = f'{entry['audio_base64'][:20]}... (end cutted because of very long length)'
+                # not more than page_size Entries for every Category (+1 for knowing if there is a next page) - 
+                # DB numbers Entries inside of every Category and returns them already ordered by Category
+                page_size = get_page_size(request)
+                if cursor:
+                    entries = entries_after_cursor(entries, cursor)
+                entries = entries.annotate(row_number=Window(RowNumber(), partition_by=F('category__name'), order_by=ENTRIES_IN_CAT_ORDERING))\
+                                 .filter(row_number__lte=page_size + 1)
+                items = list(entries_values(entries, str(need_full_data).lower() == 'true').order_by('category__name', *ENTRIES_IN_CAT_ORDERING))
+                tags = m2m_values_by_id(Entry, 'tag', [item['id'] for item in items], 'name')
+
+                # grouping by one pass with hash index of Categories
+                data_list = []
+                cats_index = {}
+                for item in items:
+                    cat_dict = cats_index.get(item['cat_name'])
+                    if cat_dict is None:
+                        cat_dict = cats_index[item['cat_name']] = {'category': item['cat_name'], 'entries': [], 'next_cursor': None}
+                        data_list.append(cat_dict)
+                    if len(cat_dict['entries']) < page_size:
+                        cat_dict['entries'].append(prepare_entry_item(item, str(need_full_data).lower() == 'true', request, tags.get(item['id'], [])))
+                    else:
+                        cat_dict['next_cursor'] = entries_cursor(cat_dict['entries'][-1])
+                if not data_list and category_name:
+                    data_list.append({'category': category_name, 'entries': [], 'next_cursor': None})
                 res = {'res': 'good', 'data': data_list}
             status=http_status.HTTP_200_OK
         else:
@@ -1437,11 +1828,91 @@ def get_entries_by_cat_name(request):
     return Response(res, status=status)
 
 
+def read_entry_media(entry_id, media, start=None, end=None):
+    # reading binary column from DB - the whole value or only needed part of it (for 'Range' requests)
+    data = Entry.objects.filter(pk=entry_id)
+    if start is None:
+        value = data.values_list(media, flat=True).first()
+    else:
+        value = data.annotate(media_part=Substr(media, start + 1, end - start + 1, output_field=BinaryField()))\
+                    .values_list('media_part', flat=True).first()
+    return bytes(value or b'')
+
+
+def bytes_part(value, start=None, end=None):
+    return value if start is None else value[start:end + 1]
+
+
+def media_response(request, size, content_type, etag, read_bytes):
+    # raw bytes of image/audio with support of conditional request (ETag) and single byte range request ('Range' header).
+    # read_bytes(start, end) is called only when bytes are really needed (not for 304 responses)
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=http_status.HTTP_304_NOT_MODIFIED)
+    else:
+        byte_range = None
+        range_header = request.headers.get('Range', '')
+        if range_header and request.headers.get('If-Range', etag) == etag:
+            byte_range = parse_range_header(range_header, size)
+            if byte_range is None:
+                response = HttpResponse(status=http_status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        if byte_range:
+            start, end = byte_range
+            response = HttpResponse(read_bytes(start, end), status=http_status.HTTP_206_PARTIAL_CONTENT, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+        else:
+            response = HttpResponse(read_bytes(), content_type=content_type)
+            response['Content-Length'] = size
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, BrowsableAPIRenderer, PassthroughRenderer])
+@docstring_setup()
+def get_entry_media(request):
+    try:
+        entry_id = request.GET.get('entry_id', '')
+        media = request.GET.get('media', '')
+        if not entry_id or media not in ENTRY_MEDIA_FIELDS:
+            base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
+            endpoint_dict = GET_ENDPOINTS.get('get_entry_media', {})
+            res = {'detail': endpoint_dict.get('detail'),
+                   'example of GET URL with params': f"{base_url}{endpoint_dict.get('example of GET URL with params')}"}
+            status=http_status.HTTP_200_OK
+        else:
+            # at first only metadata of media is selected, binary column is read only if it's really needed
+            meta = Entry.objects.filter(pk=entry_id).values(size=F(f'{media}_size'), checksum=F(f'{media}_checksum'),
+                                                            content_type=F(f'{media}_content_type'),
+                                                            in_storage=F(f'{media}_in_storage')).first()
+            if meta and meta['size']:
+                # media which was moved out of DB is read from external storage (by its checksum)
+                read_bytes = partial(read_stored_media, meta['checksum']) if meta['in_storage'] else partial(read_entry_media, entry_id, media)
+                if media == 'image' and str(request.GET.get('thumbnail', '')).lower() == 'true':
+                    thumbnail = get_image_thumbnail(meta['checksum'], read_bytes)
+                    if thumbnail:
+                        return media_response(request, len(thumbnail), THUMBNAIL_CONTENT_TYPE, f'"{meta["checksum"]}-thumbnail"',
+                                              partial(bytes_part, thumbnail))
+                return media_response(request, meta['size'], meta['content_type'], f'"{meta["checksum"]}"', read_bytes)
+            else:
+                res = {'res': 'error', 'data': {'error': f'not found {media} for Entry with this id: {entry_id}'}}
+                status=http_status.HTTP_400_BAD_REQUEST
+    except Exception as e:
+        res = {'res': 'error', 'data': {'error': f'{e}'}}
+        status=http_status.HTTP_400_BAD_REQUEST
+
+    return Response(res, status=status)
+
+
 @api_view(['GET'])
 @docstring_setup()
 @func_name_defining
 def get_timelines(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
 
 
 
@@ -1449,7 +1920,7 @@ def get_timelines(*args, **kwargs):
 @docstring_setup()
 @func_name_defining
 def get_tl_events_categories(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
 
 
 
@@ -1457,22 +1928,37 @@ def get_tl_events_categories(*args, **kwargs):
 @docstring_setup()
 @func_name_defining
 def get_tl_events_templates(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
+
+
+def tl_event_cats_with_templates_data_keys(request):
+    # with event_id result also depends on that Event - it's in Timeline of its owner (any change of Event changes version of that Timeline).
+    # Result for Event which doesn't exist is not conditional (version of Timeline of its future owner is unknown)
+    keys = ['timeline_event_categories', 'timeline_event_templates']
+    event_id = request.GET.get('event_id', '')
+    if event_id:
+        user_id = event_owner_id(event_id) if event_id.isdigit() else None
+        if not user_id:
+            return None
+        keys.append(USER_TIMELINE_KEY.format(user_id=user_id))
+    return keys
 
 
 @api_view(['GET'])
 @docstring_setup()
+@conditional_on_data_versions(tl_event_cats_with_templates_data_keys)
 def get_tl_event_cats_with_templates(request):
     try:
-        endpoint_dict = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_tl_event_cats_with_templates'), {})
+        endpoint_dict = GET_ENDPOINTS.get('get_tl_event_cats_with_templates', {})
         base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
         
         # Here we collect all Timeline Event Categories with all their possible Templates.
         # It's for example for default population dropdown lists in two Menus in some App
         # (for choosing Event Category and then choosing Template within this Category) 
-        data = TimelineEventTemplate.objects.all().values('event',  
-                                                        cat_id=F('event_category__id'), 
-                                                        cat_name=F('event_category__category_name'))
+        # (both tables are taken from cache of reference tables)
+        cats_names = {cat['id']: cat['category_name'] for cat in get_reference_rows('timeline_event_categories')}
+        data = [{'event': templ['event'], 'cat_id': templ['event_category_id'], 'cat_name': cats_names[templ['event_category_id']]} 
+                for templ in get_reference_rows('timeline_event_templates') if templ['event_category_id'] in cats_names]
         if data:
             res = {'res': 'good',
                    'detail': endpoint_dict.get('detail'),
@@ -1548,38 +2034,90 @@ def get_tl_event_cats_with_templates(request):
 @docstring_setup()
 @func_name_defining
 def get_timelines_events(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
+
+
+def tl_events_keyset(request, param):
+    # value of before/after param: cursor from previous response (created_at and id of Event) or just timestamp (like 2025-10-30T21:22:23)
+    value = request.GET.get(param, '')
+    if not value:
+        return None
+    try:
+        created_at, event_id = decode_cursor(value, types=(str, int))
+    except (ValueError, TypeError):
+        created_at, event_id = value, None
+    try:
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError):
+        raise ValueError(f'{param} should be a cursor from previous response or a timestamp (like 2025-10-30T21:22:23), but got: {value}')
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at, event_id
+
+
+def tl_events_page(request, user_id):
+    # page of Timeline Events of the last Timeline of User by keyset (timeline, created_at, id) - the newest Events are first
+    limit = get_page_size(request, default=DEFAULT_TL_EVENTS_LIMIT, param='limit')
+    before = tl_events_keyset(request, 'before')
+    after = tl_events_keyset(request, 'after')
+    category = request.GET.get('category', '')
+
+    last_tl_id = UsersTimeline.objects.filter(user__id=user_id).order_by(*TIMELINES_ORDERING).values_list('id', flat=True).last()
+    if not last_tl_id:
+        return None
+    events = UsersTimelineEvent.objects.filter(timeline__id=last_tl_id)
+    if category:
+        events = events.filter(category_id=get_reference_id('timeline_event_categories', 'category_name', category))
+    if before:
+        events = events.filter(Q(created_at__lt=before[0]) | Q(created_at=before[0], id__lt=before[1])) if before[1] is not None else events.filter(created_at__lt=before[0])
+    if after:
+        events = events.filter(Q(created_at__gt=after[0]) | Q(created_at=after[0], id__gt=after[1])) if after[1] is not None else events.filter(created_at__gt=after[0])
+
+    # with only 'after' param - the nearest newer Events are needed, so they are read in ascending order
+    ascending = bool(after and not before)
+    rows = list(events.order_by(*(['created_at', 'id'] if ascending else ['-created_at', '-id'])).values(*TL_EVENT_FIELDS)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if ascending:
+        rows.reverse()
+    return {'res': 'good', 
+            'data': {'user_id': int(user_id), 'timeline_events': [timeline_event_view(item) for item in timeline_events_items(rows)]},
+            'next_cursor': encode_cursor([rows[-1]['created_at'].isoformat(), rows[-1]['id']]) if rows and (has_more or ascending) else None,
+            'prev_cursor': encode_cursor([rows[0]['created_at'].isoformat(), rows[0]['id']]) if rows else None}
 
 
 @api_view(['GET'])
 @docstring_setup()
+@conditional_on_data_versions(lambda request: [USER_TIMELINE_KEY.format(user_id=request.GET.get('user_id', '')), 
+                                               'timeline_event_categories', 'timeline_event_templates', 'event_reaction_categories'])
 def get_tl_events_by_user(request):
     try:
         user_id = request.GET.get('user_id', '')
         if not user_id:
             base_url = request.build_absolute_uri()[:request.build_absolute_uri().find('?')]
-            endpoint_dict = next((v for k,v in API_SCHEMA['all_get_apis'].items() if v['func'] == 'get_tl_events_by_user'), {})
+            endpoint_dict = GET_ENDPOINTS.get('get_tl_events_by_user', {})
             res = {'detail': endpoint_dict.get('detail'),
                    'example of GET URL with params': f"{base_url}{endpoint_dict.get('example of GET URL with params')}",
                    'result example': endpoint_dict.get('result example')}
             status=http_status.HTTP_200_OK
+        elif any(request.GET.get(param, '') for param in ('before', 'after', 'limit', 'category')):
+            res = tl_events_page(request, user_id)
+            status=http_status.HTTP_200_OK
+            if not res:
+                res = {'res': 'error', 'data': {'error': f'not found any Timeline for this user: {user_id}'}}
+                status=http_status.HTTP_400_BAD_REQUEST
         else:
-            last_tl = UsersTimeline.objects.filter(user__id=user_id).order_by('start_dt').last()
+            # the last Timeline of User with all Events and their Reactions is already prepared as one document (see timeline_projection.py),
+            # it's built here only if it doesn't exist yet
+            last_tl = UsersTimelineProjection.objects.filter(user__id=user_id).first() or build_timeline_projection(user_id)
 
             if last_tl:
-                data = UsersTimelineEvent.objects.filter(timeline__id=last_tl.pk).order_by('-created_at').all()\
-                                                 .values('id', 'event', 'created_at', 'description', 'emotion', 
-                                                         cat_name=F('category__category_name'),
-                                                         templ_name=F('event_template__event'))
-
-                if data:
-                    for event in data:
-                        event['created_at'] = datetime.strftime(event['created_at'],'%Y-%m-%dT%H:%M:%S')
-                        event['custom_event'] = event['event'] if event['templ_name'] == 'Custom' else ''
-                    res = {'res': 'good', 'data': {'user_id': last_tl.user.pk, 'timeline_events': data}}
+                if last_tl.events:
+                    data = [timeline_event_view(event) for event in last_tl.events]
+                    res = {'res': 'good', 'data': {'user_id': last_tl.user_id, 'timeline_events': data}}
                     status=http_status.HTTP_200_OK
                 else:
-                    res = {'res': 'error', 'data': {'error': f'not found any Timeline Event for this user: {user_id} and his Timeline: {last_tl.pk}'}}
+                    res = {'res': 'error', 'data': {'error': f'not found any Timeline Event for this user: {user_id} and his Timeline: {last_tl.timeline_id}'}}
                     status=http_status.HTTP_400_BAD_REQUEST
             else:
                 res = {'res': 'error', 'data': {'error': f'not found any Timeline for this user: {user_id}'}}
@@ -1596,20 +2134,20 @@ def get_tl_events_by_user(request):
 @docstring_setup()
 @func_name_defining
 def get_tl_events_reactions_categories(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
 
 
 @api_view(['GET'])
 @docstring_setup()
 @func_name_defining
 def get_tl_events_reactions(*args, **kwargs):
-    return common_get_func(kwargs.get('this_func_name'))
+    return common_get_func(func_name=kwargs.get('this_func_name'), request=args[0])
 
 
 ##################################### POST API finctions #####################################
 def common_add_func(func_name, req_data):
     try:
-        endpoint_info = next((v for k,v in API_SCHEMA['all_post_apis'].items() if v['func'] == func_name), '')
+        endpoint_info = POST_ENDPOINTS.get(func_name, {})
         if req_data:
             data_dict = {}
             for key, value in req_data.items():
@@ -1657,82 +2195,35 @@ def common_add_func(func_name, req_data):
 def add_user(request):
     try:
         nu_serializer = DiaryUserSerializer(data=request.data)
-        nu_res = False
         if nu_serializer.is_valid():
-            is_exist = DiaryUser.objects.filter(email=nu_serializer.validated_data['email']).count()
-
-            if is_exist > 0:
-                res = {'res': 'error', 'data': {'error': f"this email ({nu_serializer.validated_data['email']}) already exist"}}
-                status=http_status.HTTP_400_BAD_REQUEST
-            else:
-                if nu_serializer.validated_data.get('email') and nu_serializer.validated_data.get('email') != '':
-                    try:
-                        nu_serializer.save()
-                        nu_res = True
-                    except Exception as e:
-                        err = f'Error in Saving user: {e}'
-                        res = {'res': 'error', 'data': {'error': err}}
-                        status=http_status.HTTP_400_BAD_REQUEST
-
-                    if nu_res:
-                        nu_id = nu_serializer.data['id']
-                        user_tl = {'user': nu_id}
-                        tl_bad_res = None
-                        tl_good_id = None
-                        tl_event_bad_res = None
-                        tl_event_good_id = None
-
-                        tl_serializer = UsersTimelineSerializer(data=user_tl)
-                        if tl_serializer.is_valid():
-                            try:
-                                tl_serializer.save()
-                                tl_good_id = tl_serializer.data['id']
-                                tech_tl_event_cat = TimelineEventCategory.objects.filter(category_name=TECHNICAL_TL_CATEGORY).first()
-                                if not tech_tl_event_cat:
-                                    tech_tl_event_cat = TimelineEventCategory(category_name=TECHNICAL_TL_CATEGORY)
-                                    tech_tl_event_cat.save()
-                                tech_tl_event_templ = TimelineEventTemplate.objects.filter(event_category=tech_tl_event_cat, event=TECH_TL_REG_NU_EVENT_TEMPLATE).first()
-                                if not tech_tl_event_templ:
-                                    tech_tl_event_templ = TimelineEventTemplate(event_category=tech_tl_event_cat, event=TECH_TL_REG_NU_EVENT_TEMPLATE)
-                                    tech_tl_event_templ.save()
-                                created_at = datetime.now().replace(tzinfo=timezone.utc) 
-                                user_tl_event = {'user': nu_id, 'timeline': tl_good_id, 'category': tech_tl_event_cat.pk, 
-                                                'event': TECH_TL_REG_NU_EVENT_TEMPLATE, 'emotion': EMOTIONS_DICT['good'], 
-                                                'event_template': tech_tl_event_templ.pk, 'created_at': created_at}
-                                tl_event_serializer = UsersTimelineEventSerializer(data=user_tl_event)
-                                if tl_event_serializer.is_valid():
-                                    try:
-                                        tl_event_serializer.save()
-                                        tl_event_good_id = tl_event_serializer.data['id']
-                                    except Exception as e:
-                                        err = f'Error in Saving user_timeline_event: {user_tl_event}. Error: {e}'
-                                        tl_event_res = {'res': 'error', 'data': {'error': err}}
-                                        tl_event_bad_res = tl_event_res
-                                else:
-                                    tl_event_res = {'res': 'error', 'data': {'error': f'incoming UsersTimelineEvent data is not valid: {tl_event_serializer.data}. Errors: {tl_event_serializer.errors}'}}
-                                    tl_event_bad_res = tl_event_res
-                            except Exception as e:
-                                err = f'Error in Saving user_timeline: {user_tl}. Error: {e}'
-                                tl_res = {'res': 'error', 'data': {'error': err}}
-                                tl_bad_res = tl_res
-                        else:
-                            tl_res = {'res': 'error', 'data': {'error': f'incoming UsersTimeline data is not valid: {tl_serializer.data}. Errors: {tl_serializer.errors}'}}
-                            tl_bad_res = tl_res
-                        
-                        if tl_bad_res or tl_event_bad_res:
-                            err = f'Error in validation or saving One of UsersTimeline or UsersTimelineEvent: {tl_bad_res} / {tl_event_bad_res}'
-                            res = {'res': 'error', 'data': {'error': err}}
-                            status=http_status.HTTP_400_BAD_REQUEST
-                        else:
-                            res = {'res': 'good', 'data': {'new_user_saved_id': nu_id, 'new_user_timeline_saved_id': tl_good_id, 
-                                                           'new_user_timeline_event_saved_id': tl_event_good_id}}
-                            status=http_status.HTTP_200_OK
+            email = nu_serializer.validated_data.get('email')
+            if email and email != '':
+                # technical Category and Template are created (if they don't exist) before and outside of registration transaction,
+                # so their cached ids are always ids of really saved rows
+                tech_tl_event_cat_id, tech_tl_event_templ_id = get_tech_tl_event_ids(TECH_TL_REG_NU_EVENT_TEMPLATE)
+                try:
+                    # User, his Timeline and his first Timeline Event are saved all together or NOT saved at all
+                    with transaction.atomic():
+                        new_user = nu_serializer.save()
+                        user_tl = UsersTimeline.objects.create(user=new_user)
+                        created_at = datetime.now().replace(tzinfo=timezone.utc) 
+                        user_tl_event = UsersTimelineEvent.objects.create(user=new_user, timeline=user_tl, category_id=tech_tl_event_cat_id, 
+                                                                          event=TECH_TL_REG_NU_EVENT_TEMPLATE, emotion=EMOTIONS_DICT['good'], 
+                                                                          event_template_id=tech_tl_event_templ_id, created_at=created_at)
+                    res = {'res': 'good', 'data': {'new_user_saved_id': new_user.pk, 'new_user_timeline_saved_id': user_tl.pk, 
+                                                   'new_user_timeline_event_saved_id': user_tl_event.pk}}
+                    status=http_status.HTTP_200_OK
+                except IntegrityError as e:
+                    if DiaryUser.objects.filter(email__iexact=email).exists():
+                        res = {'res': 'error', 'data': {'error': f"this email ({email}) already exist"}}
                     else:
-                        res = {'res': 'error', 'data': {'error': 'new User is not saved'}}
-                        status=http_status.HTTP_400_BAD_REQUEST
-                else:
-                    res = {'res': 'error', 'data': {'error': 'password is empty!'}}
+                        # technical Category or Template could be deleted not by app (then cache wasn't reset) - so they will be read from DB again
+                        invalidate_reference_data()
+                        res = {'res': 'error', 'data': {'error': f'new User is not saved. Error in Saving user, user_timeline or user_timeline_event: {e}'}}
                     status=http_status.HTTP_400_BAD_REQUEST
+            else:
+                res = {'res': 'error', 'data': {'error': 'password is empty!'}}
+                status=http_status.HTTP_400_BAD_REQUEST
         else:
             res = {'res': 'error', 'data': {'error': f'incoming DiaryUser data is not valid: {nu_serializer.data}. Errors: {nu_serializer.errors}'}}
             status=http_status.HTTP_400_BAD_REQUEST
@@ -1757,6 +2248,47 @@ def add_user_completed_poll(*args, **kwargs):
     return common_add_func(func_name=kwargs.get('this_func_name'), req_data=args[0].data)
 
 
+def pk_value(value):
+    # id can be sent as int or as str with digits (like it's allowed by REST framework serializers)
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def validate_user_answers(user_answers):
+    # validation of all answers at once: all referenced Users, Questions and Choices are got from DB by one query for every Model.
+    # returns list of errors in the same format as for one answer (empty list if all answers are valid) 
+    # and list of valid answers as dicts with UsersAnswer fields
+    refs = {'user': ('user_id', DiaryUser), 'question': ('question_id', Question), 'answer': ('choice_id', Choice)}
+    answers = [{field_name: pk_value(ans.get(key)) for field_name, (key, model) in refs.items()} if isinstance(ans, dict) else None 
+               for ans in user_answers]
+    existing_ids = {}
+    for field_name, (key, model) in refs.items():
+        ids = {ans[field_name] for ans in answers if ans and ans[field_name] is not None}
+        existing_ids[field_name] = set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+    answers_bad_res = []
+    for ans, clean_ans in zip(user_answers, answers):
+        errors = {}
+        if clean_ans is None:
+            errors['non_field_errors'] = ['Invalid data. Expected a dictionary.']
+        else:
+            for field_name, (key, model) in refs.items():
+                if ans.get(key) is None:
+                    errors[field_name] = ['This field is required.']
+                elif clean_ans[field_name] is None:
+                    errors[field_name] = [f'Incorrect type. Expected pk value, received {type(ans[key]).__name__}.']
+                elif clean_ans[field_name] not in existing_ids[field_name]:
+                    errors[field_name] = [f'Invalid pk "{clean_ans[field_name]}" - object does not exist.']
+        if errors:
+            answers_bad_res.append({'res': 'error', 'data': {'error': f'incoming UsersAnswer data is not valid: {ans}. Errors: {errors}'}})
+    return answers_bad_res, answers
+
+
 @api_view(['POST'])
 @docstring_setup()
 def add_user_answers_with_cp(request):
@@ -1776,76 +2308,80 @@ def add_user_answers_with_cp(request):
             cp_serializer = UsersCompletedPollSerializer(data=cp_data_dict)
             
             if cp_serializer.is_valid():
-                try:
-                    cp_serializer.save()
-                    q_group = QuestionsGroup.objects.filter(pk=data['completed_poll']['questions_group_id']).first()
-                    if q_group:
-                        user = DiaryUser.objects.filter(pk=data['completed_poll']['user_id']).first()
-                        if user:
-                            timeline = UsersTimeline.objects.filter(user=user).first()
-                            if timeline:
-                                tl_event_cat = TimelineEventCategory.objects.filter(category_name=TECHNICAL_TL_CATEGORY).first()
-                                tl_event = TECH_TL_QG_PASSED_EVENT_TEMPLATE.format(questions_group_name=q_group.group_name)
-                                tl_event_template = TimelineEventTemplate.objects.filter(event_category=tl_event_cat, event=tl_event).first()
-                                if not tl_event_cat or not tl_event or not tl_event_template:
-                                    err = f'Not found Timeline Event Category or Timeline Event Template for adding auto-event "QuestionsGroup PASSED": tl_event_cat: {tl_event_cat}, tl_event: {tl_event}, tl_event_template: {tl_event_template}'
+                # the whole poll (CompletedPoll, Timeline Event and all answers) is saved or NOT saved at all
+                with transaction.atomic():
+                    try:
+                        cp_serializer.save()
+                        q_group = QuestionsGroup.objects.filter(pk=data['completed_poll']['questions_group_id']).first()
+                        if q_group:
+                            user = DiaryUser.objects.filter(pk=data['completed_poll']['user_id']).first()
+                            if user:
+                                timeline = UsersTimeline.objects.filter(user=user).first()
+                                if timeline:
+                                    tl_event_cat = get_reference_id('timeline_event_categories', 'category_name', TECHNICAL_TL_CATEGORY)
+                                    tl_event = TECH_TL_QG_PASSED_EVENT_TEMPLATE.format(questions_group_name=q_group.group_name)
+                                    tl_event_template = get_tl_event_template_id(tl_event_cat, tl_event)
+                                    if not tl_event_cat or not tl_event or not tl_event_template:
+                                        err = f'Not found Timeline Event Category or Timeline Event Template for adding auto-event "QuestionsGroup PASSED": tl_event_cat: {tl_event_cat}, tl_event: {tl_event}, tl_event_template: {tl_event_template}'
+                                    else:
+                                        created_at = datetime.now()
+                                        created_at = created_at.replace(tzinfo=timezone.utc)
+
+                                        m = UsersTimelineEvent(user=user, timeline=timeline, category_id=tl_event_cat, event=tl_event, 
+                                                            emotion=EMOTIONS_DICT['good'], event_template_id=tl_event_template, created_at=created_at)
+                                        m.save()
+                                        cp_res = True
                                 else:
-                                    created_at = datetime.now()
-                                    created_at = created_at.replace(tzinfo=timezone.utc)
-
-                                    m = UsersTimelineEvent(user=user, timeline=timeline, category=tl_event_cat, event=tl_event, 
-                                                        emotion=EMOTIONS_DICT['good'], event_template=tl_event_template, created_at=created_at)
-                                    m.save()
-                                    cp_res = True
+                                    err = f"Not found Timeline for such DiaryUser: {user}"
                             else:
-                                err = f"Not found Timeline for such DiaryUser: {user}"
+                                err = f"Not found such DiaryUser for user_id: {data['completed_poll']['user_id']}"
                         else:
-                            err = f"Not found such DiaryUser for user_id: {data['cp']['user_id']}"
-                    else:
-                        err = f"Not found such QuestionsGroup for questions_group_id: {data['cp']['questions_group_id']}"
-                except Exception as e:
-                    err = f'Error in add_user_answers_with_cp: in Saving user_completed_poll: {e}'
-
-                if cp_res:
-                    cp_id = cp_serializer.data['id']
-                    user_answers = data['user_answers']
-                    answers_bad_res = []
-                    answrs_good_ids = []
-
-                    for ans in user_answers:
-                        ans['user_completed_poll'] = cp_id
-                        ans_data_dict = {}
-                        for key, value in ans.items():
-                            if key in ['user_id', 'question_id', 'user_completed_poll_id']:
-                                ans_data_dict[key.replace('_id', '')] = value
-                            elif key == 'choice_id':
-                                ans_data_dict['answer'] = value
-                            else:
-                                ans_data_dict[key] = value
-                        
-                        user_ans_serializer = UsersAnswerSerializer(data=ans_data_dict)
+                            err = f"Not found such QuestionsGroup for questions_group_id: {data['completed_poll']['questions_group_id']}"
+                    except Exception as e:
+                        err = f'Error in add_user_answers_with_cp: in Saving user_completed_poll: {e}'
 
-                        if user_ans_serializer.is_valid():
+                    if cp_res:
+                        cp_id = cp_serializer.data['id']
+                        user_answers = data['user_answers']
+                        answers_bad_res, answers = validate_user_answers(user_answers)
+                        answrs_good_ids = []
+                        result_err = None
+
+                        if not answers_bad_res:
+                            try:
+                                # all answers are inserted by one query (or by several for very big polls)
+                                new_answers = UsersAnswer.objects.bulk_create([
+                                    UsersAnswer(user_id=ans['user'], question_id=ans['question'], answer_id=ans['answer'], user_completed_poll_id=cp_id)
+                                    for ans in answers
+                                ])
+                                answrs_good_ids = [ans.pk for ans in new_answers]
+                            except Exception as e:
+                                err = f'Error in add_user_answers_with_cp: in Saving user_answers: {user_answers}. Error: {e}'
+                                answers_bad_res.append({'res': 'error', 'data': {'error': err}})
+                        if not answers_bad_res:
                             try:
-                                user_ans_serializer.save()
-                                answrs_good_ids.append(user_ans_serializer.data['id'])
+                                # results of poll are stored right away, so reading of them is just one row
+                                with transaction.atomic():
+                                    cp_serializer.instance.save_result()
                             except Exception as e:
-                                err = f'Error in add_user_answers_with_cp: in Saving user_answer: {ans}. Error: {e}'
-                                ans_res = {'res': 'error', 'data': {'error': err}}
-                                answers_bad_res.append(ans_res)
+                                # poll and answers are saved anyway - results endpoint will try to calc them again
+                                # (and 'fill_polls_results' command can store them after fixing of QuestionsGroup)
+                                result_err = f'Error in add_user_answers_with_cp: results of poll are not stored: {e}'
+                        if answers_bad_res:
+                            err = f'Error in add_user_answers_with_cp: in validation or saving One of UsersAnswer: {answers_bad_res}'
+                            res = {'res': 'error', 'data': {'error': err}}
+                            status=http_status.HTTP_400_BAD_REQUEST
                         else:
-                            ans_res = {'res': 'error', 'data': {'error': f'incoming UsersAnswer data is not valid: {user_ans_serializer.data}. Errors: {user_ans_serializer.errors}'}}
-                            answers_bad_res.append(ans_res)
-                    if answers_bad_res:
-                        err = f'Error in add_user_answers_with_cp: in validation or saving One of UsersAnswer: {answers_bad_res}'
-                        res = {'res': 'error', 'data': {'error': err}}
-                        status=http_status.HTTP_400_BAD_REQUEST
+                            res = {'res': 'good', 'data': {'cp_saved_id': cp_id, 'ans_saved_ids': answrs_good_ids}}
+                            if result_err:
+                                res['data']['result_error'] = result_err
+                            status=http_status.HTTP_200_OK
                     else:
-                        res = {'res': 'good', 'data': {'cp_saved_id': cp_id, 'ans_saved_ids': answrs_good_ids}}
-                        status=http_status.HTTP_200_OK
-                else:
-                    res = {'res': 'error', 'data': {'error': f'cp UserCompletedPoll is not saved! Error: {err}'}}
-                    status=http_status.HTTP_400_BAD_REQUEST
+                        res = {'res': 'error', 'data': {'error': f'cp UserCompletedPoll is not saved! Error: {err}'}}
+                        status=http_status.HTTP_400_BAD_REQUEST
+
+                    if status != http_status.HTTP_200_OK:
+                        transaction.set_rollback(True)
             else:
                 res = {'res': 'error', 'data': {'error': f'incoming UserCompletedPoll data is not valid: {cp_serializer.data}. Errors: {cp_serializer.errors}'}}
                 status=http_status.HTTP_400_BAD_REQUEST
@@ -1859,13 +2395,64 @@ def add_user_answers_with_cp(request):
     return Response(res, status=status)
 
 
+def add_entry_from_multipart(request):
+    # image/audio are taken from uploaded files (or decoded from base64 files) - without building of whole JSON body in memory
+    try:
+        item = {key: request.data.get(key) for key in request.data}
+        entry, tags_ids, error = new_entry_of_item(item, {})
+        if entry:
+            try:
+                with transaction.atomic():
+                    entry.save()
+                    entry.tag.set(tags_ids)
+                res = {'res': 'good', 'data': {'new_saved_data': entry_saved_data(entry)}}
+                status=http_status.HTTP_200_OK
+            except Exception as e:
+                err = f'Error in Saving Entry: {e}'
+                res = {'res': 'error', 'data': {'error': err}}
+                status=http_status.HTTP_400_BAD_REQUEST
+        else:
+            res = {'res': 'error', 'data': {'error': error}}
+            status=http_status.HTTP_400_BAD_REQUEST
+    except Exception as e:
+        res = {'res': 'error', 'data': {'error': f'{e}'}}
+        status=http_status.HTTP_400_BAD_REQUEST
+
+    return Response(res, status=status)
+
+
 @api_view(['POST'])
 @docstring_setup()
 @func_name_defining
 def add_entry(*args, **kwargs):
+    if args[0].content_type.startswith('multipart/form-data'):
+        return add_entry_from_multipart(args[0])
     return common_add_func(func_name=kwargs.get('this_func_name'), req_data=args[0].data)
 
 
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+@docstring_setup()
+def add_entries_bulk(request):
+    try:
+        chunk_size = get_page_size(request, default=ENTRIES_BULK_CHUNK_SIZE, param='chunk_size')
+        data = request.data
+        if isinstance(data, dict):
+            res = {'res': 'error', 'data': {'error': 'POST data should be JSON array (or NDJSON lines) of Entries'}}
+            status=http_status.HTTP_400_BAD_REQUEST
+        else:
+            results = save_entries_in_chunks(data, chunk_size)
+            saved = len([item for item in results if item['res'] == 'good'])
+            res = {'res': 'good' if saved else 'error',
+                   'data': {'saved': saved, 'errors': len(results) - saved, 'results': results}}
+            status=http_status.HTTP_200_OK if saved else http_status.HTTP_400_BAD_REQUEST
+    except Exception as e:
+        res = {'res': 'error', 'data': {'error': f'{e}'}}
+        status=http_status.HTTP_400_BAD_REQUEST
+
+    return Response(res, status=status)
+
+
 @api_view(['POST'])
 @docstring_setup()
 @func_name_defining
@@ -1893,15 +2480,16 @@ def add_timeline_event(request):
         event = data['event']
         emotion = data['emotion']
 
-        user = DiaryUser.objects.filter(pk=user_id).first()
+        # Timeline is found with its User (if Timeline exists - User also exists), Category and Template are taken from cache
         timeline = UsersTimeline.objects.filter(user__id=user_id).first()
-        category = TimelineEventCategory.objects.filter(category_name=cat).first()
-        event_template = TimelineEventTemplate.objects.filter(event_category=category, event=event_tmpl).first()
+        user = timeline.user_id if timeline else False
+        category = get_reference_id('timeline_event_categories', 'category_name', cat)
+        event_template = get_tl_event_template_id(category, event_tmpl)
 
         if user and timeline and category and event and emotion and event_template:
             try:
-                m = UsersTimelineEvent(user=user, timeline=timeline, category=category, event=event, link=link,
-                                       emotion=emotion, event_template=event_template, created_at=created_at)
+                m = UsersTimelineEvent(user_id=user, timeline=timeline, category_id=category, event=event, link=link,
+                                       emotion=emotion, event_template_id=event_template, created_at=created_at)
                 m.save()
                 res = {'res': 'good', 'data': {'event_saved_id': m.pk}}
                 status=http_status.HTTP_200_OK
@@ -1919,6 +2507,29 @@ def add_timeline_event(request):
     return Response(res, status=status)
 
 
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+@docstring_setup()
+def add_timeline_events_bulk(request):
+    try:
+        chunk_size = get_page_size(request, default=TL_EVENTS_BULK_CHUNK_SIZE, param='chunk_size')
+        data = request.data
+        if isinstance(data, dict):
+            res = {'res': 'error', 'data': {'error': 'POST data should be JSON array (or NDJSON lines) of Events'}}
+            status=http_status.HTTP_400_BAD_REQUEST
+        else:
+            results = save_timeline_events_in_chunks(data, chunk_size)
+            saved = len([item for item in results if item['res'] == 'good'])
+            res = {'res': 'good' if saved else 'error',
+                   'data': {'saved': saved, 'errors': len(results) - saved, 'results': results}}
+            status=http_status.HTTP_200_OK if saved else http_status.HTTP_400_BAD_REQUEST
+    except Exception as e:
+        res = {'res': 'error', 'data': {'error': f'{e}'}}
+        status=http_status.HTTP_400_BAD_REQUEST
+
+    return Response(res, status=status)
+
+
 @api_view(['POST'])
 @docstring_setup()
 @func_name_defining
@@ -1946,15 +2557,15 @@ def edit_timeline_event(request):
         event_id = data['event_id']
         emotion = data['emotion']
 
-        category = TimelineEventCategory.objects.filter(category_name=cat).first()
-        event_template = TimelineEventTemplate.objects.filter(event_category=category, event=event_tmpl).first()
+        category = get_reference_id('timeline_event_categories', 'category_name', cat)
+        event_template = get_tl_event_template_id(category, event_tmpl)
         event_obj = UsersTimelineEvent.objects.filter(pk=event_id).first()
 
         if category and event_txt and emotion and event_template and event_obj:
             try:
                 event_obj.emotion = emotion
-                event_obj.category = category
-                event_obj.event_template = event_template
+                event_obj.category_id = category
+                event_obj.event_template_id = event_template
                 event_obj.event = event_txt 
                 event_obj.created_at = created_at
                 event_obj.link = link
@@ -29,6 +29,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # the first one - so time of all other middlewares is in metrics of requests
+    "diary.request_metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -102,4 +104,21 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Custom handler for showing Description of using API in case of Wrong method instead of "Method is not allowed" Error
 REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'diary.views.custom_exception_handler'
-}
\ No newline at end of file
+}
+# Reference tables (categories, templates, types, countries, tags) are cached in memory of every process of app.
+# For sharing this cache between several processes - set here alias of some shared cache from CACHES (like Redis or Memcached)
+REFERENCE_DATA_CACHE_ALIAS = None
+# Storage of Entry image/audio: None - they are stored in DB (BinaryField columns of entries table),
+# or class of external storage - like 'diary.media_storage.FileSystemMediaStorage' (files in ENTRY_MEDIA_ROOT named by sha256 of bytes,
+# so the same image/audio is stored only once). Already stored media is moved by 'python manage.py move_entry_media_to_storage'
+ENTRY_MEDIA_STORAGE = None
+ENTRY_MEDIA_ROOT = BASE_DIR / 'entry_media'
+# Metrics of requests (time, SQL queries, serializers, size of response, repeated queries) are collected by RequestMetricsMiddleware
+# and shown by 'metrics/' endpoint in Prometheus format - only for staff users, by METRICS_TOKEN ('Authorization: Bearer <token>' header)
+# or for requests from METRICS_ALLOWED_IPS (like Prometheus on the same host). With REQUEST_METRICS_HEADER = True metrics of every request
+# are also sent back in 'Server-Timing' header, and with REQUEST_METRICS_REPEATED_QUERY_HEADER = True fingerprint of SQL of N+1 queries -
+# in 'X-Repeated-Query' header (first 16 hex digits of sha256 of SQL)
+METRICS_TOKEN = None
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+REQUEST_METRICS_HEADER = False
+REQUEST_METRICS_REPEATED_QUERY_HEADER = False
@@ -1,6 +1,15 @@
 import os
 from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main_configs.settings")
 
 application = get_wsgi_application()
+
+# reading of reference tables (categories, templates, etc.) into cache before the first request
+try:
+    from diary.reference_data import warm_reference_data
+    warm_reference_data()
+except DatabaseError:
+    # DB is not migrated yet - tables will be read on the first request
+    pass